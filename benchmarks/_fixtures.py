@@ -0,0 +1,69 @@
+"""Local HTTP fixture server for the benchmarks.
+
+`serve_heavy_site()` serves a page with many images, fonts, a video and
+"tracker" scripts. The assets are generated in memory, so that the results do not
+depend on the network.
+"""
+
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+
+def _heavy_page(n_images: int, n_fonts: int) -> bytes:
+    fonts = "\n".join(
+        f"@font-face {{ font-family: f{i}; src: url('/font/{i}.woff2'); }} .f{i} {{ font-family: f{i}; }}"
+        for i in range(n_fonts)
+    )
+    images = "\n".join(f'<img src="/image/{i}.png" width="10" height="10">' for i in range(n_images))
+    texts = "\n".join(f'<p class="f{i}">text {i}</p>' for i in range(n_fonts))
+    return f"""<!doctype html>
+<html><head><title>heavy</title><style>{fonts}</style>
+<script src="/tracker/analytics.js"></script></head>
+<body>{texts}
+{images}
+<video src="/media/movie.mp4" autoplay muted></video>
+<script>fetch("/api/data").then(r => r.json()).then(d => document.title = "loaded " + d.n);</script>
+</body></html>""".encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    page: bytes = b""
+    sizes = {"image": 50_000, "font": 60_000, "media": 2_000_000, "tracker": 80_000}
+    content_types = {"image": "image/png", "font": "font/woff2", "media": "video/mp4", "tracker": "text/javascript"}
+
+    def do_GET(self):
+        kind = self.path.strip("/").split("/")[0]
+        if self.path in ("/", "/index.html"):
+            body, content_type = self.page, "text/html"
+        elif self.path == "/api/data":
+            body, content_type = b'{"n": 1}', "application/json"
+        elif kind in self.sizes:
+            body, content_type = b"\0" * self.sizes[kind], self.content_types[kind]
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve_heavy_site(n_images: int = 50, n_fonts: int = 10) -> Iterator[str]:
+    """Yield the base URL of the local heavy site."""
+    handler = type("Handler", (_Handler,), {"page": _heavy_page(n_images, n_fonts)})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
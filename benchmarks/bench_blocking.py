@@ -0,0 +1,65 @@
+"""Load time and transferred bytes of a heavy page, with / without `block_resources`.
+
+    uv run python benchmarks/bench_blocking.py --repeat 5
+
+The trackers of the fixture live on the same host, so they are blocked by URL pattern.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from playwright.sync_api import sync_playwright
+
+from fairybrowser.devtools.blockers import BlockRule, block_resources
+from _fixtures import serve_heavy_site
+
+
+def _load_once(browser, url: str, rules: list) -> dict:
+    context = browser.new_context()
+    page = context.new_page()
+    client = context.new_cdp_session(page)
+    client.send("Network.enable")
+    transferred = [0]
+    client.on("Network.loadingFinished", lambda params: transferred.__setitem__(0, transferred[0] + params.get("encodedDataLength", 0)))
+    blocker = block_resources(page, *rules, measure=True) if rules else None
+
+    start = time.perf_counter()
+    page.goto(url, wait_until="load")
+    elapsed = time.perf_counter() - start
+    result = {"seconds": elapsed, "bytes": transferred[0]}
+    if blocker is not None:
+        result["blocked"] = blocker.stats.total_blocked
+        result["estimated_bytes_saved"] = blocker.stats.estimated_bytes_saved
+    context.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--images", type=int, default=50)
+    args = parser.parse_args()
+
+    rules = ["images", "fonts", "media", BlockRule(url_patterns=("*/tracker/*",))]
+    summary = {}
+    with serve_heavy_site(n_images=args.images) as base_url, sync_playwright() as p:
+        browser = p.chromium.launch()
+        for name, case_rules in (("baseline", []), ("blocked", rules)):
+            runs = [_load_once(browser, base_url + "/", case_rules) for _ in range(args.repeat)]
+            summary[name] = {
+                "median_seconds": statistics.median(run["seconds"] for run in runs),
+                "median_bytes": statistics.median(run["bytes"] for run in runs),
+                "blocked": runs[-1].get("blocked", 0),
+                "estimated_bytes_saved": runs[-1].get("estimated_bytes_saved", 0),
+            }
+        browser.close()
+    summary["speedup"] = summary["baseline"]["median_seconds"] / summary["blocked"]["median_seconds"]
+    # Measured, to compare with the estimate of the blocker.
+    summary["bytes_saved"] = summary["baseline"]["median_bytes"] - summary["blocked"]["median_bytes"]
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
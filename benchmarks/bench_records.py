@@ -0,0 +1,79 @@
+"""Per-event CPU cost and memory of `RawCommunicationInfo` vs `RawRecord`.
+
+    uv run python benchmarks/bench_records.py --n 20000
+
+`build`: create the record from the fields of a CDP event.
+`dump`: convert to the JSON-ready dict (`model_dump` / `to_json`).
+`load`: read back from the dict (`model_validate` / `from_json`).
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from fairybrowser.devtools.models import RawCommunicationInfo
+from fairybrowser.devtools.records import RawRecord
+
+
+def _fields(i: int) -> dict:
+    return {
+        "url": f"https://api.example.com/v1/items/{i}?page=2",
+        "method": "GET",
+        "status": 200,
+        "timing": {"requestTime": 1000.0 + i, "dnsStart": -1, "dnsEnd": -1, "connectStart": -1, "connectEnd": -1,
+                   "sslStart": -1, "sslEnd": -1, "sendStart": 0.2, "sendEnd": 0.3, "receiveHeadersEnd": 35.1},
+        "wall_time": 1700000000.0 + i,
+        "request_headers": {"Accept": "application/json", "User-Agent": "Mozilla/5.0"},
+        "response_headers": {"Content-Type": "application/json", "Cache-Control": "no-cache"},
+        "request_body": None,
+        "response_body": b'{"id": %d, "name": "item"}' % i,
+    }
+
+
+def _per_event_us(func, items) -> float:
+    start = time.perf_counter()
+    result = [func(elem) for elem in items]
+    elapsed = time.perf_counter() - start
+    del result
+    return elapsed / len(items) * 1e6
+
+
+def _bytes_per_record(cls, items) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [cls(**elem) for elem in items]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return (after - before) / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+
+    items = [_fields(i) for i in range(args.n)]
+    models = [RawCommunicationInfo(**elem) for elem in items]
+    records = [RawRecord(**elem) for elem in items]
+    dumps = [elem.model_dump() for elem in models]
+
+    result = {"n": args.n}
+    for name, cls, build, dump, load in (
+        ("pydantic", RawCommunicationInfo, lambda x: RawCommunicationInfo(**x), lambda x: x.model_dump(),
+         RawCommunicationInfo.model_validate),
+        ("record", RawRecord, lambda x: RawRecord(**x), lambda x: x.to_json(), RawRecord.from_json),
+    ):
+        instances = models if cls is RawCommunicationInfo else records
+        result[name] = {
+            "build_us": _per_event_us(build, items),
+            "dump_us": _per_event_us(dump, instances),
+            "load_us": _per_event_us(load, dumps),
+            "bytes_per_record": _bytes_per_record(cls, items),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""Benchmark suite of the hot paths, with JSON output and baseline comparison.
+
+    uv run python benchmarks/suite.py --output bench.json
+    uv run python benchmarks/suite.py --baseline bench.json --tolerance 0.2   # exit 1 on regression
+    uv run python benchmarks/suite.py --only devtools --sizes 1000 10000 100000
+
+Cases:
+* `runners.launch`: cold / warm launch latency (`_run_chromium`), driver start and `connect_over_cdp`.
+* `runners.page_load`: loading the local fixture site through the CDP connection.
+* `monitors.sweep`: `get_execution_infos` with N registered instances.
+* `port_utils.find_available_port`: scan past N occupied ports.
+* `devtools.collector`: per-request cost of the `DevtoolsUser` network handlers (synthetic CDP events).
+* `devtools.analyzer`: parse throughput of `SimpleRequestAnalyzer` on synthetic captures.
+* `windows.editors`: `to_play_script` and its stages on 10 x N synthetic mouse events (with jitter).
+
+The browser cases are skipped when Chromium is not installed.
+Metric names end with `_seconds` / `_ms` / `_us` (lower is better) or
+`_per_second` (higher is better); the others are informational.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable
+
+import psutil
+
+from fairybrowser import monitors
+from fairybrowser.devtools.analyzers import SimpleRequestAnalyzer
+from fairybrowser.devtools.collectors import DevtoolsUser, _dump_request
+from fairybrowser.devtools.indexes import RequestIndex
+from fairybrowser.devtools.records import RawRecord
+from fairybrowser.models import BrowserInfo, BrowserTypeEnum, ExecutionState
+from fairybrowser.port_utils import find_available_port
+from fairybrowser.windows.editors import classify_clicks, pair_buttons, simplify_moves, to_play_script
+from fairybrowser.windows.streams import EventKindEnum
+from _fixtures import serve_heavy_site
+
+
+CASES: dict[str, Callable[[argparse.Namespace], dict]] = {}
+
+
+class Skip(Exception):
+    pass
+
+
+def case(name: str):
+    def _register(func):
+        CASES[name] = func
+        return func
+    return _register
+
+
+def _timed(func: Callable, *args, **kwargs) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _median(values: list[float]) -> float:
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+# ---- runners ----
+
+
+def _require_chromium() -> None:
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        if not Path(p.chromium.executable_path).exists():
+            raise Skip("Chromium is not installed (`playwright install chromium`).")
+
+
+def _kill(state: ExecutionState) -> None:
+    try:
+        process = psutil.Process(state.pid)
+        for child in process.children(recursive=True):
+            child.kill()
+        process.kill()
+        process.wait(10)
+    except psutil.Error:
+        pass
+    monitors._to_json_path(state.name, state.type).unlink(missing_ok=True)
+
+
+@case("runners.launch")
+def bench_launch(args) -> dict:
+    from playwright.sync_api import sync_playwright
+    from fairybrowser.runners import _fetch_browser, _run_chromium
+
+    _require_chromium()
+    info = BrowserInfo(name=f"bench-{uuid.uuid4().hex[:8]}")
+    profile = Path.home() / f".config/fairybrowser/chromium/{info.name}"
+    result = {}
+    try:
+        for phase in ("cold", "warm"):  # "warm": the profile exists.
+            seconds, state = _timed(_run_chromium, info)
+            result[f"{phase}_launch_seconds"] = seconds
+            driver_seconds, playwright = _timed(sync_playwright().start)
+            connect_seconds, browser = _timed(_fetch_browser, playwright, state.port, state.type)
+            result[f"{phase}_driver_start_seconds"] = driver_seconds
+            result[f"{phase}_connect_seconds"] = connect_seconds
+            browser.close()
+            playwright.stop()
+            _kill(state)
+    finally:
+        shutil.rmtree(profile, ignore_errors=True)
+    return result
+
+
+@case("runners.page_load")
+def bench_page_load(args) -> dict:
+    from playwright.sync_api import sync_playwright
+
+    _require_chromium()
+    with serve_heavy_site() as base_url, sync_playwright() as p:
+        browser = p.chromium.launch()
+        page = browser.new_page()
+        seconds = []
+        for _ in range(args.repeat):
+            elapsed, _ = _timed(page.goto, base_url + "/", wait_until="load")
+            seconds.append(elapsed)
+        browser.close()
+    return {"median_load_seconds": _median(seconds)}
+
+
+# ---- monitors / port_utils ----
+
+
+def _listening_socket(port: int = 0) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", port))
+    sock.listen()
+    return sock
+
+
+@case("monitors.sweep")
+def bench_sweep(args) -> dict:
+    """The instances are simulated with the listening sockets of this process."""
+    result = {}
+    original = monitors._states_folder
+    for n in args.instances:
+        with tempfile.TemporaryDirectory() as folder, ExitStack() as stack:
+            monitors._states_folder = Path(folder)
+            try:
+                for i in range(n):
+                    sock = stack.enter_context(_listening_socket())
+                    monitors.save_state(ExecutionState(name=f"bench{i}", type=BrowserTypeEnum.CHROMIUM,
+                                                       port=sock.getsockname()[1], pid=os.getpid()))
+                seconds = [_timed(monitors.get_execution_infos)[0] for _ in range(args.repeat)]
+                assert len(monitors.get_execution_infos()) == n
+            finally:
+                monitors._states_folder = original
+        result[f"n{n}_sweep_ms"] = _median(seconds) * 1e3
+    return result
+
+
+def _consecutive_free_ports(n: int, start: int = 20000) -> int:
+    port = start
+    while port + n < 65535:
+        if all(_can_bind(port + i) for i in range(n + 1)):
+            return port
+        port += n + 1
+    raise Skip(f"No {n} consecutive free ports.")
+
+
+def _can_bind(port: int) -> bool:
+    try:
+        _listening_socket(port).close()
+        return True
+    except OSError:
+        return False
+
+
+@case("port_utils.find_available_port")
+def bench_find_port(args) -> dict:
+    result = {}
+    for n in args.instances:
+        base = _consecutive_free_ports(n)
+        with ExitStack() as stack:
+            for i in range(n):
+                stack.enter_context(_listening_socket(base + i))
+            seconds = []
+            for _ in range(args.repeat):
+                elapsed, port = _timed(find_available_port, start=base)
+                seconds.append(elapsed)
+            assert port == base + n
+        result[f"n{n}_scan_ms"] = _median(seconds) * 1e3
+    return result
+
+
+# ---- devtools ----
+
+
+class _FakeClient:
+    """CDP session which only dispatches the events given by `emit`."""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def send(self, method, params=None):
+        if method == "Network.getResponseBody":
+            return {"body": '{"id": 1, "name": "item", "tags": ["a", "b"]}', "base64Encoded": False}
+        return {}
+
+    def emit(self, event, params):
+        self.handlers[event](params)
+
+
+def _request_events(i: int) -> list[tuple[str, dict]]:
+    request_id = f"req-{i}"
+    return [
+        ("Network.requestWillBeSent", {
+            "requestId": request_id, "wallTime": 1700000000.0 + i, "type": "XHR",
+            "initiator": {"type": "script", "url": "https://example.com/app.js"},
+            "request": {"url": f"https://api.example.com/v1/items/{i}", "method": "GET",
+                        "headers": {"Accept": "application/json"}},
+        }),
+        ("Network.responseReceived", {
+            "requestId": request_id,
+            "response": {"status": 200, "headers": {"Content-Type": "application/json"}, "connectionId": 7,
+                         "connectionReused": True,
+                         "timing": {"requestTime": 1000.0 + i, "sendStart": 0.1, "sendEnd": 0.2, "receiveHeadersEnd": 20.0}},
+        }),
+        ("Network.loadingFinished", {"requestId": request_id, "timestamp": 1000.03 + i}),
+    ]
+
+
+@case("devtools.collector")
+def bench_collector(args) -> dict:
+    result = {}
+    for n in args.sizes[:2]:
+        events = [event for i in range(n) for event in _request_events(i)]
+        with tempfile.TemporaryDirectory() as folder:
+            user = DevtoolsUser(page=None, output_folder=Path(folder) / "debug")
+            client = _FakeClient()
+            user._start_network(client)
+            user.pipeline.start()
+            start = time.perf_counter()
+            for event, params in events:
+                client.emit(event, params)
+            handler_seconds = time.perf_counter() - start
+            user.close()  # Includes the writes of `LogPipeline`.
+            total_seconds = time.perf_counter() - start
+        result[f"n{n}_handler_us"] = handler_seconds / n * 1e6
+        result[f"n{n}_total_us"] = total_seconds / n * 1e6
+    return result
+
+
+def _synthetic_capture(folder: Path, n: int) -> None:
+    network = folder / "network"
+    network.mkdir(parents=True)
+    for i in range(n):
+        record = RawRecord(
+            url=f"https://api.example.com/v1/items/{i}?page={i % 10}", method="GET" if i % 4 else "POST", status=200,
+            timing={"requestTime": 1000.0 + i, "sendStart": 0.1, "sendEnd": 0.2, "receiveHeadersEnd": 20.0 + i % 50},
+            wall_time=1700000000.0 + i, end_time=1000.05 + i,
+            request_headers={"Accept": "application/json"},
+            response_headers={"Content-Type": "application/json"},
+            request_body=b'{"q": "x"}' if i % 4 == 0 else None,
+            response_body=b'{"id": %d, "name": "item", "tags": ["a", "b"]}' % i,
+        )
+        _dump_request(f"req-{i}", [record], network)
+
+
+@case("devtools.analyzer")
+def bench_analyzer(args) -> dict:
+    result = {}
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            capture = Path(folder) / "debug"
+            _synthetic_capture(capture, n)
+            analyzer = SimpleRequestAnalyzer(capture)
+            for name, func in (
+                ("iter_raw_records", lambda: sum(1 for _ in analyzer.iter_raw_records())),
+                ("simple_requests", lambda: len(analyzer.get_simple_requests())),
+                ("raw_infos", lambda: len(analyzer.raw_infos)),
+                ("load_raw_infos_parallel", lambda: len(analyzer.load_raw_infos())),
+                ("columns", lambda: len(analyzer.columns())),
+            ):
+                seconds, count = _timed(func)
+                assert count == n, (name, count)
+                result[f"n{n}_{name}_per_second"] = n / seconds
+            seconds, _ = _timed(_refresh_index, capture)
+            result[f"n{n}_index_refresh_per_second"] = n / seconds
+    return result
+
+
+def _refresh_index(capture: Path) -> None:
+    index = RequestIndex(capture)
+    try:
+        index.refresh()
+    finally:
+        index.close()
+
+
+# ---- windows ----
+
+
+def _synthetic_mouse_columns(n: int) -> dict:
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    t = np.arange(n) * 0.001
+    kind = np.full(n, EventKindEnum.MOVE, dtype=np.uint8)
+    kind[::1000] = EventKindEnum.PRESS
+    kind[5::1000] = EventKindEnum.RELEASE
+    return {"t": t, "x": np.sin(t) * 500 + 500 + rng.uniform(-0.4, 0.4, n),
+            "y": np.cos(t / 3) * 300 + 300 + rng.uniform(-0.4, 0.4, n),
+            "kind": kind, "value": (kind != EventKindEnum.MOVE).astype(np.int8)}
+
+
+@case("windows.editors")
+def bench_editors(args) -> dict:
+    result = {}
+    for n in args.sizes:
+        n *= 10
+        columns = _synthetic_mouse_columns(n)
+        seconds, _ = _timed(lambda: classify_clicks(pair_buttons(columns)))
+        result[f"n{n}_clicks_per_second"] = n / seconds
+        seconds, _ = _timed(simplify_moves, columns, tolerance=1.0)
+        result[f"n{n}_simplify_per_second"] = n / seconds
+        seconds, script = _timed(to_play_script, columns, tolerance=1.0)
+        result[f"n{n}_script_per_second"] = n / seconds
+        result[f"n{n}_script_events"] = len(script)
+    return result
+
+
+# ---- Runner ----
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of `results` against `baseline` beyond `tolerance` (ratio)."""
+    regressions = []
+    for name, metrics in results.get("cases", {}).items():
+        base_metrics = baseline.get("cases", {}).get(name, {})
+        for key, value in metrics.items():
+            base = base_metrics.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(base, (int, float)) or base <= 0:
+                continue
+            if key.endswith(("_seconds", "_ms", "_us")) and value > base * (1 + tolerance):
+                regressions.append(f"{name}.{key}: {base:.4g} -> {value:.4g} (+{value / base - 1:.0%})")
+            elif key.endswith("_per_second") and value < base * (1 - tolerance):
+                regressions.append(f"{name}.{key}: {base:.4g} -> {value:.4g} ({value / base - 1:.0%})")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", nargs="*", default=[], help="Prefixes of the case names.")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[1000, 10000, 100000],
+                        help="Records of the synthetic captures.")
+    parser.add_argument("--instances", nargs="*", type=int, default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results (JSON).")
+    parser.add_argument("--baseline", help="Compare with the results of a previous run.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = {
+        "environment": {"python": sys.version.split()[0], "platform": platform.platform(), "cpus": os.cpu_count()},
+        "cases": {},
+        "skipped": {},
+    }
+    for name, func in CASES.items():
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        print(f"# {name}", file=sys.stderr, flush=True)
+        try:
+            results["cases"][name] = func(args)
+        except Skip as e:
+            results["skipped"][name] = str(e)
+
+    regressions = []
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        results["regressions"] = regressions
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""`fairybrowser` command.
+
+    fairybrowser serve [--address PATH_OR_HOST:PORT]   # Run the supervisor in the foreground.
+    fairybrowser status
+    fairybrowser register NAME HOST:PORT [--type edge]   # A remote instance (to the supervisor, if running).
+    fairybrowser stop [--stop-instances]
+"""
+
+import argparse
+import json
+import sys
+
+from fairybrowser.models import BrowserTypeEnum
+from fairybrowser.supervisors import Supervisor, SupervisorError
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="fairybrowser")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Run the supervisor.")
+    serve.add_argument("--health-interval", type=float, default=2.0)
+    serve.add_argument("--no-adopt", action="store_true", help="Do not manage the instances running already.")
+    commands.add_parser("status", help="Show the instances of the supervisor.")
+    register = commands.add_parser("register", help="Register a remote instance (`--remote-debugging-port`).")
+    register.add_argument("name")
+    register.add_argument("endpoint", help="host:port")
+    register.add_argument("--type", type=BrowserTypeEnum, default=BrowserTypeEnum.CHROMIUM)
+    stop = commands.add_parser("stop", help="Stop the supervisor.")
+    stop.add_argument("--stop-instances", action="store_true")
+    for command in (serve, commands.choices["status"], register, stop):
+        command.add_argument("--address", help="Unix socket path or host:port (default: $FAIRYBROWSER_SOCKET).")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        supervisor = Supervisor(args.address, health_interval=args.health_interval, adopt=not args.no_adopt)
+        print(f"Serving on {supervisor.address}", flush=True)
+        try:
+            supervisor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    from fairybrowser.clients import SupervisorClient, is_supervisor_running
+
+    if args.command == "register":
+        host, _, port = args.endpoint.rpartition(":")
+        if is_supervisor_running(args.address):
+            with SupervisorClient(args.address) as client:
+                state = client.register(args.name, host, int(port), args.type)
+        else:
+            from fairybrowser.monitors import register_remote
+
+            state = register_remote(args.name, host, int(port), args.type)
+        print(state.model_dump_json())
+        return 0
+
+    try:
+        with SupervisorClient(args.address) as client:
+            if args.command == "status":
+                print(json.dumps([elem.model_dump(mode="json") for elem in client.status()], indent=2))
+            else:
+                client.shutdown(stop_instances=args.stop_instances)
+    except SupervisorError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
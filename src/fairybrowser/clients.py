@@ -0,0 +1,134 @@
+"""Client of the supervisor (`fairybrowser.supervisors`).
+
+```python
+with leased_page("worker-1") as page:  # Requires `fairybrowser serve`.
+    page.goto("https://example.com")
+
+with SupervisorClient() as client:
+    lease = client.lease(exclusive=True)
+    print(lease.ws_endpoint)
+```
+
+The leases are released when the client is closed.
+"""
+
+import json
+import socket
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from playwright.sync_api import Browser, Page, sync_playwright
+
+from fairybrowser.models import BrowserInfo, BrowserTypeEnum, ExecutionState, InstanceStatus, Lease
+from fairybrowser.monitors import to_browser_info
+from fairybrowser.supervisors import SupervisorError, default_address, parse_address
+
+
+class SupervisorClient:
+    def __init__(self, address: str | Path | None = None, timeout: float = 60.0):
+        """timeout: seconds to wait for a response (a lease may launch an instance)."""
+        self.address = str(address or default_address())
+        family, target = parse_address(self.address)
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(target)
+        except OSError as e:
+            self._sock.close()
+            raise SupervisorError(f"No supervisor at {self.address} (`fairybrowser serve`).") from e
+        self._reader = self._sock.makefile("rb")
+
+    def request(self, op: str, **params: Any) -> dict[str, Any]:
+        self._sock.sendall((json.dumps({"op": op, **params}) + "\n").encode())
+        line = self._reader.readline()
+        if not line:
+            raise SupervisorError("The supervisor closed the connection.")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise SupervisorError(response.get("error", "Unknown error."))
+        return response
+
+    def lease(self, info: BrowserInfo | str | None = None, exclusive: bool = False) -> Lease:
+        raw_info = to_browser_info(info).model_dump(mode="json") if info is not None else None
+        response = self.request("lease", info=raw_info, exclusive=exclusive)
+        return Lease.model_validate(response["lease"])
+
+    def release(self, lease: Lease | str) -> bool:
+        lease_id = lease.lease_id if isinstance(lease, Lease) else lease
+        return self.request("release", lease_id=lease_id)["released"]
+
+    def register(self, name: str, host: str, port: int,
+                 type: BrowserTypeEnum = BrowserTypeEnum.CHROMIUM) -> ExecutionState:
+        """Add a remote instance to the supervisor."""
+        response = self.request("register", name=name, host=host, port=port, type=str(type))
+        return ExecutionState.model_validate(response["state"])
+
+    def status(self) -> list[InstanceStatus]:
+        return [InstanceStatus.model_validate(elem) for elem in self.request("status")["instances"]]
+
+    def ping(self) -> bool:
+        return bool(self.request("ping")["ok"])
+
+    def shutdown(self, stop_instances: bool = False) -> None:
+        self.request("shutdown", stop_instances=stop_instances)
+
+    def close(self) -> None:
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self) -> "SupervisorClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def is_supervisor_running(address: str | Path | None = None) -> bool:
+    try:
+        with SupervisorClient(address, timeout=2.0) as client:
+            return client.ping()
+    except (SupervisorError, OSError):
+        return False
+
+
+@contextmanager
+def leased_browser(
+    info: BrowserInfo | str | None = None,
+    exclusive: bool = False,
+    address: str | Path | None = None,
+) -> Iterator[Browser]:
+    """`sync_browser` through the supervisor. The lease is released on the exit."""
+    from fairybrowser.runners import _to_block_presets
+    from fairybrowser.devtools.blockers import block_resources
+
+    with SupervisorClient(address) as client:
+        lease = client.lease(info, exclusive)
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.connect_over_cdp(lease.ws_endpoint or lease.endpoint)
+            presets = _to_block_presets(info)
+            if presets:
+                for context in browser.contexts:
+                    block_resources(context, *presets)
+            yield browser
+
+
+@contextmanager
+def leased_page(
+    info: BrowserInfo | str | None = None,
+    exclusive: bool = False,
+    address: str | Path | None = None,
+) -> Iterator[Page]:
+    """`sync_page` through the supervisor. The lease is released on the exit."""
+    from fairybrowser.runners import _pick_page, _to_block_presets
+    from fairybrowser.devtools.blockers import block_resources
+
+    with SupervisorClient(address) as client:
+        lease = client.lease(info, exclusive)
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.connect_over_cdp(lease.ws_endpoint or lease.endpoint)
+            page = _pick_page(browser, lease.pid, lease.is_local)
+            presets = _to_block_presets(info)
+            if presets:
+                block_resources(page, *presets)
+            yield page
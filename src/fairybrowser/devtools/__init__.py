@@ -5,8 +5,7 @@ from fairybrowser.devtools.analyzers import SimpleRequestAnalyzer
 
 if __name__ == "__main__":
     from fairybrowser import  sync_page
-    with sync_page() as page:
-        DevtoolsUser(page, "./debug").start()
+    with sync_page() as page, DevtoolsUser(page, "./debug"):
         page.goto("about:blank")
         test_url = "https://httpbin.org/post"
         payload = {"foo": "bar", "num": 123}
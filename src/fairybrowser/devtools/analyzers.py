@@ -1,27 +1,144 @@
-import json
-from pathlib import Path 
+import re
+import time
 from pathlib import Path 
 from itertools import chain 
-from fairybrowser.devtools.models import SimpleRequest, RawCommunicationInfo
+from typing import Any, Iterator
+from fairybrowser.devtools.models import SimpleRequest, RawCommunicationInfo, ConsoleRecord, JsonValue
+from fairybrowser.devtools.indexes import MISSING, RequestIndex
+from fairybrowser.devtools.hars import iter_json_array_items
+from fairybrowser.devtools.loaders import LoadReport, load_parallel
+from fairybrowser.devtools.columns import RequestColumns
+from fairybrowser.devtools.records import RawRecord
+from fairybrowser.devtools.timelines import Timeline
+
+_ARRAY_START = re.compile(r"\[")
+
+
+def _validate(record: dict, file_path: Path) -> RawCommunicationInfo:
+    return RawCommunicationInfo.model_validate(record, context={"base_folder": file_path.parent})
 
 class SimpleRequestAnalyzer:
-    def __init__(self, log_folder: Path | str):
+    def __init__(self, log_folder: Path | str, index_ttl: float | None = None):
+        """index_ttl: seconds after which the index is refreshed again by the queries
+        (None: only on the first query and `refresh_index`, e.g. for a finished capture).
+        """
         self.log_folder = Path(log_folder)
         assert self.log_folder.exists()
-
+        self.index_ttl = index_ttl
+        self._index: RequestIndex | None = None
+        self._index_refreshed_at = 0.0
+        self.load_report: LoadReport | None = None
 
     def get_simple_requests(self,
                             method: str | None = None, 
-                            path: str | None = None) -> list[SimpleRequest]:
+                            path: str | None = None,
+                            lazy_bodies: bool = False) -> list[SimpleRequest]:
         """Acquire the simple requests based on the search parapmeters.
+        See `iter_simple_requests` for `lazy_bodies`.
+        """
+        return list(self.iter_simple_requests(method=method, path=path, lazy_bodies=lazy_bodies))
+
+    def iter_simple_requests(self,
+                             method: str | None = None,
+                             path: str | None = None,
+                             lazy_bodies: bool = False) -> Iterator[SimpleRequest]:
+        """Lazy version of `get_simple_requests`.
+
+        The records are parsed one by one and filtered before the models are built,
+        so the peak memory is bounded by the largest record.
+        lazy_bodies: if True, the bodies are read from the disk only when accessed, which saves memory
+            for the metadata-only workloads but re-reads the log file for each accessed body.
         """
-        raw_infos = self.raw_infos
-        simple_requests = [SimpleRequest.from_raw(elem) for elem in raw_infos]
-        if method:
-            simple_requests = [elem for elem in simple_requests if elem.method.lower().find(method.lower()) != -1]
-        if path:
-            simple_requests = [elem for elem in simple_requests if elem.url.lower().find(path.lower()) != -1]
-        return simple_requests
+        for file_path, position, elem in self._iter_records(method=method, path=path):
+            if lazy_bodies:
+                yield SimpleRequest.from_record(elem, file_path, position)
+            else:
+                yield SimpleRequest.from_raw(_validate(elem, file_path))
+
+    def iter_raw_infos(self,
+                       method: str | None = None,
+                       path: str | None = None) -> Iterator[RawCommunicationInfo]:
+        for file_path, _, elem in self._iter_records(method=method, path=path):
+            yield _validate(elem, file_path)
+
+    def iter_raw_records(self,
+                         method: str | None = None,
+                         path: str | None = None) -> Iterator[RawRecord]:
+        """Same as `iter_raw_infos`, but yields the compact `RawRecord` without the validation."""
+        for file_path, _, elem in self._iter_records(method=method, path=path):
+            yield RawRecord.from_json(elem, file_path.parent)
+
+    def _iter_records(self, method: str | None = None, path: str | None = None) -> Iterator[tuple[Path, int, dict]]:
+        """Yield (file, position, JSON record before validation) which match the filters."""
+        method = method.lower() if method else None
+        path = path.lower() if path else None
+        for file_path in self._paths_iterable:
+            with file_path.open() as fp:
+                for position, elem in enumerate(iter_json_array_items(fp, _ARRAY_START)):
+                    if method and str(elem.get("method", "")).lower().find(method) == -1:
+                        continue
+                    if path and str(elem.get("url", "")).lower().find(path) == -1:
+                        continue
+                    yield file_path, position, elem
+
+    def columns(self, method: str | None = None, path: str | None = None) -> RequestColumns:
+        """Columnar (NumPy) view of the requests, for vectorised aggregations."""
+        return RequestColumns.from_raws(self.iter_raw_records(method=method, path=path))
+
+    def timeline(self, method: str | None = None, path: str | None = None) -> Timeline:
+        """Waterfall of the requests: phases, connection reuse, concurrency and critical path."""
+        return Timeline.from_raws(self.iter_raw_records(method=method, path=path))
+
+    @property
+    def index(self) -> RequestIndex:
+        """SQLite index beside the log folder.
+
+        The new / changed files are ingested on the first access, then per `index_ttl` or `refresh_index`.
+        """
+        if self._index is None:
+            self._index = RequestIndex(self.log_folder)
+            self.refresh_index()
+        elif self.index_ttl is not None and time.monotonic() - self._index_refreshed_at >= self.index_ttl:
+            self.refresh_index()
+        return self._index
+
+    def refresh_index(self) -> int:
+        """Ingest the new / changed files. Return the number of ingested files."""
+        if self._index is None:
+            self._index = RequestIndex(self.log_folder)
+        n_ingested = self._index.refresh()
+        self._index_refreshed_at = time.monotonic()
+        return n_ingested
+
+    def query(self,
+              method: str | None = None,
+              host: str | None = None,
+              path_prefix: str | None = None,
+              status_range: tuple[int, int] | None = None,
+              time_window: tuple[float, float] | None = None,
+              content_type: str | None = None,
+              limit: int | None = None) -> list[SimpleRequest]:
+        """Acquire the simple requests via the index. See `RequestIndex.query`.
+        """
+        index = self.index
+        rows = index.query(method=method, host=host, path_prefix=path_prefix, status_range=status_range,
+                           time_window=time_window, content_type=content_type, limit=limit)
+        return index.load_simple_requests(rows)
+
+    def search(self, text: str, part: str | None = None) -> list[SimpleRequest]:
+        """Acquire the simple requests whose body contains all the words of `text`.
+        See `RequestIndex.search`.
+        """
+        index = self.index
+        return index.load_simple_requests(index.search(text, part=part))
+
+    def find(self, path: str | None = None, value: Any = MISSING, /, _part: str | None = None,
+             **fields: JsonValue) -> list[SimpleRequest]:
+        """Acquire the simple requests whose JSON body has the values,
+        e.g. `find("data.items[].id", 42)` or `find(id=42)`. See `RequestIndex.find`.
+        """
+        index = self.index
+        return index.load_simple_requests(index.find(path, value, _part=_part, **fields))
 
     @property
     def simple_requests(self) -> list[SimpleRequest]:
@@ -32,10 +149,23 @@ class SimpleRequestAnalyzer:
 
     @property
     def raw_infos(self) -> list[RawCommunicationInfo]:
+        return list(self.iter_raw_infos())
+
+    def load_raw_infos(self, workers: int | None = None, shard_size: int | None = None) -> list[RawCommunicationInfo]:
+        """Load all the records with a process pool, in the same order as `raw_infos`.
+
+        The throughput is stored in `self.load_report`.
+        """
+        result, self.load_report = load_parallel(self._paths_iterable, workers=workers, shard_size=shard_size)
+        return result
+
+    @property
+    def console_records(self) -> list[ConsoleRecord]:
+        """Acquire the console / exception records."""
         result = []
-        for path in self._paths_iterable:
-            data = json.loads(path.read_text())
-            result += [RawCommunicationInfo.model_validate(elem) for elem in data]
+        for path in self.log_folder.glob("./console/*.jsonl"):
+            with path.open(encoding="utf-8") as fp:
+                result += [ConsoleRecord.model_validate_json(line) for line in fp if line.strip()]
         return result
 
     @property
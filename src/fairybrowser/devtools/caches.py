@@ -0,0 +1,341 @@
+"""Shared, persistent HTTP cache on the `Fetch` domain.
+
+Every named instance has its own user-data-dir, hence its own HTTP cache.
+`HttpCacheStore` lives in one folder per host (`~/.config/fairybrowser/http_cache`),
+so all the instances (and processes) share the cached responses.
+
+* Freshness: `Cache-Control` (`max-age`, `s-maxage`, `no-cache`, `no-store`, `private`) and `Expires`.
+* Privacy: the responses to the requests with `Authorization`, and the responses with
+  `Set-Cookie`, are stored only if `public` or `s-maxage` allows it (RFC 9111 §3.5).
+* Revalidation: `ETag` / `Last-Modified` -> `If-None-Match` / `If-Modified-Since`, `304` is served from the store.
+* `Vary`: the listed request headers are a part of the key.
+* Size: least recently used entries are evicted above `max_bytes`.
+
+```python
+with sync_page() as page:
+    enable_http_cache(page)
+```
+"""
+
+import email.utils
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from playwright.sync_api import Page, Frame
+
+from fairybrowser.devtools.interceptors import FetchHandler, FetchInterceptor, from_header_entries
+
+
+DEFAULT_CACHE_FOLDER = Path.home() / ".config/fairybrowser/http_cache"
+CACHEABLE_STATUSES = {200, 203, 204, 300, 301, 308, 404, 410}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url_key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    vary TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_url_key ON entries(url_key);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def _lower_keys(headers: dict[str, Any] | None) -> dict[str, str]:
+    return {key.lower(): str(value) for key, value in (headers or {}).items()}
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    result: dict[str, str | None] = {}
+    for elem in (value or "").split(","):
+        elem = elem.strip()
+        if not elem:
+            continue
+        name, _, arg = elem.partition("=")
+        result[name.strip().lower()] = arg.strip().strip('"') if arg else None
+    return result
+
+
+def freshness_lifetime(
+    headers: dict[str, str],
+    now: float,
+    request_headers: dict[str, str] | None = None,
+) -> float | None:
+    """Seconds the response is fresh for. None means not storable (for a shared cache).
+
+    headers, request_headers: with the lower-case names.
+    """
+    directives = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in directives or "private" in directives:
+        return None
+    is_personal = "authorization" in (request_headers or {}) or "set-cookie" in headers
+    if is_personal and "public" not in directives and "s-maxage" not in directives:
+        return None
+    if headers.get("vary", "").strip() == "*":
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if (arg := directives.get(name)) is not None:
+            try:
+                return max(float(arg) - float(headers.get("age", 0)), 0.0)
+            except ValueError:
+                return 0.0
+    if expires := headers.get("expires"):
+        try:
+            return max(email.utils.parsedate_to_datetime(expires).timestamp() - now, 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+    if "etag" in headers or "last-modified" in headers:
+        return 0.0  # Storable, but always revalidated.
+    return None
+
+
+def _url_key(method: str, url: str) -> str:
+    return hashlib.sha256(f"{method.upper()} {url}".encode()).hexdigest()
+
+
+def _vary_key(url_key: str, vary_names: list[str], request_headers: dict[str, str]) -> str:
+    values = [f"{name}={request_headers.get(name, '')}" for name in vary_names]
+    return hashlib.sha256("\n".join([url_key, *values]).encode()).hexdigest()
+
+
+def _vary_names(response_headers: dict[str, str]) -> list[str]:
+    return sorted({elem.strip().lower() for elem in response_headers.get("vary", "").split(",") if elem.strip()})
+
+
+@dataclass
+class CachedResponse:
+    key: str
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    expires_at: float
+    etag: str | None
+    last_modified: str | None
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+
+class HttpCacheStore:
+    def __init__(self, folder: str | Path = DEFAULT_CACHE_FOLDER, max_bytes: int = 512 * 1024 * 1024):
+        self.folder = Path(folder)
+        self.body_folder = self.folder / "bodies"
+        self.body_folder.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.folder / "index.sqlite", timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _body_path(self, key: str) -> Path:
+        return self.body_folder / f"{key}.bin"
+
+    def lookup(self, method: str, url: str, request_headers: dict[str, Any] | None = None) -> CachedResponse | None:
+        url_key = _url_key(method, url)
+        headers = _lower_keys(request_headers)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, vary, status, headers, expires_at, etag, last_modified FROM entries WHERE url_key = ?",
+                (url_key,),
+            ).fetchall()
+        for key, vary, status, headers_json, expires_at, etag, last_modified in rows:
+            if key != _vary_key(url_key, json.loads(vary), headers):
+                continue
+            try:
+                body = self._body_path(key).read_bytes()
+            except FileNotFoundError:
+                self._delete(key)
+                return None
+            with self._lock:
+                self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            return CachedResponse(key, status, json.loads(headers_json), body, expires_at, etag, last_modified)
+        return None
+
+    def store(
+        self,
+        method: str,
+        url: str,
+        request_headers: dict[str, Any] | None,
+        status: int,
+        response_headers: dict[str, Any],
+        body: bytes,
+    ) -> bool:
+        """Store the response if it is cacheable. Return True if stored."""
+        now = time.time()
+        lowered = _lower_keys(response_headers)
+        lifetime = freshness_lifetime(lowered, now, _lower_keys(request_headers))
+        if method.upper() != "GET" or status not in CACHEABLE_STATUSES or lifetime is None:
+            return False
+        if len(body) > self.max_bytes:
+            return False
+        url_key = _url_key(method, url)
+        vary_names = _vary_names(lowered)
+        key = _vary_key(url_key, vary_names, _lower_keys(request_headers))
+
+        path = self._body_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(body)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url_key, url, json.dumps(vary_names), status, json.dumps(dict(response_headers)),
+                 len(body), now, now + lifetime, lowered.get("etag"), lowered.get("last-modified"), now),
+            )
+            self._conn.commit()
+        self.increment("stores")
+        self.evict()
+        return True
+
+    def refresh(self, key: str, response_headers: dict[str, Any]) -> None:
+        """Update the freshness after `304 Not Modified`."""
+        now = time.time()
+        lifetime = freshness_lifetime(_lower_keys(response_headers), now) or 0.0
+        with self._lock:
+            self._conn.execute("UPDATE entries SET expires_at = ?, last_access = ? WHERE key = ?", (now + lifetime, now, key))
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Remove the least recently used entries until the total size fits `max_bytes`."""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            victims = []
+            for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+        for key in victims:
+            self._delete(key)
+        self.increment("evictions", len(victims))
+        return len(victims)
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+        self._body_path(key).unlink(missing_ok=True)
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def increment(self, name: str, value: int = 1) -> None:
+        if not value:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, value),
+            )
+            self._conn.commit()
+
+    @property
+    def counters(self) -> dict[str, int]:
+        """Totals shared by all the users of the store."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+
+
+class HttpCacheHandler(FetchHandler):
+    request_stage = True
+    response_stage = True
+
+    def __init__(self, store: HttpCacheStore):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._revalidating: dict[str, CachedResponse] = {}
+
+    def on_request(self, params: dict[str, Any], interceptor: FetchInterceptor) -> bool:
+        request = params["request"]
+        if request["method"].upper() != "GET":
+            return False
+        request_headers = request.get("headers", {})
+        directives = parse_cache_control(_lower_keys(request_headers).get("cache-control"))
+        if "no-store" in directives:
+            return False
+
+        cached = self.store.lookup(request["method"], request["url"], request_headers)
+        if cached is not None and cached.is_fresh(time.time()) and "no-cache" not in directives:
+            self.hits += 1
+            self.store.increment("hits")
+            interceptor.fulfill(params["requestId"], cached.status, cached.headers, cached.body)
+            return True
+
+        if cached is not None and (cached.etag or cached.last_modified):
+            headers = dict(request_headers)
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+            self._revalidating[params["requestId"]] = cached
+            interceptor.continue_request(
+                params["requestId"],
+                headers=[{"name": name, "value": str(value)} for name, value in headers.items()],
+            )
+            return True
+
+        self.misses += 1
+        self.store.increment("misses")
+        return False
+
+    def on_response(self, params: dict[str, Any], interceptor: FetchInterceptor) -> bool:
+        request_id = params["requestId"]
+        cached = self._revalidating.pop(request_id, None)
+        status = params.get("responseStatusCode")
+        if status is None:
+            return False
+        response_headers = from_header_entries(params.get("responseHeaders"))
+        if cached is not None and status == 304:
+            self.revalidated += 1
+            self.store.increment("revalidated")
+            self.store.refresh(cached.key, response_headers)
+            interceptor.fulfill(request_id, cached.status, cached.headers, cached.body)
+            return True
+        if cached is not None:
+            self.misses += 1
+            self.store.increment("misses")
+
+        request = params["request"]
+        if request["method"].upper() != "GET" or status not in CACHEABLE_STATUSES:
+            return False
+        if freshness_lifetime(_lower_keys(response_headers), time.time(), _lower_keys(request.get("headers"))) is None:
+            return False
+        body = interceptor.get_response_body(request_id)
+        self.store.store(request["method"], request["url"], request.get("headers", {}), status, response_headers, body)
+        interceptor.fulfill(request_id, status, response_headers, body)
+        return True
+
+
+def enable_http_cache(page: Page | Frame, store: HttpCacheStore | None = None) -> FetchInterceptor:
+    """Attach the shared HTTP cache to `page`."""
+    return FetchInterceptor.attach(page, [HttpCacheHandler(store or HttpCacheStore())])
@@ -8,8 +8,21 @@ import datetime
 import shutil
 import time
 import re
+import asyncio
+from typing import Callable
 
-from fairybrowser.devtools.models import RawCommunicationInfo
+from fairybrowser.devtools.models import RawCommunicationInfo, SimpleRequest, ConsoleRecord
+from fairybrowser.devtools.records import RawRecord
+from fairybrowser.devtools.consoles import ConsoleCapture
+from fairybrowser.devtools.pipelines import LogPipeline
+from fairybrowser.devtools.hars import HarWriter
+from fairybrowser.devtools.streams import (
+    RequestSink,
+    RequestStream,
+    CallbackSink,
+    AsyncioQueueSink,
+    OverflowPolicyEnum,
+)
 
 def _init_folder(folder: Path):
     if folder.exists():
@@ -19,7 +32,27 @@ def _init_folder(folder: Path):
 
     
 
-def _dump_request(request_id: str, com_infos: list[RawCommunicationInfo], output_folder: Path):
+# Bodies larger than this are stored in `bodies/` as raw bytes, so that they can be memory-mapped.
+BODY_FILE_THRESHOLD = 256 * 1024
+
+
+def _initiator_url(initiator: dict | None) -> str | None:
+    """URL of the document / script in CDP `Network.Initiator`."""
+    if not initiator:
+        return None
+    if initiator.get("url"):
+        return initiator["url"]
+    stack = initiator.get("stack") or {}
+    while stack:
+        for frame in stack.get("callFrames", []):
+            if frame.get("url"):
+                return frame["url"]
+        stack = stack.get("parent") or {}
+    return None
+
+
+def _dump_request(request_id: str, com_infos: list[RawRecord | RawCommunicationInfo], output_folder: Path,
+                  body_file_threshold: int | None = BODY_FILE_THRESHOLD):
     def _sanitize_or_hash_filename(s: str) -> str:
         sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', s)
         if len(sanitized) > 50:
@@ -31,14 +64,39 @@ def _dump_request(request_id: str, com_infos: list[RawCommunicationInfo], output
     path = output_folder / f"{stem}.json"
 
 
-    data = [elem.model_dump() for elem in com_infos]
+    data = [elem.to_json() if isinstance(elem, RawRecord) else elem.model_dump() for elem in com_infos]
+    if body_file_threshold is not None:
+        for i, elem in enumerate(com_infos):
+            for field in ("request_body", "response_body"):
+                body = getattr(elem, field)
+                if body is not None and len(body) >= body_file_threshold:
+                    body_path = output_folder / "bodies" / f"{stem}_{i}_{field}.bin"
+                    body_path.parent.mkdir(exist_ok=True)
+                    body_path.write_bytes(body)
+                    # `path` is relative to the JSON file; `abs_path` serves the readers without the folder.
+                    data[i][field] = {"type": "file", "path": f"bodies/{body_path.name}",
+                                      "abs_path": str(body_path.resolve()), "size": len(body)}
     path.write_text(json.dumps(data, indent=4, ensure_ascii=False))
 
     logging.info(f"Saved network log to {path}")
 
 
 class DevtoolsUser:
-    def __init__(self, page: Page | Frame, output_folder: str | Path | None = None):
+    def __init__(
+        self,
+        page: Page | Frame,
+        output_folder: str | Path | None = None,
+        console_rate: float = 50.0,
+        capture_exceptions: bool = True,
+        echo_console: bool = False,
+        har_path: str | Path | None = None,
+    ):
+        """
+        console_rate: the upper limit of console records / second per target.
+        capture_exceptions: if True, `Runtime.exceptionThrown` is also recorded.
+        echo_console: if True, the recorded console messages are printed.
+        har_path: if given, the network records are also streamed into this HAR file.
+        """
         if not output_folder:
             timestr = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
             output_folder = Path(f"./debug_{timestr}")
@@ -47,19 +105,101 @@ class DevtoolsUser:
         _init_folder(output_folder)
         self.output_folder = output_folder
         self.page = page
+        self.console_rate = console_rate
+        self.capture_exceptions = capture_exceptions
+        self.echo_console = echo_console
+        self._sinks: list[RequestSink] = []
+        self.har_writer = HarWriter(har_path) if har_path else None
+        self.console_capture = ConsoleCapture(self._on_console_record, rate=console_rate)
+        self.pipeline = LogPipeline(output_folder, network_writer=self._write_network, on_flush=self._flush_console)
+
+    def start(self, background: bool = False):
+        """background: if True, the logs are written by a thread; call `close` to wait for them.
 
-    def start(self):
+        `with DevtoolsUser(...)` starts it in the background. Otherwise every record is written
+        at once in the CDP callback (without folding the repeated console messages).
+        """
+        if not background:
+            self.console_capture.dedup_window = 0.0  # Nothing would emit the held record.
         context = self._to_context(self.page)
         client = context.new_cdp_session(self.page)
         self._start_network(client)
+        self.pipeline.start(background)
         self._start_console(client)
 
+    def __enter__(self):
+        self.start(background=True)
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # ----------------------
+    # Live subscription
+    # ----------------------
+    def subscribe(self, sink: RequestSink) -> RequestSink:
+        """Register `sink`, which receives every completed `SimpleRequest`."""
+        self._sinks.append(sink)
+        return sink
+
+    def unsubscribe(self, sink: RequestSink) -> None:
+        if sink in self._sinks:
+            self._sinks.remove(sink)
+        sink.close()
+
+    def stream(
+        self,
+        maxsize: int = 1000,
+        policy: OverflowPolicyEnum = OverflowPolicyEnum.DROP_OLDEST,
+        predicate: Callable[[SimpleRequest], bool] | None = None,
+    ) -> RequestStream:
+        """Return the bounded iterator of the completed requests."""
+        return self.subscribe(RequestStream(maxsize, policy, predicate=predicate))
+
+    def on_request(
+        self,
+        callback: Callable[[SimpleRequest], None],
+        predicate: Callable[[SimpleRequest], bool] | None = None,
+    ) -> CallbackSink:
+        """Call `callback` for every completed request."""
+        return self.subscribe(CallbackSink(callback, predicate))
+
+    def asyncio_queue(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        maxsize: int = 1000,
+        policy: OverflowPolicyEnum = OverflowPolicyEnum.DROP_OLDEST,
+    ) -> asyncio.Queue:
+        """Return `asyncio.Queue` bound to `loop`. `None` is put when `close` is called."""
+        queue = asyncio.Queue(maxsize=maxsize)
+        self.subscribe(AsyncioQueueSink(queue, loop, policy))
+        return queue
+
+    def close(self) -> None:
+        """Write the pending logs and close all the subscriptions."""
+        self.console_capture.flush()
+        self.pipeline.close()
+        if self.har_writer is not None:
+            self.har_writer.close()
+        for sink in self._sinks:
+            sink.close()
+        self._sinks.clear()
+
+    def _publish(self, com_infos: list[RawRecord]) -> None:
+        if not self._sinks:
+            return
+        for elem in com_infos:
+            request = SimpleRequest.from_raw(elem.to_model())
+            for sink in self._sinks:
+                sink.publish(request)
+
     # ----------------------
     # Network
     # ----------------------
     def _start_network(self, client):
         client.send("Network.enable")
-        redirect_map: dict[str, list[RawCommunicationInfo]] = {}
+        # `RawRecord` rather than the pydantic model: no validation per event.
+        redirect_map: dict[str, list[RawRecord]] = {}
         network_folder = self.output_folder / "network"
         _init_folder(network_folder)
 
@@ -69,6 +209,7 @@ class DevtoolsUser:
             method = request["method"]
             url = request["url"]
             headers = request.get("headers", {})
+            wall_time = params.get("wallTime")
             post_data = request.get("postData")
             if isinstance(post_data, str):
                 request_body = post_data.encode("utf-8")  # str -> bytes
@@ -80,22 +221,28 @@ class DevtoolsUser:
             if "redirectResponse" in params:
                 resp = params["redirectResponse"]
                 prev_chain = redirect_map.get(request_id, [])
-                prev_chain.append(RawCommunicationInfo(
+                prev_chain.append(RawRecord(
                     status=resp["status"],
                     url=resp["url"],
                     method=method,
                     timing=resp.get("timing"),
+                    wall_time=wall_time,
+                    connection_id=resp.get("connectionId"),
+                    connection_reused=resp.get("connectionReused"),
                     request_headers=headers,
-                    response_headers=resp.get("headers"),
+                    response_headers=resp.get("headers") or {},
                     request_body=request_body,
                     response_body=None
                 ))
                 redirect_map[request_id] = prev_chain
 
             chain = redirect_map.get(request_id, [])
-            chain.append(RawCommunicationInfo(
+            chain.append(RawRecord(
                 url=url,
                 method=method,
+                wall_time=wall_time,
+                resource_type=params.get("type"),
+                initiator_url=_initiator_url(params.get("initiator")),
                 request_headers=headers,
                 request_body=request_body, 
                 response_headers={}, 
@@ -108,13 +255,16 @@ class DevtoolsUser:
             chain = redirect_map.get(request_id, [])
             if chain:
                 chain[-1].status = response["status"]
-                chain[-1].response_headers = response.get("headers")
+                chain[-1].response_headers = response.get("headers") or {}
                 chain[-1].timing = response.get("timing")
+                chain[-1].connection_id = response.get("connectionId")
+                chain[-1].connection_reused = response.get("connectionReused")
 
         def on_loading_finished(params):
             request_id = params["requestId"]
             chain = redirect_map.get(request_id, [])
             if chain:
+                chain[-1].end_time = params.get("timestamp")
                 try:
                     body_resp = client.send("Network.getResponseBody", {"requestId": request_id})
                     body = body_resp.get("body", b"")
@@ -126,31 +276,49 @@ class DevtoolsUser:
                 except Exception:
                     chain[-1].response_body = b"<not available>"
 
-                _dump_request(request_id, chain, network_folder)
+                self.pipeline.submit_network(request_id, chain)
+                self._publish(chain)
                 del redirect_map[request_id]
 
         client.on("Network.requestWillBeSent", on_request_will_be_sent)
         client.on("Network.responseReceived", on_response_received)
         client.on("Network.loadingFinished", on_loading_finished)
 
+    def _write_network(self, request_id: str, com_infos: list[RawRecord], folder: Path) -> None:
+        # Called in the thread of `LogPipeline`.
+        _dump_request(request_id, com_infos, folder)
+        if self.har_writer is not None:
+            for elem in com_infos:
+                self.har_writer.write(elem.to_model())
+
     # ----------------------
     # Console
     # ----------------------
     def _start_console(self, client):
         client.send("Runtime.enable")
+        try:
+            target = client.send("Target.getTargetInfo")["targetInfo"]["targetId"]
+        except Exception:
+            target = None
 
         def on_console(params):
-            type_ = params.get("type")
-            args = params.get("args", [])
-            messages = []
-            for arg in args:
-                val = arg.get("value")
-                if val is None:
-                    val = arg.get("description", "<complex object>")
-                messages.append(str(val))
-            print(f"\n💬 Console ({type_}): {' '.join(messages)}")
+            self.console_capture.on_console(params, target)
+
+        def on_exception(params):
+            self.console_capture.on_exception(params, target)
 
         client.on("Runtime.consoleAPICalled", on_console)
+        if self.capture_exceptions:
+            client.on("Runtime.exceptionThrown", on_exception)
+
+    def _flush_console(self) -> None:
+        # Called in the thread of `LogPipeline`.
+        self.console_capture.flush(min_age=self.console_capture.dedup_window)
+
+    def _on_console_record(self, record: ConsoleRecord) -> None:
+        self.pipeline.submit_record("console", record)
+        if self.echo_console:
+            print(f"\n💬 Console ({record.type}): {record.text}")
 
     # ----------------------
     # Page -> Context
@@ -0,0 +1,173 @@
+"""Columnar view of a capture.
+
+`RequestColumns` holds one NumPy array per field, so that the aggregations
+(e.g. p50 / p99 latency per host) are vectorised.
+`to_arrow` / `write_parquet` require `pyarrow` (`fairybrowser[arrow]`).
+
+Timing columns are in milliseconds and NaN when not applicable:
+`blocked`, `dns`, `connect`, `ssl`, `send`, `wait` and `total` (until the response headers).
+"""
+
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from fairybrowser.devtools.models import RawCommunicationInfo, timing_to_time
+from fairybrowser.devtools.records import RawRecord
+
+
+TIMING_PHASES = ("blocked", "dns", "connect", "ssl", "send", "wait", "total")
+
+# CDP `ResourceTiming` fields (milliseconds relative to `requestTime`).
+_TIMING_FIELDS = (
+    "dnsStart", "dnsEnd", "connectStart", "connectEnd", "sslStart", "sslEnd",
+    "sendStart", "sendEnd", "receiveHeadersEnd",
+)
+
+
+def _mime_type(headers: dict[str, Any] | None) -> str:
+    for key, value in (headers or {}).items():
+        if key.lower() == "content-type":
+            return str(value).split(";")[0].strip().lower()
+    return ""
+
+
+def _timing_values(timing: dict[str, Any] | None) -> list[float]:
+    result = []
+    for key in _TIMING_FIELDS:
+        value = (timing or {}).get(key)
+        # CDP uses -1 for "not applicable".
+        result.append(float(value) if isinstance(value, (int, float)) and value >= 0 else np.nan)
+    return result
+
+
+def _span(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(starts) | np.isnan(ends), np.nan, ends - starts)
+
+
+@dataclass
+class RequestColumns:
+    url: np.ndarray  # object
+    host: np.ndarray  # object
+    method: np.ndarray  # object
+    status: np.ndarray  # int32, -1 when unknown
+    time: np.ndarray  # float64, seconds (`requestTime`)
+    blocked: np.ndarray  # float64, milliseconds
+    dns: np.ndarray
+    connect: np.ndarray
+    ssl: np.ndarray
+    send: np.ndarray
+    wait: np.ndarray
+    total: np.ndarray
+    request_size: np.ndarray  # int64, bytes
+    response_size: np.ndarray  # int64, bytes
+    mime_type: np.ndarray  # object
+
+    def __len__(self) -> int:
+        return len(self.url)
+
+    @classmethod
+    def from_raws(cls, raws: Iterable[RawCommunicationInfo | RawRecord]) -> "RequestColumns":
+        urls, hosts, methods, mimes = [], [], [], []
+        statuses, times, request_sizes, response_sizes = [], [], [], []
+        timings = []
+        for raw in raws:
+            urls.append(raw.url)
+            hosts.append((urlsplit(raw.url).hostname or "").lower())
+            methods.append(raw.method.upper())
+            mimes.append(_mime_type(raw.response_headers))
+            statuses.append(raw.status if raw.status is not None else -1)
+            times.append(timing_to_time(raw.timing))
+            request_sizes.append(len(raw.request_body or b""))
+            response_sizes.append(len(raw.response_body or b""))
+            timings.append(_timing_values(raw.timing))
+
+        t = np.asarray(timings, dtype=np.float64).reshape(-1, len(_TIMING_FIELDS)).T
+        dns_start, dns_end, connect_start, connect_end, ssl_start, ssl_end, send_start, send_end, headers_end = t
+        first = np.fmin(np.fmin(dns_start, connect_start), send_start)
+        return cls(
+            url=np.asarray(urls, dtype=object),
+            host=np.asarray(hosts, dtype=object),
+            method=np.asarray(methods, dtype=object),
+            status=np.asarray(statuses, dtype=np.int32),
+            time=np.asarray(times, dtype=np.float64),
+            blocked=first,
+            dns=_span(dns_start, dns_end),
+            connect=_span(connect_start, connect_end),
+            ssl=_span(ssl_start, ssl_end),
+            send=_span(send_start, send_end),
+            wait=_span(send_end, headers_end),
+            total=headers_end,
+            request_size=np.asarray(request_sizes, dtype=np.int64),
+            response_size=np.asarray(response_sizes, dtype=np.int64),
+            mime_type=np.asarray(mimes, dtype=object),
+        )
+
+    def to_dict(self) -> dict[str, np.ndarray]:
+        return {elem.name: getattr(self, elem.name) for elem in fields(self)}
+
+    def select(self, mask: np.ndarray) -> "RequestColumns":
+        return type(self)(**{name: array[mask] for name, array in self.to_dict().items()})
+
+    def to_arrow(self):
+        """Return `pyarrow.Table`."""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("`pyarrow` is required for Arrow / Parquet: `pip install fairybrowser[arrow]`.") from e
+        arrays = {}
+        for name, array in self.to_dict().items():
+            if array.dtype == object:
+                arrays[name] = pa.array(array.tolist(), type=pa.string())
+            elif name == "status":
+                arrays[name] = pa.array(array, mask=array < 0)
+            else:
+                arrays[name] = pa.array(array, from_pandas=True)  # NaN -> null
+        return pa.table(arrays)
+
+    def write_parquet(self, path: str | Path) -> None:
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), str(path))
+
+
+def group_percentiles(
+    keys: np.ndarray,
+    values: np.ndarray,
+    q: Iterable[float] = (50, 99),
+) -> dict[Any, dict[float, float]]:
+    """Percentiles (linear interpolation) of `values` per key, without Python loops over the records.
+
+    NaN values are ignored.
+    """
+    q = list(q)
+    valid = ~np.isnan(values)
+    keys, values = keys[valid], values[valid]
+    if len(values) == 0:
+        return {}
+    uniques, codes = np.unique(keys, return_inverse=True)
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    counts = np.bincount(codes, minlength=len(uniques))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    result_columns = []
+    for elem in q:
+        position = (counts - 1) * (elem / 100.0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        low_values = sorted_values[starts + lower]
+        high_values = sorted_values[starts + upper]
+        result_columns.append(low_values + (high_values - low_values) * (position - lower))
+
+    return {key: {elem: float(column[i]) for elem, column in zip(q, result_columns)}
+            for i, key in enumerate(uniques.tolist())}
+
+
+def latency_percentiles(columns: RequestColumns, by: str = "host", q: Iterable[float] = (50, 99),
+                        phase: str = "total") -> dict[Any, dict[float, float]]:
+    """e.g. `latency_percentiles(columns)` -> `{"example.com": {50: 12.3, 99: 80.1}, ...}`."""
+    return group_percentiles(getattr(columns, by), getattr(columns, phase), q)
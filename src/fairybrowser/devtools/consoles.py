@@ -0,0 +1,166 @@
+"""Structured, rate-limited capture of the console messages.
+
+* Per-target token bucket (`rate` messages / second, `burst` at once).
+* Identical consecutive messages within `dedup_window` are folded into
+  one record (`ConsoleRecord.duplicates`). The folded record is held until
+  a different message arrives or `flush` is called (`flush(min_age=dedup_window)`
+  periodically, so that a lone message is not held indefinitely).
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from fairybrowser.devtools.models import ConsoleRecord
+
+
+@dataclass
+class ConsoleStats:
+    recorded: int = 0
+    duplicates: int = 0
+    rate_limited: int = 0
+
+
+@dataclass
+class _TargetState:
+    tokens: float
+    updated: float
+    stats: ConsoleStats = field(default_factory=ConsoleStats)
+    pending: ConsoleRecord | None = None
+    pending_key: tuple | None = None
+    pending_since: float = 0.0
+
+
+def _to_text(args: list[dict[str, Any]]) -> str:
+    messages = []
+    for arg in args:
+        val = arg.get("value")
+        if val is None:
+            val = arg.get("description", "<complex object>")
+        messages.append(str(val))
+    return " ".join(messages)
+
+
+def _top_frame(stack_trace: dict | None) -> dict:
+    if not stack_trace:
+        return {}
+    frames = stack_trace.get("callFrames") or []
+    return frames[0] if frames else {}
+
+
+def console_params_to_record(params: dict[str, Any], target: str | None = None) -> ConsoleRecord:
+    """`Runtime.consoleAPICalled` -> `ConsoleRecord`."""
+    frame = _top_frame(params.get("stackTrace"))
+    return ConsoleRecord(
+        kind="console",
+        type=params.get("type", "log"),
+        timestamp=float(params.get("timestamp", time.time() * 1000)),
+        text=_to_text(params.get("args", [])),
+        target=target,
+        url=frame.get("url") or None,
+        line=frame.get("lineNumber"),
+        column=frame.get("columnNumber"),
+        function=frame.get("functionName") or None,
+    )
+
+
+def exception_params_to_record(params: dict[str, Any], target: str | None = None) -> ConsoleRecord:
+    """`Runtime.exceptionThrown` -> `ConsoleRecord`."""
+    details = params.get("exceptionDetails", {})
+    exception = details.get("exception") or {}
+    text = exception.get("description") or details.get("text", "")
+    frame = _top_frame(details.get("stackTrace"))
+    return ConsoleRecord(
+        kind="exception",
+        type="exception",
+        timestamp=float(params.get("timestamp", time.time() * 1000)),
+        text=text,
+        target=target,
+        url=details.get("url") or frame.get("url") or None,
+        line=details.get("lineNumber", frame.get("lineNumber")),
+        column=details.get("columnNumber", frame.get("columnNumber")),
+        function=frame.get("functionName") or None,
+    )
+
+
+class ConsoleCapture:
+    def __init__(
+        self,
+        sink: Callable[[ConsoleRecord], None],
+        rate: float = 50.0,
+        burst: int = 200,
+        dedup_window: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.sink = sink
+        self.rate = rate
+        self.burst = burst
+        self.dedup_window = dedup_window
+        self.clock = clock
+        self._targets: dict[str | None, _TargetState] = {}
+        # `flush` may be called from the writer thread. The sink is called outside the lock.
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict[str | None, ConsoleStats]:
+        return {target: state.stats for target, state in self._targets.items()}
+
+    def on_console(self, params: dict[str, Any], target: str | None = None) -> None:
+        self.add(console_params_to_record(params, target))
+
+    def on_exception(self, params: dict[str, Any], target: str | None = None) -> None:
+        self.add(exception_params_to_record(params, target))
+
+    def add(self, record: ConsoleRecord) -> None:
+        with self._lock:
+            emitted = self._add(record)
+        for elem in emitted:
+            self.sink(elem)
+
+    def _add(self, record: ConsoleRecord) -> list[ConsoleRecord]:
+        now = self.clock()
+        state = self._targets.get(record.target)
+        if state is None:
+            state = _TargetState(tokens=float(self.burst), updated=now)
+            self._targets[record.target] = state
+
+        key = (record.kind, record.type, record.text, record.url, record.line, record.column)
+        if state.pending is not None and state.pending_key == key and now - state.pending_since < self.dedup_window:
+            state.pending.duplicates += 1
+            state.stats.duplicates += 1
+            return []
+
+        state.tokens = min(float(self.burst), state.tokens + (now - state.updated) * self.rate)
+        state.updated = now
+        if state.tokens < 1.0:
+            state.stats.rate_limited += 1
+            return []
+        state.tokens -= 1.0
+
+        emitted = self._take_pending(state)
+        state.pending, state.pending_key, state.pending_since = record, key, now
+        if self.dedup_window <= 0:
+            emitted += self._take_pending(state)
+        return emitted
+
+    def flush(self, min_age: float | None = None) -> None:
+        """Emit the records held for deduplication (only those held for `min_age` seconds or more, if given)."""
+        with self._lock:
+            now = self.clock()
+            emitted = [
+                record
+                for state in self._targets.values()
+                if min_age is None or now - state.pending_since >= min_age
+                for record in self._take_pending(state)
+            ]
+        for elem in emitted:
+            self.sink(elem)
+
+    def _take_pending(self, state: _TargetState) -> list[ConsoleRecord]:
+        if state.pending is None:
+            return []
+        record = state.pending
+        state.pending, state.pending_key = None, None
+        state.stats.recorded += 1
+        return [record]
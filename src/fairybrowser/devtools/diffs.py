@@ -0,0 +1,221 @@
+"""Compare two captures of the same workflow.
+
+The requests are matched by the method and the URL template (IDs, UUIDs and
+hashes in the path are replaced, the query values are dropped), and compared
+per template and per host: latency (`total`, until the response headers),
+response size and status mix.
+
+```python
+diff = diff_captures("./debug-2024-05-01", "./debug-2024-05-02")
+print(diff.model_dump_json(indent=2))
+assert not diff.failed
+```
+
+Command line (exit code 1 when a regression is found):
+
+```
+python -m fairybrowser.devtools.diffs OLD_FOLDER NEW_FOLDER --latency-ratio 1.3 --output diff.json
+```
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from fairybrowser.devtools.analyzers import SimpleRequestAnalyzer
+from fairybrowser.devtools.columns import RequestColumns, group_percentiles
+
+
+_SEGMENT_PATTERNS = (
+    (re.compile(r"^\d+$"), "{id}"),
+    (re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE), "{uuid}"),
+    (re.compile(r"^[0-9a-f]{16,}$", re.IGNORECASE), "{hash}"),
+    (re.compile(r"^(?=.*\d)[A-Za-z0-9_-]{20,}$"), "{token}"),
+)
+
+
+def url_template(method: str, url: str) -> str:
+    """e.g. ("get", "https://API.site/v1/users/42?page=2&q=x") -> "GET api.site/v1/users/{id}?page&q"."""
+    parts = urlsplit(url)
+    segments = []
+    for segment in parts.path.split("/"):
+        for pattern, replacement in _SEGMENT_PATTERNS:
+            if pattern.match(segment):
+                segment = replacement
+                break
+        segments.append(segment)
+    template = f"{method.upper()} {(parts.hostname or '').lower()}{'/'.join(segments) or '/'}"
+    if keys := sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)}):
+        template += "?" + "&".join(keys)
+    return template
+
+
+class DiffThresholds(BaseModel, frozen=True):
+    latency_ratio: float = 1.5  # p95 new / old.
+    latency_min_ms: float = 50.0  # Smaller increases of p95 are ignored as noise.
+    size_ratio: float = 1.25  # Mean response size new / old.
+    size_min_bytes: int = 10_000
+    error_rate_increase: float = 0.05  # Absolute increase of the ratio of 4xx / 5xx / failed.
+    min_count: int = 1  # Groups with fewer requests (on either side) are not compared.
+    fail_on_added: bool = False
+    fail_on_removed: bool = False
+
+
+class GroupStats(BaseModel, frozen=True):
+    count: int
+    p50: float | None  # Milliseconds.
+    p95: float | None
+    mean_size: float  # Response bytes.
+    statuses: dict[str, int]  # "2xx" / "3xx" / "4xx" / "5xx" / "failed" -> count
+
+    @property
+    def error_rate(self) -> float:
+        errors = sum(self.statuses.get(key, 0) for key in ("4xx", "5xx", "failed"))
+        return errors / self.count if self.count else 0.0
+
+
+class GroupChange(BaseModel, frozen=True):
+    key: str
+    old: GroupStats
+    new: GroupStats
+    regressions: list[str] = Field(default_factory=list)  # "latency" / "size" / "errors"
+
+
+class CaptureDiff(BaseModel):
+    old_folder: str
+    new_folder: str
+    thresholds: DiffThresholds
+    added: list[str] = Field(default_factory=list)  # URL templates only in the new capture.
+    removed: list[str] = Field(default_factory=list)
+    templates: list[GroupChange] = Field(default_factory=list)
+    hosts: list[GroupChange] = Field(default_factory=list)
+
+    @property
+    def regressions(self) -> list[GroupChange]:
+        return [elem for elem in self.templates + self.hosts if elem.regressions]
+
+    @property
+    def failed(self) -> bool:
+        return bool(
+            self.regressions
+            or (self.thresholds.fail_on_added and self.added)
+            or (self.thresholds.fail_on_removed and self.removed)
+        )
+
+    def summary(self) -> dict:
+        """Short machine-readable result, e.g. for CI."""
+        return {
+            "failed": self.failed,
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "regressions": [{"key": elem.key, "regressions": elem.regressions,
+                             "old_p95": elem.old.p95, "new_p95": elem.new.p95,
+                             "old_mean_size": elem.old.mean_size, "new_mean_size": elem.new.mean_size}
+                            for elem in self.regressions],
+        }
+
+
+def _status_class(status: int) -> str:
+    return "failed" if status < 0 else f"{status // 100}xx"
+
+
+def group_stats(columns: RequestColumns, keys: np.ndarray) -> dict[str, GroupStats]:
+    if len(keys) == 0:
+        return {}
+    percentiles = group_percentiles(keys, columns.total, (50, 95))
+    uniques, codes = np.unique(keys, return_inverse=True)
+    counts = np.bincount(codes, minlength=len(uniques))
+    sizes = np.bincount(codes, weights=columns.response_size, minlength=len(uniques))
+    statuses: dict[str, dict[str, int]] = {}
+    for key, status in zip(keys.tolist(), columns.status.tolist()):
+        mix = statuses.setdefault(key, {})
+        mix[_status_class(status)] = mix.get(_status_class(status), 0) + 1
+
+    result = {}
+    for i, key in enumerate(uniques.tolist()):
+        latency = percentiles.get(key, {})
+        result[key] = GroupStats(
+            count=int(counts[i]),
+            p50=latency.get(50),
+            p95=latency.get(95),
+            mean_size=float(sizes[i] / counts[i]),
+            statuses=statuses[key],
+        )
+    return result
+
+
+def _regressions(old: GroupStats, new: GroupStats, thresholds: DiffThresholds) -> list[str]:
+    if min(old.count, new.count) < thresholds.min_count:
+        return []
+    result = []
+    if old.p95 is not None and new.p95 is not None:
+        if new.p95 - old.p95 >= thresholds.latency_min_ms and new.p95 >= old.p95 * thresholds.latency_ratio:
+            result.append("latency")
+    if (new.mean_size - old.mean_size >= thresholds.size_min_bytes
+            and new.mean_size >= old.mean_size * thresholds.size_ratio):
+        result.append("size")
+    if new.error_rate - old.error_rate >= thresholds.error_rate_increase:
+        result.append("errors")
+    return result
+
+
+def _compare(old: dict[str, GroupStats], new: dict[str, GroupStats], thresholds: DiffThresholds) -> list[GroupChange]:
+    return [GroupChange(key=key, old=old[key], new=new[key], regressions=_regressions(old[key], new[key], thresholds))
+            for key in sorted(old.keys() & new.keys())]
+
+
+def _load_columns(folder: str | Path) -> tuple[RequestColumns, np.ndarray]:
+    columns = SimpleRequestAnalyzer(folder).columns()
+    templates = np.asarray([url_template(method, url) for method, url in zip(columns.method, columns.url)], dtype=object)
+    return columns, templates
+
+
+def diff_captures(
+    old_folder: str | Path,
+    new_folder: str | Path,
+    thresholds: DiffThresholds | None = None,
+) -> CaptureDiff:
+    thresholds = thresholds or DiffThresholds()
+    old_columns, old_templates = _load_columns(old_folder)
+    new_columns, new_templates = _load_columns(new_folder)
+    old_keys, new_keys = set(old_templates.tolist()), set(new_templates.tolist())
+    return CaptureDiff(
+        old_folder=str(old_folder),
+        new_folder=str(new_folder),
+        thresholds=thresholds,
+        added=sorted(new_keys - old_keys),
+        removed=sorted(old_keys - new_keys),
+        templates=_compare(group_stats(old_columns, old_templates), group_stats(new_columns, new_templates), thresholds),
+        hosts=_compare(group_stats(old_columns, old_columns.host), group_stats(new_columns, new_columns.host), thresholds),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two capture folders of DevtoolsUser.")
+    parser.add_argument("old_folder")
+    parser.add_argument("new_folder")
+    for name, field in DiffThresholds.model_fields.items():
+        option = "--" + name.replace("_", "-")
+        if field.annotation is bool:
+            parser.add_argument(option, action="store_true", dest=name)
+        else:
+            parser.add_argument(option, type=field.annotation, default=field.default, dest=name)
+    parser.add_argument("--output", help="Write the full diff (JSON) to this path.")
+    args = parser.parse_args(argv)
+
+    thresholds = DiffThresholds(**{name: getattr(args, name) for name in DiffThresholds.model_fields})
+    diff = diff_captures(args.old_folder, args.new_folder, thresholds)
+    if args.output:
+        Path(args.output).write_text(diff.model_dump_json(indent=2))
+    print(json.dumps(diff.summary(), indent=2))
+    return 1 if diff.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
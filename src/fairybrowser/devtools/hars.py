@@ -0,0 +1,337 @@
+"""HAR 1.2 export / import with bounded memory.
+
+* `HarWriter`: writes entries one by one (the collector feeds it directly).
+* `export_har`: converts a log folder of `DevtoolsUser` into one HAR file.
+* `iter_har`: yields `RawCommunicationInfo` from a HAR file without loading it fully.
+
+The original CDP `timing` is kept in the custom field `_cdpTiming`,
+so that `export -> import` is lossless for the captures of this package.
+"""
+
+import base64
+import datetime
+import json
+import re
+import time
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator
+from urllib.parse import parse_qsl, urlsplit
+
+from fairybrowser.devtools.models import RawCommunicationInfo, _utf8_decode_or_none
+
+
+HAR_VERSION = "1.2"
+
+
+def _to_har_headers(headers: dict[str, Any] | None) -> list[dict[str, str]]:
+    result = []
+    for name, value in (headers or {}).items():
+        # CDP joins the duplicated headers with "\n".
+        for elem in str(value).split("\n"):
+            result.append({"name": name, "value": elem})
+    return result
+
+
+def _from_har_headers(headers: list[dict[str, Any]] | None) -> dict[str, str]:
+    result: dict[str, str] = {}
+    for elem in headers or []:
+        name, value = elem.get("name", ""), str(elem.get("value", ""))
+        result[name] = f"{result[name]}\n{value}" if name in result else value
+    return result
+
+
+def _get_header(headers: dict[str, Any] | None, name: str) -> str | None:
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return str(value)
+    return None
+
+
+def _phase(timing: dict[str, Any], start: str, end: str) -> float:
+    try:
+        s, e = float(timing[start]), float(timing[end])
+    except (KeyError, TypeError, ValueError):
+        return -1
+    if s < 0 or e < 0:
+        return -1
+    return e - s
+
+
+def _to_har_timings(timing: dict[str, Any] | None) -> dict[str, float]:
+    """CDP `ResourceTiming` (milliseconds relative to `requestTime`) -> HAR `timings`."""
+    if not timing:
+        return {"blocked": -1, "dns": -1, "connect": -1, "ssl": -1, "send": 0, "wait": 0, "receive": 0}
+    dns = _phase(timing, "dnsStart", "dnsEnd")
+    connect = _phase(timing, "connectStart", "connectEnd")
+    ssl = _phase(timing, "sslStart", "sslEnd")
+    send = max(_phase(timing, "sendStart", "sendEnd"), 0)
+    wait = max(_phase(timing, "sendEnd", "receiveHeadersEnd"), 0)
+    starts = [float(timing[key]) for key in ("dnsStart", "connectStart", "sendStart")
+              if isinstance(timing.get(key), (int, float)) and timing[key] >= 0]
+    blocked = min(starts) if starts else -1
+    return {"blocked": blocked, "dns": dns, "connect": connect, "ssl": ssl,
+            "send": send, "wait": wait, "receive": 0}
+
+
+def _request_time(raw: RawCommunicationInfo) -> float | None:
+    """`timing["requestTime"]`: seconds on the monotonic clock of the browser."""
+    value = (raw.timing or {}).get("requestTime")
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def started_seconds(
+    raw: RawCommunicationInfo,
+    clock_offset: float | None = None,
+    default: float | None = None,
+) -> float:
+    """Wall time of the request.
+
+    Without `wall_time`, it is `requestTime + clock_offset` (the offset of another entry),
+    else `default` (e.g. the previous entry), else now.
+    """
+    if raw.wall_time is not None:
+        return raw.wall_time
+    if clock_offset is not None and (request_time := _request_time(raw)) is not None:
+        return request_time + clock_offset
+    return default if default is not None else time.time()
+
+
+def _body_to_text(body: bytes | None) -> tuple[str, str | None]:
+    if not body:
+        return "", None
+    if (text := _utf8_decode_or_none(body)) is not None:
+        return text, None
+    return base64.b64encode(body).decode("ascii"), "base64"
+
+
+def raw_to_har_entry(raw: RawCommunicationInfo, started: float | None = None) -> dict[str, Any]:
+    """`RawCommunicationInfo` -> HAR `entry`. started: wall time (default: `started_seconds(raw)`)."""
+    if started is None:
+        started = started_seconds(raw)
+    timings = _to_har_timings(raw.timing)
+    request_mime = _get_header(raw.request_headers, "content-type") or ""
+    response_mime = _get_header(raw.response_headers, "content-type") or ""
+
+    request: dict[str, Any] = {
+        "method": raw.method,
+        "url": raw.url,
+        "httpVersion": "",
+        "cookies": [],
+        "headers": _to_har_headers(raw.request_headers),
+        "queryString": [{"name": k, "value": v} for k, v in parse_qsl(urlsplit(raw.url).query, keep_blank_values=True)],
+        "headersSize": -1,
+        "bodySize": len(raw.request_body) if raw.request_body is not None else 0,
+    }
+    if raw.request_body is not None:
+        text, encoding = _body_to_text(raw.request_body)
+        request["postData"] = {"mimeType": request_mime, "text": text}
+        if encoding:
+            request["postData"]["_encoding"] = encoding
+
+    text, encoding = _body_to_text(raw.response_body)
+    content: dict[str, Any] = {
+        "size": len(raw.response_body) if raw.response_body is not None else 0,
+        "mimeType": response_mime,
+    }
+    if raw.response_body is not None:
+        content["text"] = text
+        if encoding:
+            content["encoding"] = encoding
+
+    response = {
+        "status": raw.status if raw.status is not None else 0,
+        "statusText": "",
+        "httpVersion": "",
+        "cookies": [],
+        "headers": _to_har_headers(raw.response_headers),
+        "content": content,
+        "redirectURL": _get_header(raw.response_headers, "location") or "",
+        "headersSize": -1,
+        "bodySize": -1,
+    }
+    entry = {
+        "startedDateTime": datetime.datetime.fromtimestamp(started, datetime.timezone.utc).isoformat(),
+        "time": sum(value for value in timings.values() if value > 0),
+        "request": request,
+        "response": response,
+        "cache": {},
+        "timings": timings,
+        "_cdpTiming": raw.timing,
+    }
+    if raw.connection_id is not None:
+        entry["connection"] = str(raw.connection_id)
+    if raw.resource_type is not None:
+        entry["_resourceType"] = raw.resource_type
+    return entry
+
+
+def har_entry_to_raw(entry: dict[str, Any]) -> RawCommunicationInfo:
+    """HAR `entry` -> `RawCommunicationInfo`."""
+    request = entry.get("request", {})
+    response = entry.get("response", {})
+
+    request_body = None
+    if (post_data := request.get("postData")) is not None:
+        text = post_data.get("text", "")
+        if post_data.get("_encoding") == "base64":
+            request_body = base64.b64decode(text)
+        else:
+            request_body = text.encode("utf-8")
+
+    response_body = None
+    content = response.get("content", {})
+    if "text" in content:
+        if content.get("encoding") == "base64":
+            response_body = base64.b64decode(content["text"])
+        else:
+            response_body = content["text"].encode("utf-8")
+
+    wall_time = None
+    if started := entry.get("startedDateTime"):
+        try:
+            wall_time = datetime.datetime.fromisoformat(started.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+
+    connection = entry.get("connection")
+    status = response.get("status")
+    return RawCommunicationInfo(
+        status=status if status else None,
+        url=request.get("url", ""),
+        method=request.get("method", ""),
+        timing=entry.get("_cdpTiming"),
+        wall_time=wall_time,
+        resource_type=entry.get("_resourceType"),
+        connection_id=int(connection) if connection and connection.isdigit() else None,
+        request_headers=_from_har_headers(request.get("headers")),
+        response_headers=_from_har_headers(response.get("headers")),
+        request_body=request_body,
+        response_body=response_body,
+    )
+
+
+class HarWriter:
+    """Write a HAR file incrementally. Only the current entry is kept in memory."""
+
+    def __init__(self, path: str | Path, creator: str = "fairybrowser", version: str = "0.1.0"):
+        self.path = Path(path)
+        self.creator = creator
+        self.version = version
+        self.count = 0
+        self._fp: IO[str] | None = None
+        self._clock_offset: float | None = None  # wall time - `requestTime`, from the first entry with both.
+        self._last_started: float | None = None
+
+    def open(self) -> "HarWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = self.path.open("w", encoding="utf-8")
+        header = {"version": HAR_VERSION, "creator": {"name": self.creator, "version": self.version}, "pages": []}
+        # Leave the log object open so that entries can be appended.
+        self._fp.write('{"log": ' + json.dumps(header, ensure_ascii=False)[:-1] + ', "entries": [\n')
+        return self
+
+    def write(self, raw: RawCommunicationInfo) -> None:
+        if self._clock_offset is None and raw.wall_time is not None and (request_time := _request_time(raw)) is not None:
+            self._clock_offset = raw.wall_time - request_time
+        self._last_started = started_seconds(raw, self._clock_offset, self._last_started)
+        self.write_entry(raw_to_har_entry(raw, self._last_started))
+
+    def write_entry(self, entry: dict[str, Any]) -> None:
+        if self._fp is None:
+            self.open()
+        assert self._fp is not None
+        if self.count:
+            self._fp.write(",\n")
+        self._fp.write(json.dumps(entry, ensure_ascii=False))
+        self.count += 1
+
+    def close(self) -> None:
+        if self._fp is None:
+            return
+        self._fp.write("\n]}}\n")
+        self._fp.close()
+        self._fp = None
+
+    def __enter__(self) -> "HarWriter":
+        return self.open()
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def export_har(log_folder: str | Path, output_path: str | Path) -> int:
+    """Convert the log folder of `DevtoolsUser` into HAR. Return the number of entries."""
+    from fairybrowser.devtools.analyzers import SimpleRequestAnalyzer
+
+    return write_har(SimpleRequestAnalyzer(log_folder).iter_raw_infos(), output_path)
+
+
+_ENTRIES_PATTERN = re.compile(r'"entries"\s*:\s*\[')
+
+
+def iter_json_array_items(fp: IO[str], pattern: re.Pattern, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the items of the JSON array which starts at `pattern`, one by one.
+
+    `pattern` is searched textually, so it must not appear before the array in any string.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def _read(size: int = chunk_size) -> bool:
+        nonlocal buffer, eof
+        if eof:
+            return False
+        chunk = fp.read(size)
+        if not chunk:
+            eof = True
+            return False
+        buffer += chunk
+        return True
+
+    while not (match := pattern.search(buffer)):
+        # Keep the tail in case the key straddles two chunks.
+        buffer = buffer[-64:]
+        if not _read():
+            return
+    pos = match.end()
+
+    while True:
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) or not _read():
+                break
+        if pos >= len(buffer):
+            raise ValueError("Unexpected end of the array.")
+        if buffer[pos] == "]":
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                # Grow geometrically, so that a huge entry is not re-parsed too often.
+                if not _read(max(chunk_size, len(buffer) - pos)):
+                    raise
+        yield item
+        buffer, pos = buffer[end:], 0
+
+
+def iter_har_entries(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield the HAR entries of `path` one by one."""
+    with Path(path).open(encoding="utf-8") as fp:
+        yield from iter_json_array_items(fp, _ENTRIES_PATTERN)
+
+
+def iter_har(path: str | Path) -> Iterator[RawCommunicationInfo]:
+    """Yield `RawCommunicationInfo` of the HAR file `path`."""
+    for entry in iter_har_entries(path):
+        yield har_entry_to_raw(entry)
+
+
+def write_har(raws: Iterable[RawCommunicationInfo], output_path: str | Path) -> int:
+    with HarWriter(output_path) as writer:
+        for raw in raws:
+            writer.write(raw)
+        return writer.count
@@ -0,0 +1,378 @@
+"""Persistent SQLite index over a log folder of `DevtoolsUser`.
+
+The index lives beside the folder (`<folder>.index.sqlite`) and
+`refresh` ingests only the new / changed files, so repeated analysis of
+a large capture does not re-read all the JSON files.
+
+```python
+index = RequestIndex("./debug")
+index.refresh()
+rows = index.query(method="POST", host="api.example.com", status_range=(200, 299))
+```
+"""
+
+import json
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel
+
+from fairybrowser.devtools.models import (
+    RawCommunicationInfo,
+    SimpleRequest,
+    JsonValue,
+    timing_to_time,
+    _decode_body_from_json,
+)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    host TEXT NOT NULL,
+    url_path TEXT NOT NULL,
+    status INTEGER,
+    time REAL NOT NULL,
+    content_type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS requests_file ON requests(file);
+CREATE INDEX IF NOT EXISTS requests_method ON requests(method);
+CREATE INDEX IF NOT EXISTS requests_host ON requests(host);
+CREATE INDEX IF NOT EXISTS requests_url_path ON requests(url_path);
+CREATE INDEX IF NOT EXISTS requests_status ON requests(status);
+CREATE INDEX IF NOT EXISTS requests_time ON requests(time);
+CREATE INDEX IF NOT EXISTS requests_content_type ON requests(content_type);
+CREATE TABLE IF NOT EXISTS body_terms (
+    term TEXT NOT NULL,
+    request_id INTEGER NOT NULL,
+    part TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS body_terms_term ON body_terms(term);
+CREATE INDEX IF NOT EXISTS body_terms_request_id ON body_terms(request_id);
+CREATE TABLE IF NOT EXISTS json_fields (
+    path TEXT NOT NULL,
+    leaf TEXT NOT NULL,
+    value TEXT NOT NULL,
+    request_id INTEGER NOT NULL,
+    part TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS json_fields_path ON json_fields(path, value);
+CREATE INDEX IF NOT EXISTS json_fields_leaf ON json_fields(leaf, value);
+CREATE INDEX IF NOT EXISTS json_fields_request_id ON json_fields(request_id);
+"""
+
+# Increment when the ingested contents change; older indexes are rebuilt.
+_SCHEMA_VERSION = 2
+
+_TERM_PATTERN = re.compile(r"\w+")
+_MAX_TERM_LENGTH = 64
+_MAX_BODY_BYTES = 4 * 1024 * 1024
+_MAX_FIELDS = 10_000
+_LOADED_FILES = 4  # Parsed files kept by `load` while it walks the rows.
+_BINARY_TYPES = ("image/", "font/", "audio/", "video/", "application/octet-stream", "application/pdf")
+
+# Larger than any character in the stored strings, used for prefix range queries.
+_MAX_CHAR = "\U0010ffff"
+
+
+def _content_type(headers: dict[str, Any] | None) -> str:
+    for key, value in (headers or {}).items():
+        if key.lower() == "content-type":
+            return str(value).split(";")[0].strip().lower()
+    return ""
+
+
+def tokenize(text: str) -> set[str]:
+    return {elem for elem in _TERM_PATTERN.findall(text.lower()) if len(elem) <= _MAX_TERM_LENGTH}
+
+
+def to_json_value(value: JsonValue) -> str:
+    """Canonical text of a scalar for `json_fields.value`."""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def flatten_json(data: Any, prefix: str = "") -> Iterable[tuple[str, str, str]]:
+    """Yield (path, leaf key, canonical value) of the scalars. List indices are written as `[]`.
+
+    e.g. `{"items": [{"id": 1}]}` -> ("items[].id", "id", "1")
+    """
+    stack: list[tuple[str, str, Any]] = [(prefix, "", data)]
+    while stack:
+        path, leaf, value = stack.pop()
+        if isinstance(value, dict):
+            for key, elem in value.items():
+                stack.append((f"{path}.{key}" if path else str(key), str(key), elem))
+        elif isinstance(value, list):
+            for elem in value:
+                stack.append((f"{path}[]", leaf, elem))
+        else:
+            yield path, leaf, to_json_value(value)
+
+
+class IndexedRequest(BaseModel, frozen=True):
+    id: int
+    file: str  # Relative to the log folder.
+    position: int  # Index in the JSON list of `file`.
+    method: str
+    url: str
+    host: str
+    url_path: str
+    status: int | None
+    time: float
+    content_type: str
+
+
+MISSING: Any = object()  # `find` without the value.
+
+
+class RequestIndex:
+    def __init__(self, log_folder: str | Path, db_path: str | Path | None = None):
+        self.log_folder = Path(log_folder)
+        assert self.log_folder.exists()
+        if db_path is None:
+            db_path = self.log_folder.parent / f"{self.log_folder.name}.index.sqlite"
+        self.db_path = Path(db_path)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.executescript(_SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            self._conn.execute("DELETE FROM files")  # Re-ingest everything.
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _paths(self) -> Iterable[Path]:
+        from fairybrowser.devtools.analyzers import SimpleRequestAnalyzer
+
+        return SimpleRequestAnalyzer(self.log_folder)._paths_iterable
+
+    def refresh(self) -> int:
+        """Ingest the new / changed files and forget the removed ones. Return the number of ingested files.
+
+        A file that is not valid JSON (e.g. still being written) keeps its previous rows and is retried
+        at the next refresh.
+        """
+        known = {path: (mtime, size) for path, mtime, size in self._conn.execute("SELECT path, mtime_ns, size FROM files")}
+        seen = set()
+        n_ingested = 0
+        with self._conn:
+            for path in self._paths():
+                rel = path.relative_to(self.log_folder).as_posix()
+                seen.add(rel)
+                stat = path.stat()
+                if known.get(rel) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                try:
+                    records = json.loads(path.read_bytes())
+                except (ValueError, OSError):
+                    continue  # Partially written: not recorded in `files`, so it is retried.
+                self._forget(rel)
+                self._ingest(rel, path, records)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (rel, stat.st_mtime_ns, stat.st_size)
+                )
+                n_ingested += 1
+            for rel in set(known) - seen:
+                self._forget(rel)
+                self._conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+        return n_ingested
+
+    def _forget(self, rel: str) -> None:
+        for table in ("body_terms", "json_fields"):
+            self._conn.execute(f"DELETE FROM {table} WHERE request_id IN (SELECT id FROM requests WHERE file = ?)", (rel,))
+        self._conn.execute("DELETE FROM requests WHERE file = ?", (rel,))
+
+    def _ingest(self, rel: str, path: Path, records: list[dict[str, Any]]) -> list[int]:
+        """Insert the rows of one file. Return their ids."""
+        ids = []
+        for position, elem in enumerate(records):
+            url = elem.get("url", "")
+            parts = urlsplit(url)
+            cursor = self._conn.execute(
+                "INSERT INTO requests (file, position, method, url, host, url_path, status, time, content_type)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    rel,
+                    position,
+                    str(elem.get("method", "")).upper(),
+                    url,
+                    (parts.hostname or "").lower(),
+                    parts.path or "/",
+                    elem.get("status"),
+                    timing_to_time(elem.get("timing")),
+                    _content_type(elem.get("response_headers")),
+                ),
+            )
+            ids.append(cursor.lastrowid)
+            for part in ("request", "response"):
+                headers = elem.get(f"{part}_headers")
+                self._ingest_body(cursor.lastrowid, part, elem.get(f"{part}_body"), headers, path.parent)
+        return ids
+
+    def _ingest_body(self, request_id: int, part: str, value: Any, headers: dict | None, base_folder: Path) -> None:
+        """Add the terms and the JSON fields of one body."""
+        if not value:
+            return
+        content_type = _content_type(headers)
+        if content_type.startswith(_BINARY_TYPES):
+            return
+        if isinstance(value, dict) and value.get("type") == "bytes":
+            return  # Not UTF-8.
+        if isinstance(value, dict) and value.get("size", 0) > _MAX_BODY_BYTES:
+            return
+        try:
+            text = (_decode_body_from_json(value, base_folder) or b"").decode("utf-8")
+        except (ValueError, OSError, UnicodeDecodeError):
+            return
+        if len(text) > _MAX_BODY_BYTES:
+            return
+
+        self._conn.executemany(
+            "INSERT INTO body_terms (term, request_id, part) VALUES (?, ?, ?)",
+            ((term, request_id, part) for term in tokenize(text)),
+        )
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        fields = set()
+        for field in flatten_json(data):
+            fields.add(field)
+            if len(fields) >= _MAX_FIELDS:
+                break
+        self._conn.executemany(
+            "INSERT INTO json_fields (path, leaf, value, request_id, part) VALUES (?, ?, ?, ?, ?)",
+            ((path, leaf, value, request_id, part) for path, leaf, value in fields),
+        )
+
+    def query(
+        self,
+        method: str | None = None,
+        host: str | None = None,
+        path_prefix: str | None = None,
+        status_range: tuple[int, int] | None = None,
+        time_window: tuple[float, float] | None = None,
+        content_type: str | None = None,
+        limit: int | None = None,
+    ) -> list[IndexedRequest]:
+        """Search the indexed requests. All the conditions are combined with AND.
+
+        status_range, time_window: inclusive ranges.
+        content_type: exact mime type, or its prefix if it ends with "/" (e.g. "image/").
+        """
+        clauses, params = self._to_clauses(method, host, path_prefix, status_range, time_window, content_type)
+        sql = "SELECT id, file, position, method, url, host, url_path, status, time, content_type FROM requests"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY time, id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        fields = list(IndexedRequest.model_fields)
+        return [IndexedRequest(**dict(zip(fields, row))) for row in self._conn.execute(sql, params)]
+
+    def _select_by_ids(self, sql: str, params: list[Any]) -> list[IndexedRequest]:
+        columns = "id, file, position, method, url, host, url_path, status, time, content_type"
+        fields = list(IndexedRequest.model_fields)
+        rows = self._conn.execute(f"SELECT {columns} FROM requests WHERE id IN ({sql}) ORDER BY time, id", params)
+        return [IndexedRequest(**dict(zip(fields, row))) for row in rows]
+
+    def search(self, text: str, part: str | None = None) -> list[IndexedRequest]:
+        """Requests whose body contains all the words of `text`.
+
+        part: "request" / "response" to restrict the bodies.
+        """
+        terms = sorted(tokenize(text))
+        if not terms:
+            return []
+        condition = " AND part = ?" if part else ""
+        sql = " INTERSECT ".join(f"SELECT request_id FROM body_terms WHERE term = ?{condition}" for _ in terms)
+        params: list[Any] = []
+        for term in terms:
+            params += [term, part] if part else [term]
+        return self._select_by_ids(sql, params)
+
+    def find(self, path: str | None = None, value: Any = MISSING, /, _part: str | None = None,
+             **fields: JsonValue) -> list[IndexedRequest]:
+        """Requests whose JSON body has the given field values.
+
+        `find("data.items[].id", 42)` matches the full path (list indices are `[]`),
+        and `find(id=42)` matches the key at any depth. All the conditions are combined with AND.
+        _part: "request" / "response" to restrict the bodies (underscored, so that `part=` is a JSON key).
+        """
+        part = _part
+        condition = " AND part = ?" if part else ""
+        queries: list[str] = []
+        params: list[Any] = []
+        if path is not None:
+            if value is MISSING:
+                raise ValueError(f"Specify the value of {path!r} (`None` for JSON null).")
+            queries.append(f"SELECT request_id FROM json_fields WHERE path = ? AND value = ?{condition}")
+            params += [path, to_json_value(value)] + ([part] if part else [])
+        for key, elem in fields.items():
+            queries.append(f"SELECT request_id FROM json_fields WHERE leaf = ? AND value = ?{condition}")
+            params += [key, to_json_value(elem)] + ([part] if part else [])
+        if not queries:
+            raise ValueError("Specify `path` and `value`, or the fields as the keyword arguments.")
+        return self._select_by_ids(" INTERSECT ".join(queries), params)
+
+    def _to_clauses(self, method, host, path_prefix, status_range, time_window, content_type) -> tuple[list[str], list[Any]]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if method:
+            clauses.append("method = ?")
+            params.append(method.upper())
+        if host:
+            clauses.append("host = ?")
+            params.append(host.lower())
+        if path_prefix:
+            clauses.append("url_path >= ? AND url_path < ?")
+            params += [path_prefix, path_prefix + _MAX_CHAR]
+        if status_range:
+            clauses.append("status BETWEEN ? AND ?")
+            params += list(status_range)
+        if time_window:
+            clauses.append("time BETWEEN ? AND ?")
+            params += list(time_window)
+        if content_type:
+            content_type = content_type.lower()
+            if content_type.endswith("/"):
+                clauses.append("content_type >= ? AND content_type < ?")
+                params += [content_type, content_type + _MAX_CHAR]
+            else:
+                clauses.append("content_type = ?")
+                params.append(content_type)
+        return clauses, params
+
+    def _iter_loaded(self, rows: Iterable[IndexedRequest]):
+        # Only the last few files are kept, not every file of the result set.
+        cache: dict[str, list] = {}
+        for row in rows:
+            if row.file in cache:
+                cache[row.file] = cache.pop(row.file)  # Most recently used last.
+            else:
+                if len(cache) >= _LOADED_FILES:
+                    del cache[next(iter(cache))]
+                cache[row.file] = json.loads((self.log_folder / row.file).read_text())
+            yield self.log_folder / row.file, row, cache[row.file][row.position]
+
+    def load(self, rows: Iterable[IndexedRequest]) -> list[RawCommunicationInfo]:
+        """Read the records of `rows`. The last few files stay parsed, not the whole result set."""
+        return [RawCommunicationInfo.model_validate(record, context={"base_folder": path.parent})
+                for path, _, record in self._iter_loaded(rows)]
+
+    def load_simple_requests(self, rows: Iterable[IndexedRequest]) -> list[SimpleRequest]:
+        """Same as `load`, but the bodies are read only when accessed."""
+        return [SimpleRequest.from_record(record, path, row.position) for path, row, record in self._iter_loaded(rows)]
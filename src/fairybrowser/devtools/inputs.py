@@ -0,0 +1,133 @@
+"""Replay the mouse scripts into pages via CDP `Input.dispatchMouseEvent`.
+
+No OS cursor and no foreground window are involved, so the same script can
+run in many pages and instances at once, also without a display.
+
+```python
+player = MousePlayer("./script.json")
+# The pages of one instance, on the same deadlines.
+replay_on_pages(player.events, [page1, page2], mapping=ViewportMapping(offset_x=8, offset_y=130))
+# One thread per instance (`sync_page`).
+stats = replay_in_instances(player.events, ["worker-1", "worker-2", "worker-3"], prepare=lambda page: page.goto(url))
+```
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Sequence
+
+from playwright.sync_api import Page
+from pydantic import BaseModel
+
+from fairybrowser.models import BrowserInfo
+from fairybrowser.runners import sync_page
+from fairybrowser.windows.models import MousePlayEvent
+from fairybrowser.windows.players import PlaybackStats, play_actions, play_actions_concurrently, to_actions
+
+
+# CDP `Input.MouseButton` and the bits of `buttons`.
+_CDP_BUTTONS = {"left": ("left", 1), "right": ("right", 2), "middle": ("middle", 4),
+                "x1": ("back", 8), "x2": ("forward", 16)}
+
+
+class ViewportMapping(BaseModel, frozen=True):
+    """Recorded (screen) coordinates -> viewport (CSS pixel) coordinates."""
+
+    offset_x: float = 0.0  # Screen position of the top-left of the viewport.
+    offset_y: float = 0.0
+    scale: float = 1.0  # Screen pixels per CSS pixel (`devicePixelRatio`).
+
+    def to_viewport(self, x: float, y: float) -> tuple[float, float]:
+        return (x - self.offset_x) / self.scale, (y - self.offset_y) / self.scale
+
+    @classmethod
+    def from_page(cls, page: Page) -> "ViewportMapping":
+        """Estimate from the window of `page`, assuming the script was recorded on the same window.
+
+        The borders are estimated from `outerWidth - innerWidth`, so the result is approximate.
+        """
+        info = page.evaluate(
+            "() => ({x: window.screenX, y: window.screenY, ow: window.outerWidth, oh: window.outerHeight,"
+            " iw: window.innerWidth, ih: window.innerHeight, dpr: window.devicePixelRatio})"
+        )
+        border = max(info["ow"] - info["iw"], 0) / 2
+        top = max(info["oh"] - info["ih"] - border, 0)
+        scale = info["dpr"] or 1.0
+        return cls(offset_x=(info["x"] + border) * scale, offset_y=(info["y"] + top) * scale, scale=scale)
+
+
+class CdpInputBackend:
+    """`OutputBackend` which dispatches the mouse events to `page`."""
+
+    def __init__(self, page: Page, mapping: ViewportMapping | None = None, client: Any = None):
+        self.client = client if client is not None else page.context.new_cdp_session(page)
+        self.mapping = mapping or ViewportMapping()
+        self._buttons = 0  # Bits of the pressed buttons.
+
+    def _dispatch(self, type: str, x: float, y: float, button: str = "none", clicks: int = 0) -> None:
+        vx, vy = self.mapping.to_viewport(x, y)
+        self.client.send("Input.dispatchMouseEvent", {
+            "type": type, "x": vx, "y": vy, "button": button, "buttons": self._buttons, "clickCount": clicks,
+        })
+
+    def move(self, x: float, y: float) -> None:
+        self._dispatch("mouseMoved", x, y)
+
+    def down(self, x: float, y: float, button: str, clicks: int = 1) -> None:
+        name, bit = _CDP_BUTTONS.get(button, ("left", 1))
+        self._buttons |= bit
+        self._dispatch("mousePressed", x, y, name, clicks)
+
+    def up(self, x: float, y: float, button: str, clicks: int = 1) -> None:
+        name, bit = _CDP_BUTTONS.get(button, ("left", 1))
+        self._buttons &= ~bit
+        self._dispatch("mouseReleased", x, y, name, clicks)
+
+
+def replay_on_pages(
+    events: Sequence[MousePlayEvent],
+    pages: Sequence[Page],
+    speed: float = 1.0,
+    mapping: ViewportMapping | None = None,
+    spin: float = 0.002,
+) -> list[PlaybackStats]:
+    """Replay `events` into all `pages` (of one Playwright instance) from this thread."""
+    backends = [CdpInputBackend(page, mapping) for page in pages]
+    return play_actions_concurrently(to_actions(list(events), speed), backends, spin=spin)
+
+
+def replay_in_instances(
+    events: Sequence[MousePlayEvent],
+    targets: Sequence[BrowserInfo | str | None],
+    speed: float = 1.0,
+    mapping: ViewportMapping | Callable[[Page], ViewportMapping] | None = None,
+    prepare: Callable[[Page], None] | None = None,
+    spin: float = 0.002,
+    timeout: float | None = None,
+) -> list[PlaybackStats]:
+    """Replay `events` in the instances of `targets` concurrently, one thread (and `sync_page`) per instance.
+
+    Playwright objects are bound to their thread, hence every thread opens its own `sync_page`.
+    prepare: called with the page before the replay (e.g. navigation). All the replays start together after it.
+    mapping: a mapping, or a function to compute it from the page (e.g. `ViewportMapping.from_page`).
+    """
+    actions = to_actions(list(events), speed)
+    barrier = threading.Barrier(len(targets))
+
+    def _replay(target) -> PlaybackStats:
+        try:
+            with sync_page(target) as page:
+                if prepare is not None:
+                    prepare(page)
+                page_mapping = mapping(page) if callable(mapping) else mapping
+                backend = CdpInputBackend(page, page_mapping)
+                barrier.wait(timeout)
+                return play_actions(actions, backend, spin=spin, start=time.monotonic())
+        except BaseException:
+            barrier.abort()  # Do not leave the other threads waiting.
+            raise
+
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        futures = [executor.submit(_replay, target) for target in targets]
+        return [future.result() for future in futures]
@@ -0,0 +1,178 @@
+"""One `Fetch.requestPaused` dispatcher per CDP session.
+
+Only one set of `Fetch.enable` patterns is effective per session,
+so the features based on the `Fetch` domain (replay, cache, blocking, ...)
+are implemented as `FetchHandler` and chained in one `FetchInterceptor`.
+The first handler which returns True takes the paused request;
+if nobody takes it, the request continues untouched.
+
+`FetchInterceptor.attach` keeps one interceptor per page, so that the
+features attached to the same page share one session (and one pause per request).
+"""
+
+import base64
+import logging
+import threading
+import weakref
+from typing import Any, Iterable
+
+from playwright.sync_api import Page, BrowserContext, Frame, CDPSession
+
+
+class FetchHandler:
+    """Base class of the handlers. Override `on_request` and / or `on_response`."""
+
+    request_stage: bool = True
+    response_stage: bool = False
+
+    def on_request(self, params: dict[str, Any], interceptor: "FetchInterceptor") -> bool:
+        return False
+
+    def on_response(self, params: dict[str, Any], interceptor: "FetchInterceptor") -> bool:
+        return False
+
+
+def to_header_entries(headers: dict[str, Any] | None, drop: Iterable[str] = ()) -> list[dict[str, str]]:
+    """`{"name": "value"}` -> `[{"name": ..., "value": ...}]` for `Fetch`."""
+    dropped = {elem.lower() for elem in drop}
+    result = []
+    for name, value in (headers or {}).items():
+        if name.lower() in dropped:
+            continue
+        for elem in str(value).split("\n"):
+            result.append({"name": name, "value": elem})
+    return result
+
+
+def from_header_entries(entries: list[dict[str, str]] | None) -> dict[str, str]:
+    result: dict[str, str] = {}
+    for elem in entries or []:
+        name, value = elem["name"], elem["value"]
+        result[name] = f"{result[name]}\n{value}" if name in result else value
+    return result
+
+
+def request_body_of(params: dict[str, Any]) -> bytes | None:
+    """Body of the paused request, in bytes."""
+    request = params.get("request", {})
+    if (post_data := request.get("postData")) is not None:
+        return post_data.encode("utf-8")
+    entries = request.get("postDataEntries")
+    if entries:
+        return b"".join(base64.b64decode(elem.get("bytes", "")) for elem in entries)
+    return None
+
+
+def is_response_stage(params: dict[str, Any]) -> bool:
+    return "responseStatusCode" in params or "responseErrorReason" in params
+
+
+_registry: "weakref.WeakKeyDictionary[Page, FetchInterceptor]" = weakref.WeakKeyDictionary()
+_registry_lock = threading.Lock()
+
+
+class FetchInterceptor:
+    def __init__(self, client: CDPSession, handlers: Iterable[FetchHandler] = ()):
+        self.client = client
+        self.handlers: list[FetchHandler] = list(handlers)
+        self.started = False
+        self._listening = False
+
+    @classmethod
+    def attach(cls, page: Page | Frame, handlers: Iterable[FetchHandler] = ()) -> "FetchInterceptor":
+        """Add `handlers` to the interceptor of `page`, created (with its CDP session) on the first call."""
+        if isinstance(page, Frame):
+            page = page.page
+        with _registry_lock:
+            interceptor = _registry.get(page)
+            if interceptor is None:
+                context: BrowserContext = page.context
+                interceptor = cls(context.new_cdp_session(page))
+                _registry[page] = interceptor
+            interceptor.handlers.extend(handlers)
+            interceptor.start()
+        return interceptor
+
+    def add(self, handler: FetchHandler) -> FetchHandler:
+        self.handlers.append(handler)
+        if self.started:
+            self._enable()
+        return handler
+
+    def remove(self, handler: FetchHandler) -> None:
+        """Remove `handler`. The interception stops with the last handler."""
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+        if not self.handlers:
+            self.stop()
+        elif self.started:
+            self._enable()
+
+    def start(self) -> None:
+        self._enable()
+        if not self._listening:
+            self.client.on("Fetch.requestPaused", self._on_paused)
+            self._listening = True
+        self.started = True
+
+    def stop(self) -> None:
+        if self.started:
+            self.client.send("Fetch.disable")
+            self.started = False
+
+    def _enable(self) -> None:
+        patterns = []
+        if any(handler.request_stage for handler in self.handlers):
+            patterns.append({"urlPattern": "*", "requestStage": "Request"})
+        if any(handler.response_stage for handler in self.handlers):
+            patterns.append({"urlPattern": "*", "requestStage": "Response"})
+        self.client.send("Fetch.enable", {"patterns": patterns})
+
+    # ----------------------
+    # Actions
+    # ----------------------
+    def fulfill(self, request_id: str, status: int, headers: dict[str, Any] | None = None, body: bytes | None = None) -> None:
+        params: dict[str, Any] = {
+            "requestId": request_id,
+            "responseCode": status,
+            "responseHeaders": to_header_entries(headers, drop=("content-length", "content-encoding", "transfer-encoding")),
+        }
+        if body is not None:
+            params["body"] = base64.b64encode(body).decode("ascii")
+        self.client.send("Fetch.fulfillRequest", params)
+
+    def continue_request(self, request_id: str, **kwargs) -> None:
+        self.client.send("Fetch.continueRequest", {"requestId": request_id, **kwargs})
+
+    def fail(self, request_id: str, reason: str = "Failed") -> None:
+        self.client.send("Fetch.failRequest", {"requestId": request_id, "errorReason": reason})
+
+    def get_response_body(self, request_id: str) -> bytes:
+        """Available only at the response stage."""
+        resp = self.client.send("Fetch.getResponseBody", {"requestId": request_id})
+        body = resp.get("body", "")
+        if resp.get("base64Encoded", False):
+            return base64.b64decode(body)
+        return body.encode("utf-8")
+
+    # ----------------------
+    # Dispatch
+    # ----------------------
+    def _on_paused(self, params: dict[str, Any]) -> None:
+        response_stage = is_response_stage(params)
+        for handler in self.handlers:
+            try:
+                if response_stage:
+                    handled = handler.response_stage and handler.on_response(params, self)
+                else:
+                    handled = handler.request_stage and handler.on_request(params, self)
+            except Exception:
+                logging.exception(f"Fetch handler {handler!r} failed.")
+                handled = False
+            if handled:
+                return
+        try:
+            self.continue_request(params["requestId"])
+        except Exception:
+            # The target may be already gone.
+            logging.debug("Failed to continue the paused request.", exc_info=True)
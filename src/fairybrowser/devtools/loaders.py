@@ -0,0 +1,73 @@
+"""Parallel loading of large log folders.
+
+The paths are split into shards, and JSON decoding, base64 decoding and
+validation run in the worker processes. The order of the result is the same
+as the order of the given paths.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from pydantic import BaseModel
+
+from fairybrowser.devtools.models import RawCommunicationInfo
+
+
+class LoadReport(BaseModel, frozen=True):
+    files: int
+    records: int
+    seconds: float
+    workers: int
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds > 0 else float("inf")
+
+
+def _load_shard(paths: list[str]) -> list[RawCommunicationInfo]:
+    result = []
+    for path in paths:
+        context = {"base_folder": Path(path).parent}
+        with open(path) as fp:
+            result += [RawCommunicationInfo.model_validate(elem, context=context) for elem in json.load(fp)]
+    return result
+
+
+def _to_shards(paths: list[str], workers: int, shard_size: int | None) -> list[list[str]]:
+    if shard_size is None:
+        # A few shards per worker, so that slow shards are balanced.
+        shard_size = max(1, min(256, len(paths) // (workers * 4) or 1))
+    return [paths[i:i + shard_size] for i in range(0, len(paths), shard_size)]
+
+
+def load_parallel(
+    paths: Iterable[Path | str],
+    workers: int | None = None,
+    shard_size: int | None = None,
+) -> tuple[list[RawCommunicationInfo], LoadReport]:
+    """Load the log files with a process pool.
+
+    workers: the number of processes (default: `os.cpu_count()`). 1 loads in this process.
+    """
+    paths = [str(path) for path in paths]
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers <= 1 or len(paths) <= 1:
+        workers = 1
+        result = _load_shard(paths)
+    else:
+        shards = _to_shards(paths, workers, shard_size)
+        result = []
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+            for records in executor.map(_load_shard, shards):
+                result += records
+    report = LoadReport(files=len(paths), records=len(result), seconds=time.perf_counter() - start, workers=workers)
+    return result, report
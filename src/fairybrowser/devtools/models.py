@@ -1,5 +1,7 @@
 import base64
 import json
+import re
+from pathlib import Path
 from typing import Any
 from typing import Annotated
 from pydantic import (
@@ -7,8 +9,11 @@ from pydantic import (
     Field,
     field_serializer,
     field_validator,
+    model_serializer,
+    model_validator,
     JsonValue,
     PrivateAttr,
+    ValidationInfo,
 )
 
 
@@ -30,7 +35,11 @@ def _encode_body_for_json(body: bytes | None) -> str | dict[str, str] | None:
     }
 
 
-def _decode_body_from_json(value: Any) -> bytes | None:
+def _decode_body_from_json(value: Any, base_folder: Path | None = None) -> bytes | None:
+    """
+    base_folder: the folder of the JSON file, for the bodies stored in the separate files
+    (`{"type": "file", "path": ..., "abs_path": ..., "size": ...}`). Without it, `abs_path` is used.
+    """
     if value is None:
         return None
     if isinstance(value, bytes):
@@ -39,14 +48,150 @@ def _decode_body_from_json(value: Any) -> bytes | None:
         return value.encode("utf-8")
     if isinstance(value, dict) and value.get("type") == "bytes" and "data" in value:
         return base64.b64decode(value["data"])
+    if isinstance(value, dict) and value.get("type") == "file" and "path" in value:
+        return _file_body_of(value, base_folder).load()
     raise ValueError(f"Invalid body format: {value!r}")
 
 
+def _file_body_of(value: dict[str, Any], base_folder: Path | None) -> "FileBody":
+    """`base_folder / path` (the capture may have been moved), else `abs_path`."""
+    if base_folder is not None:
+        path = Path(base_folder) / value["path"]
+    elif value.get("abs_path"):
+        path = Path(value["abs_path"])
+    else:
+        raise ValueError(f"The folder of the body file {value['path']!r} is unknown; "
+                         "pass `context={'base_folder': ...}` to the validation.")
+    return FileBody(path, value.get("size"))
+
+
+# ---- Lazy bodies ----
+
+
+class BodyHandle:
+    """Bytes which are loaded on access."""
+
+    def load(self) -> bytes:
+        raise NotImplementedError
+
+    @property
+    def size(self) -> int | None:
+        """Known without loading, if not None."""
+        return None
+
+
+class InlineBody(BodyHandle):
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def load(self) -> bytes:
+        return self.data
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def __eq__(self, other):
+        return isinstance(other, BodyHandle) and self.load() == other.load()
+
+
+class FileBody(BodyHandle):
+    """Body stored in its own file. Read on the first access and kept."""
+
+    def __init__(self, path: Path, size: int | None = None):
+        self.path = Path(path)
+        self._size = size
+        self._data: bytes | None = None
+
+    def load(self) -> bytes:
+        if self._data is None:
+            self._data = self.path.read_bytes()
+            self._size = len(self._data)
+        return self._data
+
+    def release(self) -> None:
+        self._data = None
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = self.path.stat().st_size
+        return self._size
+
+    def __eq__(self, other):
+        return isinstance(other, BodyHandle) and self.load() == other.load()
+
+
+_ARRAY_START = re.compile(r"\[")
+
+
+class RecordBody(BodyHandle):
+    """Body inlined in a JSON log file. The record is re-read on the first access and kept."""
+
+    def __init__(self, path: Path, position: int, field: str):
+        self.path = Path(path)
+        self.position = position
+        self.field = field
+        self._data: bytes | None = None
+
+    def load(self) -> bytes:
+        if self._data is None:
+            from fairybrowser.devtools.hars import iter_json_array_items
+
+            with self.path.open() as fp:
+                for i, elem in enumerate(iter_json_array_items(fp, _ARRAY_START)):
+                    if i == self.position:
+                        self._data = _decode_body_from_json(elem.get(self.field), self.path.parent) or b""
+                        break
+                else:
+                    raise IndexError(f"No record {self.position} in {self.path}.")
+        return self._data
+
+    def release(self) -> None:
+        self._data = None
+
+    def __eq__(self, other):
+        return isinstance(other, BodyHandle) and self.load() == other.load()
+
+
+def to_body_handle(value: Any, path: Path | None = None, position: int = 0, field: str = "") -> BodyHandle:
+    """JSON value of a body -> `BodyHandle`, without decoding it when possible."""
+    if isinstance(value, BodyHandle):
+        return value
+    if value is None or value == "":
+        return InlineBody(b"")
+    if isinstance(value, bytes):
+        return InlineBody(value)
+    if isinstance(value, dict) and value.get("type") == "file" and path is not None:
+        return _file_body_of(value, path.parent)
+    if path is None:
+        return InlineBody(_decode_body_from_json(value) or b"")
+    return RecordBody(path, position, field)
+
+
+def timing_to_time(timing: dict[str, Any] | None) -> float:
+    """The time of the request (seconds), extracted from CDP `timing`."""
+    if timing:
+        for key in ("requestTime", "startTime", "sendStart"):
+            if key in timing:
+                try:
+                    return float(timing[key])
+                except (ValueError, TypeError):
+                    pass
+    return 0.0
+
+
 class RawCommunicationInfo(BaseModel):
     status: int | None = None
     url: str
     method: str
     timing: dict[str, JsonValue] | None = None
+    wall_time: float | None = None  # Seconds since epoch, when the request is issued.
+    end_time: float | None = None  # `Network.loadingFinished` timestamp, on the clock of `timing["requestTime"]`.
+    resource_type: str | None = None  # CDP `Network.ResourceType`, e.g. "Script".
+    initiator_url: str | None = None  # The document / script which issued the request.
+    connection_id: int | None = None
+    connection_reused: bool | None = None
     request_headers: dict[str, JsonValue] = Field(default_factory=dict)
     response_headers: dict[str, JsonValue] = Field(default_factory=dict)
     request_body: bytes | None = None
@@ -54,14 +199,21 @@ class RawCommunicationInfo(BaseModel):
 
     @field_validator("request_body", "response_body", mode="before")
     @classmethod
-    def _decode_body(cls, v: Any):
-        return _decode_body_from_json(v)
+    def _decode_body(cls, v: Any, info: ValidationInfo):
+        base_folder = (info.context or {}).get("base_folder")
+        return _decode_body_from_json(v, base_folder)
 
     @field_serializer("request_body", "response_body")
     def _encode_body(self, v: Any, _):
         return _encode_body_for_json(v)
 
 
+def _is_excluded(name: str, include: Any, exclude: Any) -> bool:
+    if include is not None and name not in include:
+        return True
+    return exclude is not None and name in exclude
+
+
 class SimpleRequest(BaseModel, frozen=True):
     """Simple HTTP Request.
     bytesベースで保存しつつ、text/jsonへの変換をプロパティで提供。
@@ -73,13 +225,59 @@ class SimpleRequest(BaseModel, frozen=True):
     time: float  # 相対秒
     request_headers: Annotated[dict[str, JsonValue], Field(default_factory=dict)]
     response_headers: Annotated[dict[str, JsonValue], Field(default_factory=dict)]
-    request_body: bytes
-    response_body: bytes
+
+    # bodyは `BodyHandle` で保持し、アクセス時に読み込む
+    _request_handle: BodyHandle = PrivateAttr(default_factory=lambda: InlineBody(b""))
+    _response_handle: BodyHandle = PrivateAttr(default_factory=lambda: InlineBody(b""))
 
     # 内部キャッシュ用
     _request_json: dict | str | None = PrivateAttr(default=None)
     _response_json: dict | str | None = PrivateAttr(default=None)
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def _split_bodies(cls, data: Any, handler):
+        """`request_body` / `response_body` (bytes or `BodyHandle`) are kept as handles."""
+        bodies = {}
+        if isinstance(data, dict):
+            data = dict(data)
+            for name in ("request_body", "response_body"):
+                bodies[name] = data.pop(name, None)
+        instance = handler(data)
+        if isinstance(data, dict):
+            instance._request_handle = to_body_handle(bodies["request_body"])
+            instance._response_handle = to_body_handle(bodies["response_body"])
+        return instance
+
+    @model_serializer(mode="wrap")
+    def _dump_bodies(self, handler, info):
+        """Emit `request_body` / `response_body` like the fields (loaded on the dump)."""
+        data = handler(self)
+        for name in ("request_body", "response_body"):
+            if _is_excluded(name, info.include, info.exclude):
+                continue
+            body = getattr(self, name)
+            data[name] = _encode_body_for_json(body) if info.mode_is_json() else body
+        return data
+
+    @property
+    def request_body(self) -> bytes:
+        return self._request_handle.load()
+
+    @property
+    def response_body(self) -> bytes:
+        return self._response_handle.load()
+
+    @property
+    def request_size(self) -> int | None:
+        """Size of the request body, if known without loading it."""
+        return self._request_handle.size
+
+    @property
+    def response_size(self) -> int | None:
+        """Size of the response body, if known without loading it."""
+        return self._response_handle.size
+
     # --- request関連 ---
     @property
     def request_bytes(self) -> bytes:
@@ -129,15 +327,7 @@ class SimpleRequest(BaseModel, frozen=True):
     def from_raw(cls, raw: "RawCommunicationInfo") -> "SimpleRequest":
         """RawCommunicationInfo → SimpleRequest に変換"""
         # --- 相対時間（秒）を取得 ---
-        time_value: float = 0.0
-        if raw.timing:
-            for key in ("requestTime", "startTime", "sendStart"):
-                if key in raw.timing:
-                    try:
-                        time_value = float(raw.timing[key])
-                        break
-                    except (ValueError, TypeError):
-                        pass
+        time_value = timing_to_time(raw.timing)
 
         request_bytes = (
             raw.request_body
@@ -160,3 +350,37 @@ class SimpleRequest(BaseModel, frozen=True):
             request_body=request_bytes,
             response_body=response_bytes,
         )
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any], path: Path, position: int) -> "SimpleRequest":
+        """JSON record at `position` of the log file `path` → SimpleRequest.
+
+        The bodies are not decoded here; they are read from `path` (or the body files) on access.
+        """
+        meta = {key: value for key, value in record.items() if key not in ("request_body", "response_body")}
+        raw = RawCommunicationInfo.model_validate(meta)
+        return cls(
+            status=raw.status,
+            url=raw.url,
+            method=raw.method,
+            time=timing_to_time(raw.timing),
+            request_headers=raw.request_headers or {},
+            response_headers=raw.response_headers or {},
+            request_body=to_body_handle(record.get("request_body"), path, position, "request_body"),
+            response_body=to_body_handle(record.get("response_body"), path, position, "response_body"),
+        )
+
+
+class ConsoleRecord(BaseModel):
+    """Structured `Runtime.consoleAPICalled` / `Runtime.exceptionThrown` event."""
+
+    kind: str = "console"  # "console" or "exception"
+    type: str  # log, warning, error, ...
+    timestamp: float  # milliseconds since epoch (CDP `Runtime.Timestamp`)
+    text: str
+    target: str | None = None
+    url: str | None = None
+    line: int | None = None
+    column: int | None = None
+    function: str | None = None
+    duplicates: Annotated[int, Field(description="Identical messages folded into this record.")] = 0
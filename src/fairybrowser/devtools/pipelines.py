@@ -0,0 +1,156 @@
+"""Batched, off-thread writer of the captured logs.
+
+The CDP callbacks only enqueue the records; a single worker thread writes them.
+
+* network: `network_writer(request_id, com_infos, folder)` per completed request.
+* console: JSON lines appended to `console/console.jsonl` in batches.
+
+`start(background=False)` writes every record at once in the calling thread
+instead. The background thread is also closed at the exit of the interpreter,
+so that the queued records are not lost when `close` is never called.
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from pydantic import BaseModel
+
+from fairybrowser.devtools.records import RawRecord
+from fairybrowser.devtools.streams import BoundedBuffer, OverflowPolicyEnum, StreamClosed
+
+
+NetworkWriter = Callable[[str, list[RawRecord], Path], None]
+
+
+class LogPipeline:
+    def __init__(
+        self,
+        output_folder: Path,
+        network_writer: NetworkWriter,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        maxsize: int = 100_000,
+        on_flush: Callable[[], None] | None = None,
+    ):
+        """on_flush: called by the worker thread every `flush_interval` (e.g. to emit the held records)."""
+        self.output_folder = Path(output_folder)
+        self.network_folder = self.output_folder / "network"
+        self.console_folder = self.output_folder / "console"
+        self.network_writer = network_writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        # Network records must not be lost, hence `BLOCK`.
+        self._buffer: BoundedBuffer[tuple[str, Any]] = BoundedBuffer(
+            maxsize, OverflowPolicyEnum.BLOCK, put_timeout=None
+        )
+        self._pending: dict[str, list[str]] = {}
+        self._thread: threading.Thread | None = None
+        self._flushed = threading.Event()
+        self._background = True
+
+    def start(self, background: bool = True) -> None:
+        if self._thread is not None:
+            return
+        self.network_folder.mkdir(parents=True, exist_ok=True)
+        self.console_folder.mkdir(parents=True, exist_ok=True)
+        self._background = background
+        if not background:
+            return
+        self._thread = threading.Thread(target=self._run, name="fairybrowser-log-pipeline", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit_network(self, request_id: str, com_infos: list[RawRecord]) -> None:
+        if not self._background:
+            self._write_network(request_id, com_infos)
+            return
+        self._buffer.put(("network", (request_id, com_infos)))
+
+    def submit_record(self, channel: str, record: BaseModel | dict) -> None:
+        """Append `record` to `<output_folder>/<channel>/<channel>.jsonl`."""
+        if not self._background:
+            self._add_record(channel, record)
+            self._write_pending()
+        elif threading.current_thread() is self._thread:
+            self._add_record(channel, record)  # From `on_flush`; waiting for the own buffer would deadlock.
+        else:
+            self._buffer.put(("record", (channel, record)))
+
+    def flush(self, timeout: float | None = 10.0) -> None:
+        """Block until all the submitted records are written."""
+        if self._thread is None:
+            return
+        self._flushed.clear()
+        self._buffer.put(("flush", None))
+        self._flushed.wait(timeout)
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        atexit.unregister(self.close)
+        self._buffer.close()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        while True:
+            try:
+                kind, payload = self._buffer.get(timeout=self.flush_interval)
+            except TimeoutError:
+                kind, payload = "tick", None
+            except StreamClosed:
+                self._write_pending()
+                return
+
+            if kind == "network":
+                self._write_network(*payload)
+            elif kind == "record":
+                self._add_record(*payload)
+
+            n_pending = sum(len(lines) for lines in self._pending.values())
+            now = time.monotonic()
+            is_due = kind == "flush" or now - last_flush >= self.flush_interval
+            if is_due and self.on_flush is not None:
+                try:
+                    self.on_flush()
+                except Exception:
+                    logging.exception("`on_flush` of the log pipeline failed.")
+            if is_due or n_pending >= self.batch_size:
+                self._write_pending()
+                last_flush = now
+            if kind == "flush":
+                self._flushed.set()
+
+    def _write_network(self, request_id: str, com_infos: list[RawRecord]) -> None:
+        try:
+            self.network_writer(request_id, com_infos, self.network_folder)
+        except Exception:
+            logging.exception("Failed to write the log record.")
+
+    def _add_record(self, channel: str, record: BaseModel | dict) -> None:
+        try:
+            if isinstance(record, BaseModel):
+                line = record.model_dump_json()
+            else:
+                line = json.dumps(record, ensure_ascii=False)
+        except Exception:
+            logging.exception("Failed to write the log record.")
+            return
+        self._pending.setdefault(channel, []).append(line)
+
+    def _write_pending(self) -> None:
+        for channel, lines in self._pending.items():
+            if not lines:
+                continue
+            folder = self.output_folder / channel
+            folder.mkdir(parents=True, exist_ok=True)
+            with (folder / f"{channel}.jsonl").open("a", encoding="utf-8") as fp:
+                fp.write("\n".join(lines) + "\n")
+            lines.clear()
@@ -0,0 +1,67 @@
+"""Compact record of one request for the hot paths.
+
+`RawRecord` has the same fields as `RawCommunicationInfo`, but it is a slotted
+dataclass: no validators run on the creation, and `to_json` / `from_json`
+produce / read the same JSON as `model_dump` / `model_validate`.
+The collector builds `RawRecord` for every CDP event, and the analyzer reads
+them for the columnar views. Convert with `to_model` / `from_model` where the
+pydantic model is needed.
+
+`from_json` trusts the input (the files written by `DevtoolsUser`); use
+`RawCommunicationInfo.model_validate` for the files of unknown origin.
+"""
+
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any
+
+from fairybrowser.devtools.models import RawCommunicationInfo, _decode_body_from_json, _encode_body_for_json
+
+
+@dataclass(slots=True)
+class RawRecord:
+    url: str
+    method: str
+    status: int | None = None
+    timing: dict[str, Any] | None = None
+    wall_time: float | None = None
+    end_time: float | None = None
+    resource_type: str | None = None
+    initiator_url: str | None = None
+    connection_id: int | None = None
+    connection_reused: bool | None = None
+    request_headers: dict[str, Any] = field(default_factory=dict)
+    response_headers: dict[str, Any] = field(default_factory=dict)
+    request_body: bytes | None = None
+    response_body: bytes | None = None
+
+    @classmethod
+    def from_model(cls, raw: RawCommunicationInfo) -> "RawRecord":
+        return cls(**{name: getattr(raw, name) for name in _FIELD_NAMES})
+
+    def to_model(self) -> RawCommunicationInfo:
+        # The values have the types of the model already, so the validation is skipped.
+        return RawCommunicationInfo.model_construct(**{name: getattr(self, name) for name in _FIELD_NAMES})
+
+    def to_json(self) -> dict[str, Any]:
+        """Same as `RawCommunicationInfo.model_dump()`."""
+        data = {name: getattr(self, name) for name in _MODEL_FIELD_NAMES}
+        data["request_body"] = _encode_body_for_json(self.request_body)
+        data["response_body"] = _encode_body_for_json(self.response_body)
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any], base_folder: Path | None = None) -> "RawRecord":
+        """base_folder: the folder of the JSON file, for the bodies in the separate files."""
+        values = {name: data[name] for name in _FIELD_NAMES if name in data}
+        values["request_body"] = _decode_body_from_json(data.get("request_body"), base_folder)
+        values["response_body"] = _decode_body_from_json(data.get("response_body"), base_folder)
+        values["request_headers"] = values.get("request_headers") or {}
+        values["response_headers"] = values.get("response_headers") or {}
+        return cls(**values)
+
+
+_FIELD_NAMES = tuple(elem.name for elem in fields(RawRecord))
+# In the order of `RawCommunicationInfo`, so that the dumps are identical.
+_MODEL_FIELD_NAMES = tuple(RawCommunicationInfo.model_fields)
+assert set(_FIELD_NAMES) == set(_MODEL_FIELD_NAMES), "RawRecord and RawCommunicationInfo must have the same fields."
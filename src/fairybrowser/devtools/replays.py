@@ -0,0 +1,148 @@
+"""Offline replay of the captures of `DevtoolsUser`.
+
+The recorded responses are indexed by (method, url, hash of the request body),
+and the paused requests are fulfilled from them via the `Fetch` domain.
+The response bodies of a log folder are read from the disk only when they are served.
+
+```python
+with sync_page() as page:
+    Replayer(page, "./debug", miss_policy="not_found").start()
+    page.goto("https://example.com")
+```
+"""
+
+import hashlib
+from collections import defaultdict
+from enum import Enum
+from pathlib import Path
+from typing import Any, Iterable
+
+from playwright.sync_api import Page, Frame
+
+from fairybrowser.devtools.models import RawCommunicationInfo, SimpleRequest, _decode_body_from_json
+from fairybrowser.devtools.interceptors import FetchHandler, FetchInterceptor, request_body_of
+
+
+class MissPolicyEnum(str, Enum):
+    PASSTHROUGH = "passthrough"  # Go to the real network.
+    NOT_FOUND = "not_found"  # Respond with 404.
+    FAIL = "fail"  # `Fetch.failRequest`.
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+
+def body_hash(body: bytes | None) -> str:
+    if not body:
+        return ""
+    return hashlib.sha256(body).hexdigest()
+
+
+class ReplayIndex:
+    """(method, url, body hash) -> recorded responses.
+
+    The same request recorded several times is served in the recorded order,
+    and the last one is repeated afterwards.
+    """
+
+    def __init__(self, raws: Iterable[RawCommunicationInfo], match_body: bool = True):
+        self.match_body = match_body
+        self._entries: dict[tuple[str, str, str], list[SimpleRequest]] = defaultdict(list)
+        self._loose: dict[tuple[str, str], list[SimpleRequest]] = defaultdict(list)
+        self._served: dict[tuple, int] = defaultdict(int)
+        for raw in raws:
+            if raw.status is not None:
+                self._add(SimpleRequest.from_raw(raw), body_hash(raw.request_body))
+
+    @classmethod
+    def from_folder(cls, log_folder: str | Path, match_body: bool = True) -> "ReplayIndex":
+        """Index the records of a log folder by (file, position): the response bodies are not loaded."""
+        from fairybrowser.devtools.analyzers import SimpleRequestAnalyzer
+
+        index = cls([], match_body=match_body)
+        for path, position, record in SimpleRequestAnalyzer(log_folder)._iter_records():
+            if record.get("status") is not None:
+                request_body = _decode_body_from_json(record.get("request_body"), path.parent)
+                index._add(SimpleRequest.from_record(record, path, position), body_hash(request_body))
+        return index
+
+    def _add(self, request: SimpleRequest, request_hash: str) -> None:
+        # Incomplete records (e.g. the request before a redirect) are skipped by the callers.
+        method = request.method.upper()
+        self._entries[(method, request.url, request_hash)].append(request)
+        self._loose[(method, request.url)].append(request)
+
+    def __len__(self) -> int:
+        return sum(len(elems) for elems in self._entries.values())
+
+    def lookup(self, method: str, url: str, body: bytes | None = None) -> SimpleRequest | None:
+        method = method.upper()
+        key: tuple = (method, url, body_hash(body))
+        candidates = self._entries.get(key) if self.match_body else None
+        if not candidates:
+            key = (method, url)
+            candidates = self._loose.get(key)
+            # With `match_body`, the bodiless requests must match exactly.
+            if candidates and self.match_body and body:
+                candidates = None
+        if not candidates:
+            return None
+        index = min(self._served[key], len(candidates) - 1)
+        self._served[key] += 1
+        return candidates[index]
+
+
+class ReplayHandler(FetchHandler):
+    def __init__(self, index: ReplayIndex, miss_policy: MissPolicyEnum | str = MissPolicyEnum.PASSTHROUGH):
+        self.index = index
+        self.miss_policy = MissPolicyEnum(miss_policy)
+        self.hits = 0
+        self.misses: list[str] = []
+
+    def on_request(self, params: dict[str, Any], interceptor: FetchInterceptor) -> bool:
+        request = params["request"]
+        request_id = params["requestId"]
+        raw = self.index.lookup(request["method"], request["url"], request_body_of(params))
+        if raw is not None:
+            self.hits += 1
+            assert raw.status is not None
+            interceptor.fulfill(request_id, raw.status, raw.response_headers, raw.response_body)
+            return True
+
+        self.misses.append(f"{request['method']} {request['url']}")
+        if self.miss_policy == MissPolicyEnum.PASSTHROUGH:
+            return False
+        elif self.miss_policy == MissPolicyEnum.NOT_FOUND:
+            interceptor.fulfill(request_id, 404, {"Content-Type": "text/plain"}, b"Not recorded.")
+        else:
+            interceptor.fail(request_id, "Failed")
+        return True
+
+
+class Replayer:
+    def __init__(
+        self,
+        page: Page | Frame,
+        log_folder: str | Path,
+        miss_policy: MissPolicyEnum | str = MissPolicyEnum.PASSTHROUGH,
+        match_body: bool = True,
+    ):
+        self.page = page
+        self.handler = ReplayHandler(ReplayIndex.from_folder(log_folder, match_body), miss_policy)
+        self.interceptor: FetchInterceptor | None = None
+
+    def start(self) -> FetchInterceptor:
+        self.interceptor = FetchInterceptor.attach(self.page, [self.handler])
+        return self.interceptor
+
+    def stop(self) -> None:
+        if self.interceptor is not None:
+            self.interceptor.remove(self.handler)
+
+    @property
+    def hits(self) -> int:
+        return self.handler.hits
+
+    @property
+    def misses(self) -> list[str]:
+        return self.handler.misses
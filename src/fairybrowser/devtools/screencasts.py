@@ -0,0 +1,393 @@
+"""Screenshots and screencasts of the pages, encoded off the Playwright thread.
+
+The CDP callbacks only acknowledge the frame and enqueue its base64 payload;
+a pool of worker threads decodes, resizes and encodes it (Pillow releases the
+GIL while it does), and writes it out.
+
+```python
+with ScreencastPipeline("./frames", format="webp", max_width=640) as pipeline:
+    pipeline.attach(page, "worker-1", every_nth_frame=2)  # `Page.startScreencast`
+    page.goto("https://example.com")
+    pipeline.capture(page, "worker-1")  # One `Page.captureScreenshot`.
+print(pipeline.stats)
+for frame in iter_frames("./frames/worker-1"):
+    print(frame.index, frame.timestamp, len(frame.data))
+```
+
+* container (default): `<label>/segment-000001.fbsc`, rotated every `segment_frames`
+  frames or `segment_bytes` bytes. Header (`FBSC`, version, format), then per frame
+  `index (uint64), timestamp (float64), size (uint32)` followed by the image.
+* files: `<label>/00000001.webp`, the oldest removed beyond `max_files`.
+
+When the encoders fall behind, `policy` decides which frames are dropped
+(`drop_oldest` by default, so that the output follows the page).
+"""
+
+import base64
+import io
+import logging
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+from PIL import Image
+from playwright.sync_api import Page
+
+from fairybrowser.devtools.streams import BoundedBuffer, OverflowPolicyEnum, StreamClosed
+
+
+MAGIC = b"FBSC"
+VERSION = 1
+_HEADER = struct.Struct("<4sH8s")  # magic, version, format
+_RECORD = struct.Struct("<QdI")  # index, timestamp, size
+
+
+class ImageFormatEnum(str, Enum):
+    PNG = "png"
+    JPEG = "jpeg"
+    WEBP = "webp"
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+    @property
+    def suffix(self) -> str:
+        return ".jpg" if self == ImageFormatEnum.JPEG else f".{self.value}"
+
+
+@dataclass(slots=True)
+class ScreencastFrame:
+    label: str
+    index: int
+    timestamp: float  # Wall time.
+    data: str  # Base64, as received. Decoded by the workers.
+    source_format: ImageFormatEnum = ImageFormatEnum.JPEG
+
+
+@dataclass(slots=True)
+class ArchivedFrame:
+    index: int
+    timestamp: float
+    data: bytes  # The encoded image.
+
+
+@dataclass
+class ScreencastStats:
+    received: int = 0
+    dropped: int = 0  # By the overflow policy.
+    written: int = 0
+    failed: int = 0
+    bytes_written: int = 0
+    encode_seconds: float = 0.0
+
+    @property
+    def mean_encode_ms(self) -> float:
+        return 1000 * self.encode_seconds / self.written if self.written else 0.0
+
+
+class FrameArchive:
+    """Rotating container of the frames of one label."""
+
+    def __init__(
+        self,
+        folder: Path,
+        format: ImageFormatEnum,
+        segment_frames: int = 1000,
+        segment_bytes: int = 256 * 1024 ** 2,
+        max_segments: int | None = None,
+    ):
+        """max_segments: the oldest segments are removed beyond it (None: keep all)."""
+        self.folder = Path(folder)
+        self.format = ImageFormatEnum(format)
+        self.segment_frames = segment_frames
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._segments: deque[Path] = deque(sorted(self.folder.glob("segment-*.fbsc")))
+        self._fp: BinaryIO | None = None
+        self._frames = 0
+        self._bytes = 0
+
+    def write(self, index: int, timestamp: float, data: bytes) -> int:
+        """Append one frame. Return the bytes written."""
+        if self._fp is None or self._frames >= self.segment_frames or self._bytes >= self.segment_bytes:
+            self._rotate()
+        record = _RECORD.pack(index, timestamp, len(data))
+        self._fp.write(record)
+        self._fp.write(data)
+        self._frames += 1
+        self._bytes += len(record) + len(data)
+        return len(record) + len(data)
+
+    def _rotate(self) -> None:
+        self.close()
+        number = int(self._segments[-1].stem.split("-")[1]) + 1 if self._segments else 1
+        path = self.folder / f"segment-{number:06d}.fbsc"
+        self._fp = path.open("wb")
+        self._fp.write(_HEADER.pack(MAGIC, VERSION, str(self.format).encode()))
+        self._frames = 0
+        self._bytes = _HEADER.size
+        self._segments.append(path)
+        while self.max_segments is not None and len(self._segments) > self.max_segments:
+            self._segments.popleft().unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+class _FileRotation:
+    """One image file per frame, the oldest removed beyond `max_files`.
+
+    The numbering continues after the files of the previous runs in the folder.
+    """
+
+    def __init__(self, folder: Path, format: ImageFormatEnum, max_files: int | None = None):
+        self.folder = Path(folder)
+        self.format = ImageFormatEnum(format)
+        self.max_files = max_files
+        self.folder.mkdir(parents=True, exist_ok=True)
+        existing = sorted(elem for elem in self.folder.glob(f"*{self.format.suffix}") if elem.stem.isdigit())
+        self._files: deque[Path] = deque(existing)
+        self._offset = int(existing[-1].stem) + 1 if existing else 0
+
+    def write(self, index: int, timestamp: float, data: bytes) -> int:
+        path = self.folder / f"{self._offset + index:08d}{self.format.suffix}"
+        path.write_bytes(data)
+        self._files.append(path)
+        while self.max_files is not None and len(self._files) > self.max_files:
+            self._files.popleft().unlink(missing_ok=True)
+        return len(data)
+
+    def close(self) -> None:
+        pass
+
+
+def read_frame_archive(path: str | Path) -> tuple[ImageFormatEnum, list[ArchivedFrame]]:
+    """Read one segment. A frame truncated by a crash is ignored."""
+    path = Path(path)
+    data = path.read_bytes()
+    magic, version, raw_format = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Not a frame archive: {path}")
+    if version > VERSION:
+        raise ValueError(f"Unsupported version {version}: {path}")
+    frames = []
+    position = _HEADER.size
+    while position + _RECORD.size <= len(data):
+        index, timestamp, size = _RECORD.unpack_from(data, position)
+        position += _RECORD.size
+        if position + size > len(data):
+            break  # Truncated by a crash.
+        frames.append(ArchivedFrame(index, timestamp, data[position:position + size]))
+        position += size
+    return ImageFormatEnum(raw_format.rstrip(b"\0").decode()), frames
+
+
+def iter_frames(folder: str | Path) -> Iterator[ArchivedFrame]:
+    """The frames of all the segments in `folder` (one label), in the order of the index."""
+    for path in sorted(Path(folder).glob("segment-*.fbsc")):
+        _, frames = read_frame_archive(path)
+        # The workers may finish the frames out of order, within a segment.
+        yield from sorted(frames, key=lambda elem: elem.index)
+
+
+class ScreencastPipeline:
+    def __init__(
+        self,
+        output_folder: str | Path,
+        format: ImageFormatEnum | str = ImageFormatEnum.WEBP,
+        quality: int = 80,
+        max_width: int | None = None,
+        max_height: int | None = None,
+        workers: int = 2,
+        maxsize: int = 64,
+        policy: OverflowPolicyEnum | str = OverflowPolicyEnum.DROP_OLDEST,
+        container: bool = True,
+        segment_frames: int = 1000,
+        segment_bytes: int = 256 * 1024 ** 2,
+        max_segments: int | None = None,
+        max_files: int | None = None,
+    ):
+        """
+        quality: of JPEG / WebP (PNG is lossless, written with the fast compression).
+        max_width, max_height: the frames are downscaled to fit, keeping the aspect ratio.
+        maxsize: frames waiting for the encoders, beyond which `policy` applies.
+        container: True for the rotating archives, False for one file per frame.
+        """
+        self.output_folder = Path(output_folder)
+        self.format = ImageFormatEnum(format)
+        self.quality = quality
+        self.max_width = max_width
+        self.max_height = max_height
+        self.container = container
+        self.segment_frames = segment_frames
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.max_files = max_files
+        self.stats = ScreencastStats()
+        self._buffer: BoundedBuffer[ScreencastFrame] = BoundedBuffer(maxsize, policy, put_timeout=None)
+        self._lock = threading.Lock()
+        self._writers: dict[str, FrameArchive | _FileRotation] = {}
+        self._writer_locks: dict[str, threading.Lock] = {}
+        self._indexes: dict[str, int] = {}
+        self._clients: dict[str, Any] = {}  # label -> CDP session with a running screencast
+        self._threads = [
+            threading.Thread(target=self._run, name=f"fairybrowser-screencast-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for elem in self._threads:
+            elem.start()
+
+    # ---- Sources (the Playwright thread) ----
+
+    def attach(
+        self,
+        page: Page,
+        label: str,
+        client: Any = None,
+        every_nth_frame: int = 1,
+        source_format: ImageFormatEnum | str = ImageFormatEnum.JPEG,
+        source_quality: int = 80,
+    ) -> None:
+        """Start `Page.startScreencast` on `page`. The frames are stored under `label`."""
+        client = client if client is not None else page.context.new_cdp_session(page)
+        source_format = ImageFormatEnum(source_format)
+        if source_format == ImageFormatEnum.WEBP:
+            raise ValueError("`Page.startScreencast` supports only jpeg and png.")
+
+        def _on_frame(params: dict[str, Any]) -> None:
+            # Acknowledged first, so that the browser keeps sending while the encoders work.
+            client.send("Page.screencastFrameAck", {"sessionId": params["sessionId"]})
+            timestamp = params.get("metadata", {}).get("timestamp") or time.time()
+            self._put(label, params["data"], timestamp, source_format)
+
+        client.on("Page.screencastFrame", _on_frame)
+        params = {"format": str(source_format), "everyNthFrame": every_nth_frame}
+        if source_format == ImageFormatEnum.JPEG:
+            params["quality"] = source_quality
+        if self.max_width is not None:
+            params["maxWidth"] = self.max_width
+        if self.max_height is not None:
+            params["maxHeight"] = self.max_height
+        client.send("Page.startScreencast", params)
+        self._clients[label] = client
+
+    def capture(
+        self,
+        page: Page,
+        label: str,
+        client: Any = None,
+        source_format: ImageFormatEnum | str = ImageFormatEnum.PNG,
+        full_page: bool = False,
+    ) -> bool:
+        """One `Page.captureScreenshot`. Return True if the frame is queued.
+
+        full_page: the whole content (`Page.getLayoutMetrics`), not only the viewport.
+        """
+        client = client if client is not None else self._clients.get(label) or page.context.new_cdp_session(page)
+        source_format = ImageFormatEnum(source_format)
+        params: dict[str, Any] = {"format": str(source_format)}
+        if full_page:
+            size = client.send("Page.getLayoutMetrics")["cssContentSize"]
+            params["captureBeyondViewport"] = True
+            params["clip"] = {"x": 0, "y": 0, "width": size["width"], "height": size["height"], "scale": 1}
+        if source_format != ImageFormatEnum.PNG:
+            params["quality"] = self.quality
+        result = client.send("Page.captureScreenshot", params)
+        return self._put(label, result["data"], time.time(), source_format)
+
+    def stop(self, label: str) -> None:
+        client = self._clients.pop(label, None)
+        if client is not None:
+            try:
+                client.send("Page.stopScreencast")
+            except Exception:
+                pass  # The page is closed already.
+
+    def _put(self, label: str, data: str, timestamp: float, source_format: ImageFormatEnum) -> bool:
+        with self._lock:
+            index = self._indexes.get(label, 0)
+            self._indexes[label] = index + 1
+            self.stats.received += 1
+        is_buffered = self._buffer.put(ScreencastFrame(label, index, timestamp, data, source_format))
+        self.stats.dropped = self._buffer.dropped
+        return is_buffered
+
+    # ---- Workers ----
+
+    def _run(self) -> None:
+        while True:
+            try:
+                frame = self._buffer.get()
+            except StreamClosed:
+                return
+            try:
+                start = time.perf_counter()
+                data = self.encode(base64.b64decode(frame.data), frame.source_format)
+                elapsed = time.perf_counter() - start
+                writer, lock = self._get_writer(frame.label)
+                with lock:
+                    size = writer.write(frame.index, frame.timestamp, data)
+                with self._lock:
+                    self.stats.written += 1
+                    self.stats.bytes_written += size
+                    self.stats.encode_seconds += elapsed
+            except Exception:
+                logging.exception("Failed to write the frame %d of %s.", frame.index, frame.label)
+                with self._lock:
+                    self.stats.failed += 1
+
+    def encode(self, raw: bytes, source_format: ImageFormatEnum | None = None) -> bytes:
+        """Decode, downscale to `max_width` x `max_height` and encode in `format`."""
+        with Image.open(io.BytesIO(raw)) as image:
+            fits = ((self.max_width is None or image.width <= self.max_width)
+                    and (self.max_height is None or image.height <= self.max_height))
+            if fits and source_format == self.format and self.format != ImageFormatEnum.PNG:
+                return raw  # Already in shape; re-encoding a lossy image only loses quality.
+            if not fits:
+                image.thumbnail((self.max_width or image.width, self.max_height or image.height))
+            if self.format == ImageFormatEnum.JPEG and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            output = io.BytesIO()
+            if self.format == ImageFormatEnum.PNG:
+                image.save(output, "PNG", compress_level=1)
+            else:
+                image.save(output, self.format.name, quality=self.quality)
+            return output.getvalue()
+
+    def _get_writer(self, label: str) -> tuple[FrameArchive | _FileRotation, threading.Lock]:
+        with self._lock:
+            if label not in self._writers:
+                folder = self.output_folder / label
+                if self.container:
+                    self._writers[label] = FrameArchive(folder, self.format, self.segment_frames,
+                                                        self.segment_bytes, self.max_segments)
+                else:
+                    self._writers[label] = _FileRotation(folder, self.format, self.max_files)
+                self._writer_locks[label] = threading.Lock()
+            return self._writers[label], self._writer_locks[label]
+
+    def close(self) -> None:
+        """Stop the screencasts, and wait for the queued frames to be written."""
+        for label in list(self._clients):
+            self.stop(label)
+        self._buffer.close()
+        for elem in self._threads:
+            elem.join()
+        self.stats.dropped = self._buffer.dropped
+        for label, writer in self._writers.items():
+            with self._writer_locks[label]:
+                writer.close()
+
+    def __enter__(self) -> "ScreencastPipeline":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
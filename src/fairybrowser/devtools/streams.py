@@ -0,0 +1,241 @@
+"""Live delivery of the completed requests.
+
+`DevtoolsUser` publishes every completed `SimpleRequest` to the registered sinks,
+so that the consumers can react without re-reading the dumped files.
+
+* `RequestStream`: bounded, thread-safe iterator.
+* `CallbackSink`: invokes the given callback.
+* `AsyncioQueueSink`: forwards to an `asyncio.Queue` living in another loop.
+
+Note: with the sync API of playwright, CDP events are dispatched in the thread
+which drives playwright. `OverflowPolicyEnum.BLOCK` must be used only when
+the consumer runs in another thread, otherwise it waits until `put_timeout`.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from enum import Enum
+from typing import Callable, Generic, Iterator, Protocol, TypeVar
+
+from fairybrowser.devtools.models import SimpleRequest
+
+T = TypeVar("T")
+
+
+class OverflowPolicyEnum(str, Enum):
+    BLOCK = "block"  # Wait for the consumer (up to `put_timeout`).
+    DROP_NEWEST = "drop_newest"  # Discard the incoming item.
+    DROP_OLDEST = "drop_oldest"  # Discard the oldest buffered item.
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+
+class StreamClosed(Exception):
+    """Raised when `get` is called on the closed and drained buffer."""
+
+
+class BoundedBuffer(Generic[T]):
+    """Thread-safe FIFO with the overflow policy."""
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        policy: OverflowPolicyEnum = OverflowPolicyEnum.DROP_OLDEST,
+        put_timeout: float | None = 5.0,
+    ):
+        if maxsize <= 0:
+            raise ValueError("`maxsize` must be positive.")
+        self.maxsize = maxsize
+        self.policy = OverflowPolicyEnum(policy)
+        self.put_timeout = put_timeout
+        self.dropped = 0
+        self.delivered = 0
+        self._items: deque[T] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def put(self, item: T) -> bool:
+        """Return True if `item` is buffered."""
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                if self.policy == OverflowPolicyEnum.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                elif self.policy == OverflowPolicyEnum.DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    is_ready = self._cond.wait_for(
+                        lambda: self._closed or len(self._items) < self.maxsize,
+                        timeout=self.put_timeout,
+                    )
+                    if not is_ready or self._closed:
+                        self.dropped += 1
+                        return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: float | None = None) -> T:
+        """Take the oldest item.
+
+        Raises `TimeoutError` if nothing arrives within `timeout`,
+        and `StreamClosed` if the buffer is closed and empty.
+        """
+        with self._cond:
+            is_ready = self._cond.wait_for(lambda: self._items or self._closed, timeout=timeout)
+            if self._items:
+                item = self._items.popleft()
+                self.delivered += 1
+                self._cond.notify_all()
+                return item
+            if self._closed:
+                raise StreamClosed()
+            assert not is_ready
+            raise TimeoutError(f"No item within {timeout} seconds.")
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class RequestSink(Protocol):
+    def publish(self, request: SimpleRequest) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class RequestStream:
+    """Iterator over the completed requests.
+
+    Iteration ends after `close` is called and the buffered ones are consumed.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        policy: OverflowPolicyEnum = OverflowPolicyEnum.DROP_OLDEST,
+        put_timeout: float | None = 5.0,
+        predicate: Callable[[SimpleRequest], bool] | None = None,
+    ):
+        self._buffer: BoundedBuffer[SimpleRequest] = BoundedBuffer(maxsize, policy, put_timeout)
+        self.predicate = predicate
+        self.errors = 0
+
+    @property
+    def dropped(self) -> int:
+        return self._buffer.dropped
+
+    @property
+    def delivered(self) -> int:
+        return self._buffer.delivered
+
+    def publish(self, request: SimpleRequest) -> None:
+        try:
+            if self.predicate is not None and not self.predicate(request):
+                return
+        except Exception:
+            self.errors += 1
+            logging.exception("Predicate for the request stream failed.")
+            return
+        self._buffer.put(request)
+
+    def get(self, timeout: float | None = None) -> SimpleRequest:
+        return self._buffer.get(timeout)
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def __iter__(self) -> Iterator[SimpleRequest]:
+        while True:
+            try:
+                yield self._buffer.get()
+            except StreamClosed:
+                return
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+
+class CallbackSink:
+    """Invoke `callback` for every request. Exceptions are logged, not raised."""
+
+    def __init__(
+        self,
+        callback: Callable[[SimpleRequest], None],
+        predicate: Callable[[SimpleRequest], bool] | None = None,
+    ):
+        self.callback = callback
+        self.predicate = predicate
+        self.errors = 0
+
+    def publish(self, request: SimpleRequest) -> None:
+        try:
+            if self.predicate is not None and not self.predicate(request):
+                return
+            self.callback(request)
+        except Exception:
+            self.errors += 1
+            logging.exception("Callback for the request stream failed.")
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncioQueueSink:
+    """Forward requests to `queue`, which belongs to `loop` (possibly in another thread).
+
+    `None` is put into the queue when the sink is closed.
+    """
+
+    def __init__(
+        self,
+        queue: asyncio.Queue,
+        loop: asyncio.AbstractEventLoop,
+        policy: OverflowPolicyEnum = OverflowPolicyEnum.DROP_OLDEST,
+        put_timeout: float | None = 5.0,
+    ):
+        self.queue = queue
+        self.loop = loop
+        self.policy = OverflowPolicyEnum(policy)
+        self.put_timeout = put_timeout
+        self.dropped = 0
+
+    def publish(self, request: SimpleRequest | None) -> None:
+        if self.loop.is_closed():
+            return
+        if self.policy == OverflowPolicyEnum.BLOCK:
+            future = asyncio.run_coroutine_threadsafe(self.queue.put(request), self.loop)
+            try:
+                future.result(timeout=self.put_timeout)
+            except TimeoutError:
+                future.cancel()
+                self.dropped += 1
+        else:
+            self.loop.call_soon_threadsafe(self._put_nowait, request)
+
+    def _put_nowait(self, request: SimpleRequest | None) -> None:
+        if self.queue.full():
+            if self.policy == OverflowPolicyEnum.DROP_NEWEST and request is not None:
+                self.dropped += 1
+                return
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(request)
+
+    def close(self) -> None:
+        self.publish(None)
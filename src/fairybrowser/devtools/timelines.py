@@ -0,0 +1,193 @@
+"""Request waterfall of a capture.
+
+`Timeline` reconstructs the phases of each request from CDP `ResourceTiming`
+(the same definitions as `RequestColumns`), the connection reuse, the
+concurrency over time and the critical path of the page load.
+
+```python
+timeline = SimpleRequestAnalyzer("./debug").timeline()
+timeline.write_csv("waterfall.csv")
+print([elem.url for elem in timeline.critical_path()])
+```
+
+The requests without `timing["requestTime"]` (e.g. failed or served from the
+memory cache) cannot be placed and are skipped.
+"""
+
+import csv
+import math
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+from pydantic import BaseModel
+
+from fairybrowser.devtools.columns import RequestColumns
+from fairybrowser.devtools.models import RawCommunicationInfo
+from fairybrowser.devtools.records import RawRecord
+
+
+class TimelineEntry(BaseModel, frozen=True):
+    index: int
+    url: str
+    host: str
+    method: str
+    status: int | None
+    resource_type: str | None
+    initiator_url: str | None
+    start: float  # Seconds from the first request.
+    end: float  # Seconds from the first request. The response headers if `loadingFinished` is unknown.
+    blocked: float | None  # Milliseconds, None when not applicable.
+    dns: float | None
+    connect: float | None
+    ssl: float | None
+    send: float | None
+    wait: float | None
+    receive: float | None  # From the response headers to `loadingFinished`.
+    connection_id: int | None
+    connection_reused: bool
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def _to_optional(value: float) -> float | None:
+    return None if math.isnan(value) else float(value)
+
+
+def _has_request_time(raw: RawCommunicationInfo | RawRecord) -> bool:
+    return isinstance((raw.timing or {}).get("requestTime"), (int, float))
+
+
+class Timeline:
+    def __init__(self, entries: Iterable[TimelineEntry]):
+        self.entries = sorted(entries, key=lambda elem: (elem.start, elem.index))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[TimelineEntry]:
+        return iter(self.entries)
+
+    @classmethod
+    def from_raws(cls, raws: Iterable[RawCommunicationInfo | RawRecord]) -> "Timeline":
+        raws = [raw for raw in raws if _has_request_time(raw)]
+        if not raws:
+            return cls([])
+        columns = RequestColumns.from_raws(raws)
+        origin = float(columns.time.min())
+        headers_end = columns.time + np.nan_to_num(columns.total) / 1000.0
+
+        entries = []
+        for i, raw in enumerate(raws):
+            start = float(columns.time[i])
+            if raw.end_time is not None and raw.end_time >= start:
+                end = float(raw.end_time)
+                receive = (end - start) * 1000.0 - columns.total[i]
+            else:
+                end = float(headers_end[i])
+                receive = np.nan
+            reused = raw.connection_reused
+            if reused is None:
+                # CDP sets `connectStart` to -1 when an existing connection is used.
+                reused = bool(np.isnan(columns.connect[i]))
+            entries.append(TimelineEntry(
+                index=i,
+                url=raw.url,
+                host=str(columns.host[i]),
+                method=str(columns.method[i]),
+                status=raw.status,
+                resource_type=raw.resource_type,
+                initiator_url=raw.initiator_url,
+                start=start - origin,
+                end=end - origin,
+                blocked=_to_optional(columns.blocked[i]),
+                dns=_to_optional(columns.dns[i]),
+                connect=_to_optional(columns.connect[i]),
+                ssl=_to_optional(columns.ssl[i]),
+                send=_to_optional(columns.send[i]),
+                wait=_to_optional(columns.wait[i]),
+                receive=_to_optional(receive),
+                connection_id=raw.connection_id,
+                connection_reused=reused,
+            ))
+        return cls(entries)
+
+    # ---- Connections ----
+
+    def connections(self) -> dict[int, list[TimelineEntry]]:
+        """Connection id -> the requests on it, in the order of the start."""
+        result: dict[int, list[TimelineEntry]] = {}
+        for elem in self.entries:
+            if elem.connection_id is not None:
+                result.setdefault(elem.connection_id, []).append(elem)
+        return result
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Ratio of the requests which did not open a new connection."""
+        if not self.entries:
+            return 0.0
+        return sum(elem.connection_reused for elem in self.entries) / len(self.entries)
+
+    # ---- Concurrency ----
+
+    def concurrency(self) -> list[tuple[float, int]]:
+        """(time, the number of the requests in flight from the time) at every change."""
+        if not self.entries:
+            return []
+        starts = np.array([elem.start for elem in self.entries])
+        ends = np.maximum(np.array([elem.end for elem in self.entries]), starts)
+        times = np.concatenate([starts, ends])
+        deltas = np.concatenate([np.ones(len(starts), np.int64), -np.ones(len(ends), np.int64)])
+        # At the same time, the finished requests are counted out first.
+        order = np.lexsort((deltas, times))
+        times, active = times[order], np.cumsum(deltas[order])
+        # Keep the last value of each time.
+        last = np.append(times[1:] != times[:-1], True)
+        return list(zip(times[last].tolist(), active[last].tolist()))
+
+    @property
+    def max_concurrency(self) -> int:
+        return max((active for _, active in self.concurrency()), default=0)
+
+    # ---- Critical path ----
+
+    def _parent(self, entry: TimelineEntry) -> TimelineEntry | None:
+        if entry.initiator_url:
+            candidates = [elem for elem in self.entries
+                          if elem.url == entry.initiator_url and elem.index != entry.index and elem.start <= entry.start]
+            if candidates:
+                return max(candidates, key=lambda elem: elem.start)
+        # Unknown initiator: assume the request which finished last before the start blocked it.
+        candidates = [elem for elem in self.entries if elem.index != entry.index and elem.end <= entry.start]
+        return max(candidates, key=lambda elem: elem.end, default=None)
+
+    def critical_path(self, target: TimelineEntry | None = None) -> list[TimelineEntry]:
+        """The chain of the requests which ends with `target` (default: the request finished last).
+
+        The parent of a request is its initiator (document / script) if recorded, otherwise
+        the request which finished last before it started. From the root to `target`.
+        """
+        if target is None:
+            if not self.entries:
+                return []
+            target = max(self.entries, key=lambda elem: elem.end)
+        path = [target]
+        seen = {target.index}
+        while (parent := self._parent(path[-1])) is not None and parent.index not in seen:
+            path.append(parent)
+            seen.add(parent.index)
+        return path[::-1]
+
+    # ---- Export ----
+
+    def to_rows(self) -> list[dict[str, Any]]:
+        return [elem.model_dump() for elem in self.entries]
+
+    def write_csv(self, path: str | Path) -> None:
+        with open(path, "w", newline="") as fp:
+            writer = csv.DictWriter(fp, fieldnames=list(TimelineEntry.model_fields))
+            writer.writeheader()
+            writer.writerows(self.to_rows())
@@ -0,0 +1,119 @@
+"""Load-aware selection of the instances, local and remote.
+
+`measure_loads` probes every instance (`GET /json/version` for the latency,
+the RSS of the process tree for the local ones), and `SelectionPolicy.rank`
+orders the reachable ones by a weighted score of the leases, the RSS and the
+latency. The callers try the ranked instances in turn (failover).
+
+```python
+monitors.register_remote("lab-1", "10.0.0.12", 9222)
+states = select_states(get_execution_infos().values())  # The best first.
+```
+"""
+
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Mapping
+
+import psutil
+from pydantic import BaseModel
+
+from fairybrowser.models import BrowserInfo, ExecutionState
+
+
+_GIB = 1024 ** 3
+
+
+class InstanceLoad(BaseModel, frozen=True):
+    state: ExecutionState
+    leases: int = 0
+    rss: int | None = None  # Bytes of the process tree. None for the remote instances.
+    latency: float | None = None  # Seconds of `GET /json/version`. None if unreachable.
+
+    @property
+    def reachable(self) -> bool:
+        return self.latency is not None
+
+
+class SelectionPolicy(BaseModel, frozen=True):
+    """Score = lease_weight * leases + rss_weight * RSS (GiB) + latency_weight * latency (100 ms). Lower is better."""
+
+    lease_weight: float = 1.0
+    rss_weight: float = 1.0
+    latency_weight: float = 1.0
+
+    def scores(self, loads: list[InstanceLoad]) -> list[float]:
+        known = [elem.rss for elem in loads if elem.rss is not None]
+        # Unknown RSS (remote) counts as the typical local one, neither preferred nor avoided.
+        default_rss = statistics.median(known) if known else 0
+        return [
+            self.lease_weight * elem.leases
+            + self.rss_weight * (elem.rss if elem.rss is not None else default_rss) / _GIB
+            + self.latency_weight * (elem.latency or 0.0) / 0.1
+            for elem in loads
+        ]
+
+    def rank(self, loads: list[InstanceLoad]) -> list[InstanceLoad]:
+        """The reachable instances, the best first."""
+        reachable = [elem for elem in loads if elem.reachable]
+        scores = self.scores(reachable)
+        order = sorted(range(len(reachable)), key=lambda i: (scores[i], reachable[i].state.name))
+        return [reachable[i] for i in order]
+
+
+def process_tree_rss(pid: int) -> int | None:
+    try:
+        process = psutil.Process(pid)
+        return sum(elem.memory_info().rss for elem in [process, *process.children(recursive=True)])
+    except psutil.Error:
+        return None
+
+
+def probe_latency(state: ExecutionState, timeout: float = 1.0) -> float | None:
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(state.endpoint + "/json/version", timeout=timeout) as response:
+            response.read()
+    except (OSError, ValueError):
+        return None
+    return time.perf_counter() - start
+
+
+def measure_load(state: ExecutionState, leases: int = 0, timeout: float = 1.0) -> InstanceLoad:
+    return InstanceLoad(
+        state=state,
+        leases=leases,
+        rss=process_tree_rss(state.pid) if state.is_local else None,
+        latency=probe_latency(state, timeout),
+    )
+
+
+def measure_loads(
+    states: Iterable[ExecutionState],
+    leases: Mapping[BrowserInfo, int] | None = None,
+    timeout: float = 1.0,
+) -> list[InstanceLoad]:
+    """Probe the instances concurrently. leases: the leases per instance known to the caller."""
+    states = list(states)
+    if not states:
+        return []
+    leases = leases or {}
+
+    def _measure(state: ExecutionState) -> InstanceLoad:
+        return measure_load(state, leases.get(BrowserInfo(name=state.name, type=state.type), 0), timeout)
+
+    with ThreadPoolExecutor(max_workers=min(16, len(states))) as executor:
+        return list(executor.map(_measure, states))
+
+
+def select_states(
+    states: Iterable[ExecutionState],
+    leases: Mapping[BrowserInfo, int] | None = None,
+    policy: SelectionPolicy | None = None,
+    timeout: float = 1.0,
+) -> list[ExecutionState]:
+    """The reachable instances, the best first."""
+    policy = policy or SelectionPolicy()
+    return [elem.state for elem in policy.rank(measure_loads(states, leases, timeout))]
@@ -0,0 +1,357 @@
+"""Fan a list of jobs out over K instances x M pages, with the results streamed back.
+
+Every instance is driven by its own thread with an asyncio loop (Playwright
+async API), running M page workers which take the jobs from one shared queue.
+The job iterable is consumed lazily, so it can be a generator of any length.
+
+```python
+async def scrape(page, job):
+    return await page.locator("h1").inner_text()
+
+runner = JobRunner(instances=["worker-1", "worker-2"], pages_per_instance=4, timeout=30)
+for result in runner.run(Job(url, scrape) for url in urls):  # In the order of the completion.
+    print(result.url, result.ok, result.value or result.error)
+print(runner.metrics.summary())
+```
+
+* A job is `page.goto(url)` followed by `await func(page, job)` (default: the title).
+* `timeout` is the limit of one job; the page is replaced after a timeout.
+* When the instance dies (or the page crashes), the jobs in flight are queued
+  again (up to `retries` times) and the instance is reconnected (`runners`
+  relaunches the local ones).
+* An exception raised by the job iterable is re-raised by `run`, after the
+  results of the jobs taken before it.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, replace
+from typing import Any, AsyncContextManager, Awaitable, Callable, Iterable, Iterator, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from fairybrowser.models import BrowserInfo
+
+
+JobFunc = Callable[[Any, "Job"], Awaitable[Any]]  # (playwright.async_api.Page, job) -> value
+
+
+@dataclass(frozen=True)
+class Job:
+    url: str | None  # None: `func` is called without the navigation.
+    func: JobFunc | None = None
+    job_id: Any = None  # Default: the position in the input.
+    timeout: float | None = None  # Default: `JobRunner.timeout`.
+
+
+class JobResult(BaseModel):
+    job_id: Any
+    url: str | None
+    ok: bool
+    value: Any = None
+    error: str | None = None
+    attempts: int  # 2 or more if the job was retried.
+    instance: str  # The target of the instance which ran the last attempt.
+    latency: float  # Seconds of the last attempt.
+    finished_at: float  # Wall time.
+
+
+@dataclass
+class JobMetrics:
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    succeeded: int = 0
+    failed: int = 0
+    retries: int = 0
+    per_instance: Counter = field(default_factory=Counter)
+    latencies: list[float] = field(default_factory=list)  # Seconds, of the succeeded jobs.
+
+    def add(self, result: JobResult) -> None:
+        if result.ok:
+            self.succeeded += 1
+            self.latencies.append(result.latency)
+        else:
+            self.failed += 1
+        self.retries += result.attempts - 1
+        self.per_instance[result.instance] += 1
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Completed jobs / second."""
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def latency_percentile(self, q: float) -> float:
+        return float(np.percentile(self.latencies, q)) if self.latencies else 0.0
+
+    def summary(self) -> dict[str, Any]:
+        return {"completed": self.completed, "succeeded": self.succeeded, "failed": self.failed,
+                "retries": self.retries, "elapsed": self.elapsed, "throughput": self.throughput,
+                "p50": self.latency_percentile(50), "p95": self.latency_percentile(95),
+                "per_instance": dict(self.per_instance)}
+
+
+class _InstanceDied(Exception):
+    pass
+
+
+@dataclass
+class _Attempt:
+    job: Job
+    attempts: int = 0
+
+
+async def _default_func(page, job: Job) -> Any:
+    return await page.title()
+
+
+@asynccontextmanager
+async def open_browser(target: BrowserInfo | str | None):
+    """Connect to the instance of `target` (launched if needed), with the failover of `runners`."""
+    from playwright.async_api import Error as PlaywrightError, async_playwright
+    from fairybrowser.runners import _to_apt_execution_states
+
+    states = await asyncio.to_thread(_to_apt_execution_states, target)
+    async with async_playwright() as playwright:
+        errors = []
+        for state in states:
+            try:
+                browser = await playwright.chromium.connect_over_cdp(state.endpoint)
+                break
+            except PlaywrightError as e:
+                errors.append(f"{state.name} ({state.endpoint}): {e}")
+        else:
+            raise ConnectionError("Cannot connect to any instance.\n" + "\n".join(errors))
+        try:
+            yield browser
+        finally:
+            if browser.is_connected():
+                await browser.close()
+
+
+class JobRunner:
+    def __init__(
+        self,
+        instances: Sequence[BrowserInfo | str | None] | int = 1,
+        pages_per_instance: int = 1,
+        timeout: float = 60.0,
+        retries: int = 2,
+        reconnects: int = 3,
+        open_browser: Callable[[BrowserInfo | str | None], AsyncContextManager] = open_browser,
+        poll_interval: float = 0.005,
+    ):
+        """
+        instances: the targets of `sync_page`, or K for the instances `jobs-0` ... `jobs-{K-1}`.
+        retries: the attempts of a job in addition to the first, when its instance or page dies.
+        reconnects: per instance, the failed connections in a row before its thread gives up.
+        open_browser: async context manager of the connection to a target (default `open_browser`).
+        """
+        if isinstance(instances, int):
+            instances = [f"jobs-{i}" for i in range(instances)]
+        self.instances = list(instances)
+        self.pages_per_instance = pages_per_instance
+        self.timeout = timeout
+        self.retries = retries
+        self.reconnects = reconnects
+        self.open_browser = open_browser
+        self.poll_interval = poll_interval
+        self.metrics = JobMetrics()
+
+    def run(self, jobs: Iterable[Job | str]) -> Iterator[JobResult]:
+        """Yield the results as the jobs complete. An exception of `jobs` is raised after the results."""
+        self.metrics = JobMetrics()
+        self._queue: queue.Queue[_Attempt] = queue.Queue(maxsize=max(2 * len(self.instances) * self.pages_per_instance, 1))
+        self._retry: queue.SimpleQueue[_Attempt] = queue.SimpleQueue()
+        self._results: queue.SimpleQueue[JobResult] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._fed = threading.Event()
+        self._stop = threading.Event()
+        self._feed_error: Exception | None = None
+
+        feeder = threading.Thread(target=self._feed, args=(jobs,), daemon=True)
+        workers = [threading.Thread(target=lambda target=target: asyncio.run(self._run_instance(target)), daemon=True)
+                   for target in self.instances]
+        feeder.start()
+        for elem in workers:
+            elem.start()
+        completed = 0
+        try:
+            while not (self._fed.is_set() and completed == self._submitted):
+                try:
+                    result = self._results.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(elem.is_alive() for elem in workers):
+                        self._fail_remaining("No instance is available.")
+                    continue
+                completed += 1
+                self.metrics.add(result)
+                yield result
+            if self._feed_error is not None:
+                raise self._feed_error
+        finally:
+            self.metrics.finished_at = time.monotonic()
+            self._stop.set()
+            for elem in workers:
+                elem.join(self.timeout)
+
+    # ---- Queue ----
+
+    def _feed(self, jobs: Iterable[Job | str]) -> None:
+        try:
+            for i, job in enumerate(jobs):
+                job = Job(job) if isinstance(job, str) else job
+                if job.job_id is None:
+                    job = replace(job, job_id=i)
+                with self._lock:
+                    self._submitted += 1
+                while not self._stop.is_set():
+                    try:
+                        self._queue.put(_Attempt(job), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if self._stop.is_set():
+                    return
+        except Exception as e:
+            self._feed_error = e  # Raised by `run` once the jobs taken so far are done.
+        finally:
+            self._fed.set()
+
+    def _take(self) -> _Attempt | None:
+        """The next attempt, or None if there is none for now."""
+        with self._lock:
+            for source in (self._retry, self._queue):
+                try:
+                    attempt = source.get_nowait()
+                except queue.Empty:
+                    continue
+                self._in_flight += 1
+                return attempt
+        return None
+
+    def _finished(self) -> bool:
+        with self._lock:
+            return self._stop.is_set() or (
+                self._fed.is_set() and self._in_flight == 0 and self._queue.empty() and self._retry.empty())
+
+    def _done(self, attempt: _Attempt, target, ok: bool, value: Any = None, error: str | None = None,
+              latency: float = 0.0) -> None:
+        job = attempt.job
+        self._results.put(JobResult(job_id=job.job_id, url=job.url, ok=ok, value=value, error=error,
+                                    attempts=attempt.attempts, instance=str(target), latency=latency,
+                                    finished_at=time.time()))
+        with self._lock:
+            self._in_flight -= 1
+
+    def _requeue(self, attempt: _Attempt, target, error: str) -> None:
+        if attempt.attempts > self.retries:
+            self._done(attempt, target, False, error=f"{error} (after {attempt.attempts} attempts)")
+            return
+        self._retry.put(attempt)
+        with self._lock:
+            self._in_flight -= 1
+
+    def _fail_remaining(self, error: str) -> None:
+        while (attempt := self._take()) is not None:
+            self._done(attempt, "", False, error=error)
+
+    # ---- Instances ----
+
+    async def _run_instance(self, target) -> None:
+        failures = 0
+        while not self._finished():
+            try:
+                async with self.open_browser(target) as browser:
+                    failures = 0  # Connected: count the next failures from zero.
+                    context = browser.contexts[0] if browser.contexts else await browser.new_context()
+                    async with asyncio.TaskGroup() as group:
+                        for _ in range(self.pages_per_instance):
+                            group.create_task(self._run_page(browser, context, target))
+                return
+            except Exception:
+                failures += 1
+                if failures > self.reconnects:
+                    return
+                await asyncio.sleep(min(0.5 * 2 ** (failures - 1), 5.0))
+
+    async def _run_page(self, browser, context, target) -> None:
+        page = await context.new_page()
+        try:
+            while not self._finished():
+                attempt = self._take()
+                if attempt is None:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                page = await self._run_job(browser, context, page, attempt, target)
+        finally:
+            if not page.is_closed() and browser.is_connected():
+                await page.close()
+
+    async def _run_job(self, browser, context, page, attempt: _Attempt, target):
+        """Run one attempt. Return the page for the next one."""
+        job = attempt.job
+        attempt.attempts += 1
+        start = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(self._execute(page, job), job.timeout or self.timeout)
+        except asyncio.CancelledError:
+            # Another page worker found the instance dead.
+            attempt.attempts -= 1
+            self._retry.put(attempt)
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        except TimeoutError:
+            self._done(attempt, target, False, error=f"Timeout ({job.timeout or self.timeout} s)",
+                       latency=time.perf_counter() - start)
+            return await self._renew(context, page)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if not browser.is_connected():
+                self._requeue(attempt, target, error)
+                raise _InstanceDied(error) from e
+            if page.is_closed():  # Crashed.
+                self._requeue(attempt, target, error)
+                return await context.new_page()
+            self._done(attempt, target, False, error=error, latency=time.perf_counter() - start)
+            return page
+        self._done(attempt, target, True, value=value, latency=time.perf_counter() - start)
+        return page
+
+    async def _execute(self, page, job: Job) -> Any:
+        if job.url is not None:
+            await page.goto(job.url)
+        return await (job.func or _default_func)(page, job)
+
+    async def _renew(self, context, page):
+        if not page.is_closed():
+            try:
+                await page.close()
+            except Exception:
+                pass
+        return await context.new_page()
+
+
+def run_jobs(
+    jobs: Iterable[Job | str],
+    instances: Sequence[BrowserInfo | str | None] | int = 1,
+    pages_per_instance: int = 1,
+    **kwargs,
+) -> Iterator[JobResult]:
+    """Shortcut of `JobRunner(...).run(jobs)`."""
+    return JobRunner(instances, pages_per_instance, **kwargs).run(jobs)
+
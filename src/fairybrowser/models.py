@@ -2,6 +2,9 @@ from pydantic import BaseModel
 from enum import Enum
 
 
+LOCAL_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+
+
 class BrowserTypeEnum(str, Enum):
     CHROMIUM = "chromium"
     EDGE = "edge"
@@ -14,6 +17,7 @@ class BrowserInfo(BaseModel, frozen=True):
     name: str = "default_fairy"
     type: BrowserTypeEnum = BrowserTypeEnum.CHROMIUM
     run_args: str | list[str] | None = None
+    block_presets: tuple[str, ...] = ()  # Presets of `devtools.blockers`, applied by `sync_page` / `sync_browser`.
 
     def __hash__(self):
         return hash((self.name, self.type))
@@ -28,4 +32,41 @@ class ExecutionState(BaseModel, frozen=True):
     name: str
     type: BrowserTypeEnum
     port: int
+    pid: int  # 0 for the remote instances (unknown).
+    host: str = "127.0.0.1"
+
+    @property
+    def is_local(self) -> bool:
+        return self.host in LOCAL_HOSTS
+
+    @property
+    def endpoint(self) -> str:
+        """For `connect_over_cdp`."""
+        return f"http://{self.host}:{self.port}"
+
+
+class Lease(BaseModel, frozen=True):
+    """An instance lent by the supervisor (`fairybrowser.supervisors`)."""
+
+    lease_id: str
+    name: str
+    type: BrowserTypeEnum
+    host: str
+    port: int
     pid: int
+    endpoint: str  # For `connect_over_cdp`.
+    ws_endpoint: str | None = None  # `webSocketDebuggerUrl`, which skips the HTTP lookup of `connect_over_cdp`.
+    exclusive: bool = False
+
+    @property
+    def is_local(self) -> bool:
+        return self.host in LOCAL_HOSTS
+
+
+class InstanceStatus(BaseModel, frozen=True):
+    state: ExecutionState
+    leases: int
+    exclusive: bool
+    started_at: float  # Wall time when the supervisor launched or adopted the instance.
+    rss: int | None = None  # Bytes of the process tree (local instances), at the last health check.
+    latency: float | None = None  # Seconds of `GET /json/version`, at the last health check.
@@ -3,7 +3,7 @@ import psutil
 
 
 from fairybrowser.models import BrowserInfo, ExecutionState, BrowserTypeEnum
-from fairybrowser.port_utils import is_port_free
+from fairybrowser.port_utils import is_port_free, can_connect_port
 
 
 _this_folder = Path(__file__).absolute().parent
@@ -30,6 +30,33 @@ def load_state(info: BrowserInfo) -> ExecutionState:
     return ExecutionState.model_validate_json(path.read_text())
 
 
+def register_remote(
+    name: str,
+    host: str,
+    port: int,
+    type: BrowserTypeEnum = BrowserTypeEnum.CHROMIUM,
+) -> ExecutionState:
+    """Register a browser on another host, started with `--remote-debugging-port`.
+
+    The remote states are kept while they are unreachable; remove them with `unregister`.
+    """
+    state = ExecutionState(name=name, type=type, port=port, pid=0, host=host)
+    save_state(state)
+    return state
+
+
+def unregister(info: BrowserInfo | str) -> None:
+    info = to_browser_info(info)
+    _to_json_path(info.name, info.type).unlink(missing_ok=True)
+
+
+def is_alive(state: ExecutionState) -> bool:
+    """Local: the process is alive and listens on the port. Remote: the port is reachable."""
+    if state.is_local:
+        return is_pid_alive(state.pid) and (not is_port_free(state.port))
+    return can_connect_port(state.port, state.host)
+
+
 def is_existent(info: BrowserInfo) -> bool:
     path = _to_json_path(info.name, info.type)
     if not path.exists():
@@ -39,8 +66,8 @@ def is_existent(info: BrowserInfo) -> bool:
     except Exception:
         path.unlink()
         return False
-    result = is_pid_alive(model.pid) and (not is_port_free(model.port))
-    if not result:
+    result = is_alive(model)
+    if not result and model.is_local:
         path.unlink()
     return result
 
@@ -53,9 +80,9 @@ def get_execution_infos() -> dict[BrowserInfo, ExecutionState]:
         type_enum = BrowserTypeEnum(type)  # More thorough check is desired.
         info = BrowserInfo(name=name, type=type_enum)
         model = ExecutionState.model_validate_json(path.read_text())
-        if is_pid_alive(model.pid) and (not is_port_free(model.port)):
+        if is_alive(model):
             result[info] = model
-        else:
+        elif model.is_local:
             path.unlink()
     return result
 
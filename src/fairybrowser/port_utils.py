@@ -33,15 +33,13 @@ def is_port_free(port: int, host: str = "127.0.0.1") -> bool:
             return False
 
 
-def can_connect_port(port: int, host: str = "127.0.0.1") -> bool:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.settimeout(0.5)
-        try:
-            s.connect((host, port))
+def can_connect_port(port: int, host: str = "127.0.0.1", timeout: float = 0.5) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
             return True  # 接続成功
-        except (ConnectionRefusedError, socket.timeout):
-            return False
-    return False
+    except OSError:
+        # 拒否・タイムアウト・名前解決の失敗 (リモートホスト) など
+        return False
 
 
 def find_available_port(
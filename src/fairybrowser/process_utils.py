@@ -3,10 +3,13 @@ import psutil
 import time
 import ctypes
 import ctypes.wintypes
-import win32gui
-import win32con
-import win32process
-import pywintypes
+import sys
+
+if sys.platform == "win32":
+    import win32gui
+    import win32con
+    import win32process
+    import pywintypes
 
 import ctypes
 import time
@@ -0,0 +1,469 @@
+"""CDP multiplexing proxy: many clients share one browser websocket.
+
+`CdpProxy` holds one upstream websocket per instance and accepts any number
+of downstream CDP clients (Playwright `connect_over_cdp`, raw websockets).
+Requires `websockets` (`fairybrowser[proxy]`).
+
+```python
+proxy = CdpProxy("http://127.0.0.1:13456").start()
+with websockets.sync.client.connect(proxy.ws_endpoint) as ws:  # A raw CDP client.
+    ws.send(json.dumps({"id": 1, "method": "Browser.getVersion"}))
+print(proxy.stats())  # or GET {proxy.endpoint}/json/proxy/stats
+proxy.stop()
+```
+
+Playwright `connect_over_cdp(proxy.endpoint)` is not covered by the tests.
+
+Routing:
+* Commands get a new upstream id; the reply is sent back to the client with its own id.
+* A session (`sessionId`) belongs to the clients which attached it: the
+  `Target.attachedToTarget` of a `Target.attachToTarget` goes to the client which
+  sent it, the other ones to the clients of `Target.setAutoAttach`.
+  Commands on the sessions of the other clients are refused.
+* Events are delivered to the owners of their session (all the clients for the
+  browser-level events), filtered by the subscriptions of each client: the domains
+  it enabled (`Network.enable` -> `Network.*`), `Target.*`, `Inspector.*`, and the
+  patterns given by the proxy command `Proxy.subscribe {"patterns": [...]}`
+  (`Proxy.unsubscribe`, `Proxy.getStats` as well).
+* Only the first `Target.setAutoAttach` goes upstream; a later client gets the
+  existing pages attached for it (the events before the reply, as Chromium does),
+  and shares the auto-attached ones afterwards.
+* A slow client loses events (not replies) beyond `max_queue`.
+"""
+
+import asyncio
+import json
+import math
+import re
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Any
+
+from pydantic import BaseModel
+
+try:
+    from websockets.asyncio.client import connect
+    from websockets.asyncio.server import serve
+    from websockets.exceptions import ConnectionClosed
+except ImportError as e:
+    raise ImportError("`websockets` is required for the CDP proxy: `pip install fairybrowser[proxy]`.") from e
+
+
+DEFAULT_SUBSCRIPTIONS = frozenset({"Target.*", "Inspector.*"})
+_REPLY_PREFIX = re.compile(r'\{"id":(\d+),')  # Chromium writes the id first.
+
+
+class ProxyClientStats(BaseModel, frozen=True):
+    client_id: int
+    peer: str
+    connected_for: float  # Seconds.
+    messages_in: int  # From the client.
+    messages_out: int  # To the client (replies and events).
+    bytes_in: int
+    bytes_out: int
+    rate_in: float  # Messages / second, exponentially weighted over `rate_window`.
+    rate_out: float
+    events_filtered: int  # Not subscribed.
+    events_dropped: int  # The queue of the client was full.
+    sessions: int
+    subscriptions: list[str]
+
+
+def resolve_ws_endpoint(endpoint: str, timeout: float = 5.0) -> str:
+    """"http://host:port" -> `webSocketDebuggerUrl` of the browser. ws:// URLs are returned as is."""
+    if endpoint.startswith(("ws://", "wss://")):
+        return endpoint
+    with urllib.request.urlopen(endpoint.rstrip("/") + "/json/version", timeout=timeout) as response:
+        return json.loads(response.read())["webSocketDebuggerUrl"]
+
+
+def matches(method: str, patterns: set[str] | frozenset[str]) -> bool:
+    """`patterns`: "Domain.event", "Domain.*" or "*"."""
+    if method in patterns or "*" in patterns:
+        return True
+    return method.split(".", 1)[0] + ".*" in patterns
+
+
+class _Rate:
+    """Exponentially weighted events / second."""
+
+    __slots__ = ("window", "value", "last")
+
+    def __init__(self, window: float):
+        self.window = window
+        self.value = 0.0
+        self.last = time.monotonic()
+
+    def get(self, now: float) -> float:
+        return self.value * math.exp(-(now - self.last) / self.window)
+
+    def add(self, now: float) -> None:
+        self.value = self.get(now) + 1.0 / self.window
+        self.last = now
+
+
+@dataclass
+class _Client:
+    client_id: int
+    connection: Any
+    peer: str
+    rate_window: float
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    subscriptions: set[str] = field(default_factory=lambda: set(DEFAULT_SUBSCRIPTIONS))
+    sessions: set[str] = field(default_factory=set)
+    auto_attach: bool = False
+    connected_at: float = field(default_factory=time.monotonic)
+    messages_in: int = 0
+    messages_out: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    events_filtered: int = 0
+    events_dropped: int = 0
+
+    def __post_init__(self):
+        self.rate_in = _Rate(self.rate_window)
+        self.rate_out = _Rate(self.rate_window)
+
+    def stats(self) -> ProxyClientStats:
+        now = time.monotonic()
+        return ProxyClientStats(
+            client_id=self.client_id, peer=self.peer, connected_for=now - self.connected_at,
+            messages_in=self.messages_in, messages_out=self.messages_out,
+            bytes_in=self.bytes_in, bytes_out=self.bytes_out,
+            rate_in=self.rate_in.get(now), rate_out=self.rate_out.get(now),
+            events_filtered=self.events_filtered, events_dropped=self.events_dropped,
+            sessions=len(self.sessions), subscriptions=sorted(self.subscriptions),
+        )
+
+
+class CdpProxy:
+    def __init__(
+        self,
+        upstream: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_queue: int = 10000,
+        rate_window: float = 10.0,
+    ):
+        """
+        upstream: "http://host:port" of the browser, or its websocket URL.
+        port: 0 picks a free port (see `endpoint` after `start`).
+        max_queue: events queued per client before they are dropped.
+        rate_window: seconds of the message rates in the stats.
+        """
+        self.upstream = upstream
+        self.host = host
+        self.port = port
+        self.max_queue = max_queue
+        self.rate_window = rate_window
+        self._clients: dict[int, _Client] = {}
+        self._next_client_id = 0
+        self._next_id = 0
+        # Upstream id -> (client, client id, method, target id of `Target.attachToTarget`)
+        self._pending: dict[int, tuple[_Client | None, Any, str, str | None]] = {}
+        self._internal: dict[int, asyncio.Future] = {}
+        # `Target.attachToTarget` in flight: target id -> the clients waiting for its `Target.attachedToTarget`.
+        self._attaching: dict[str, list[_Client]] = {}
+        self._upstream_auto_attach = False
+        self._upstream = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._stop: asyncio.Event | None = None
+        self._ready = threading.Event()
+        self._error: BaseException | None = None
+
+    @property
+    def endpoint(self) -> str:
+        """For `connect_over_cdp`."""
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_endpoint(self) -> str:
+        return f"ws://{self.host}:{self.port}/devtools/browser/fairybrowser-proxy"
+
+    # ---- Lifecycle ----
+
+    def start(self, timeout: float = 10.0) -> "CdpProxy":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"The proxy did not start within {timeout} seconds.")
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def _run(self) -> None:
+        try:
+            asyncio.run(self.serve())
+        except BaseException:
+            if self._error is None:
+                raise
+            # Failed to start: raised by `start`.
+
+    def stop(self) -> None:
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(10)
+
+    def stats(self) -> list[ProxyClientStats]:
+        return [client.stats() for client in list(self._clients.values())]
+
+    async def serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        try:
+            ws_url = await asyncio.to_thread(resolve_ws_endpoint, self.upstream)
+            self._upstream = await connect(ws_url, max_size=None, ping_interval=None, compression=None)
+            server = await serve(self._on_client, self.host, self.port, process_request=self._on_http,
+                                 max_size=None, ping_interval=None, compression=None)
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            raise
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        reader = asyncio.create_task(self._read_upstream())
+        async with server:
+            await asyncio.wait([reader, asyncio.create_task(self._stop.wait())], return_when=asyncio.FIRST_COMPLETED)
+        reader.cancel()
+        await self._upstream.close()
+
+    # ---- Downstream ----
+
+    def _on_http(self, connection, request):
+        path = request.path.split("?", 1)[0].rstrip("/")
+        if not path.startswith("/json"):
+            return None  # Websocket handshake.
+        if path == "/json/version":
+            body = {"Browser": "fairybrowser-proxy", "Protocol-Version": "1.3", "webSocketDebuggerUrl": self.ws_endpoint}
+        elif path == "/json/proxy/stats":
+            body = [elem.model_dump() for elem in self.stats()]
+        else:
+            return connection.respond(404, "Not found\n")
+        response = connection.respond(200, json.dumps(body))
+        del response.headers["Content-Type"]
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+    async def _on_client(self, connection) -> None:
+        self._next_client_id += 1
+        client = _Client(self._next_client_id, connection, str(connection.remote_address), self.rate_window)
+        self._clients[client.client_id] = client
+        sender = asyncio.create_task(self._send_loop(client))
+        try:
+            async for raw in connection:
+                client.messages_in += 1
+                client.bytes_in += len(raw)
+                client.rate_in.add(time.monotonic())
+                await self._on_command(client, json.loads(raw))
+        except ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            await self._forget(client)
+
+    async def _send_loop(self, client: _Client) -> None:
+        try:
+            while True:
+                raw = await client.queue.get()
+                await client.connection.send(raw)
+                client.messages_out += 1
+                client.bytes_out += len(raw)
+                client.rate_out.add(time.monotonic())
+        except ConnectionClosed:
+            pass
+
+    def _deliver(self, client: _Client, raw: str, is_event: bool) -> None:
+        if is_event and client.queue.qsize() >= self.max_queue:
+            client.events_dropped += 1
+            return
+        client.queue.put_nowait(raw)
+
+    def _reply(self, client: _Client, message_id: Any, result: dict | None = None, error: str | None = None) -> None:
+        message = {"id": message_id, "error": {"code": -32000, "message": error}} if error else {"id": message_id, "result": result or {}}
+        self._deliver(client, json.dumps(message), is_event=False)
+
+    async def _on_command(self, client: _Client, message: dict) -> None:
+        message_id, method = message.get("id"), message.get("method", "")
+        params = message.get("params") or {}
+        session_id = message.get("sessionId")
+        if method.startswith("Proxy."):
+            self._on_proxy_command(client, message_id, method, params)
+            return
+        if session_id is not None and session_id not in client.sessions:
+            self._reply(client, message_id, error=f"Session {session_id} is not attached by this client.")
+            return
+        domain, _, command = method.partition(".")
+        if command == "enable":
+            client.subscriptions.add(domain + ".*")
+        elif command == "disable" and domain + ".*" not in DEFAULT_SUBSCRIPTIONS:
+            client.subscriptions.discard(domain + ".*")
+        if method == "Target.setAutoAttach" and session_id is None:
+            await self._on_auto_attach(client, message_id, message)
+            return
+        if method == "Target.attachToTarget" and session_id is None and "targetId" in params:
+            self._attaching.setdefault(params["targetId"], []).append(client)
+        await self._forward(client, message_id, message)
+
+    def _on_proxy_command(self, client: _Client, message_id: Any, method: str, params: dict) -> None:
+        if method == "Proxy.subscribe":
+            client.subscriptions.update(params.get("patterns", []))
+            self._reply(client, message_id, {"subscriptions": sorted(client.subscriptions)})
+        elif method == "Proxy.unsubscribe":
+            client.subscriptions.difference_update(params.get("patterns", []))
+            self._reply(client, message_id, {"subscriptions": sorted(client.subscriptions)})
+        elif method == "Proxy.getStats":
+            self._reply(client, message_id, {"clients": [elem.model_dump() for elem in self.stats()]})
+        else:
+            self._reply(client, message_id, error=f"Unknown proxy command: {method}")
+
+    async def _on_auto_attach(self, client: _Client, message_id: Any, message: dict) -> None:
+        enabled = bool((message.get("params") or {}).get("autoAttach"))
+        others = any(elem.auto_attach for elem in self._clients.values() if elem is not client)
+        client.auto_attach = enabled
+        if not others:
+            self._upstream_auto_attach = enabled
+            await self._forward(client, message_id, message)
+            return
+        # The upstream attaches automatically already; attach the existing pages for this client,
+        # whose `Target.attachedToTarget` precede the reply.
+        if enabled:
+            await self._attach_existing(client)
+        self._reply(client, message_id)
+
+    async def _attach_existing(self, client: _Client) -> None:
+        targets = (await self._call("Target.getTargets")).get("targetInfos", [])
+        for target in targets:
+            if target.get("type") != "page":
+                continue
+            self._attaching.setdefault(target["targetId"], []).append(client)
+            result = await self._call("Target.attachToTarget", {"targetId": target["targetId"], "flatten": True})
+            if result.get("sessionId") is None:
+                self._discard_attaching(target["targetId"], client)
+
+    async def _forward(self, client: _Client | None, message_id: Any, message: dict,
+                       future: asyncio.Future | None = None) -> None:
+        self._next_id += 1
+        upstream_id = self._next_id
+        if future is not None:
+            self._internal[upstream_id] = future
+        else:
+            self._pending[upstream_id] = (client, message_id, message.get("method", ""),
+                                          (message.get("params") or {}).get("targetId"))
+        await self._upstream.send(json.dumps({**message, "id": upstream_id}))
+
+    def _discard_attaching(self, target_id: str, client: _Client) -> None:
+        waiting = self._attaching.get(target_id, [])
+        if client in waiting:
+            waiting.remove(client)
+        if not waiting:
+            self._attaching.pop(target_id, None)
+
+    async def _call(self, method: str, params: dict | None = None, session_id: str | None = None) -> dict:
+        """A command of the proxy itself."""
+        message = {"method": method, "params": params or {}}
+        if session_id is not None:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        await self._forward(None, None, message, future)
+        response = await future
+        if "error" in response:
+            return {}
+        return response.get("result", {})
+
+    async def _forget(self, client: _Client) -> None:
+        self._clients.pop(client.client_id, None)
+        for target_id in [key for key, value in self._attaching.items() if client in value]:
+            self._discard_attaching(target_id, client)
+        owned = set().union(*(elem.sessions for elem in self._clients.values()))
+        for session_id in client.sessions - owned:
+            await self._send_quietly({"method": "Target.detachFromTarget", "params": {"sessionId": session_id}})
+        if client.auto_attach and self._upstream_auto_attach and not any(elem.auto_attach for elem in self._clients.values()):
+            self._upstream_auto_attach = False
+            await self._send_quietly({"method": "Target.setAutoAttach",
+                                      "params": {"autoAttach": False, "waitForDebuggerOnStart": False}})
+
+    async def _send_quietly(self, message: dict) -> None:
+        try:
+            await self._forward(None, None, message)
+        except ConnectionClosed:
+            pass
+
+    # ---- Upstream ----
+
+    async def _read_upstream(self) -> None:
+        try:
+            async for raw in self._upstream:
+                if raw.startswith('{"id":'):
+                    self._on_reply(raw)
+                else:
+                    self._on_event(raw)
+        except ConnectionClosed:
+            pass
+        # The browser is gone: close the clients too.
+        for client in list(self._clients.values()):
+            await client.connection.close()
+
+    def _on_reply(self, raw: str) -> None:
+        prefix = _REPLY_PREFIX.match(raw)
+        if prefix is None:
+            message = json.loads(raw)
+            upstream_id, body = message["id"], None
+        else:
+            upstream_id, body = int(prefix.group(1)), raw[prefix.end():]
+        if upstream_id in self._internal:
+            self._internal.pop(upstream_id).set_result(json.loads(raw))
+            return
+        client, message_id, method, target_id = self._pending.pop(upstream_id, (None, None, "", None))
+        if client is None or client.client_id not in self._clients:
+            return
+        if method == "Target.attachToTarget":
+            session_id = json.loads(raw).get("result", {}).get("sessionId")
+            if session_id is not None:
+                client.sessions.add(session_id)
+            else:  # Failed: no `Target.attachedToTarget` will come.
+                self._discard_attaching(target_id, client)
+        if body is not None:
+            raw = '{"id":' + json.dumps(message_id) + "," + body
+        else:
+            raw = json.dumps({**json.loads(raw), "id": message_id})
+        self._deliver(client, raw, is_event=False)
+
+    def _on_event(self, raw: str) -> None:
+        message = json.loads(raw)
+        method = message.get("method", "")
+        session_id = message.get("sessionId")
+        if session_id is None:
+            recipients = list(self._clients.values())
+        else:
+            recipients = [elem for elem in self._clients.values() if session_id in elem.sessions]
+
+        if method == "Target.attachedToTarget":
+            # The owners of the new session: the client which attached the target,
+            # otherwise the clients which asked for the auto-attach.
+            new_session = message["params"]["sessionId"]
+            if session_id is None:
+                target_id = message["params"].get("targetInfo", {}).get("targetId")
+                waiting = self._attaching.get(target_id)
+                if waiting:
+                    requester = waiting.pop(0)
+                    if not waiting:
+                        del self._attaching[target_id]
+                    recipients = [requester] if requester.client_id in self._clients else []
+                else:
+                    recipients = [elem for elem in recipients if elem.auto_attach]
+            for client in recipients:
+                client.sessions.add(new_session)
+        elif method == "Target.detachedFromTarget":
+            for client in recipients:
+                client.sessions.discard(message["params"].get("sessionId"))
+
+        for client in recipients:
+            if matches(method, client.subscriptions):
+                self._deliver(client, raw, is_event=True)
+            else:
+                client.events_filtered += 1
@@ -1,4 +1,7 @@
+import sys
+import threading
 import time
+from collections import Counter
 from typing import Iterator
 from fairybrowser.models import BrowserInfo, BrowserTypeEnum, ExecutionState
 from fairybrowser.monitors import (
@@ -9,10 +12,12 @@ from fairybrowser.monitors import (
     to_browser_info,
     get_pid,
 )
+from fairybrowser.fleets import SelectionPolicy, select_states
 from fairybrowser.port_utils import find_available_port, can_connect_port
 from fairybrowser.utils import get_page
+from fairybrowser.devtools.blockers import block_resources
 from contextlib import contextmanager
-from playwright.sync_api import sync_playwright, Browser
+from playwright.sync_api import sync_playwright, Browser, Error as PlaywrightError
 from playwright.sync_api import Playwright, Page
 
 import subprocess
@@ -85,51 +90,110 @@ def _run_chromium(info: BrowserInfo) -> ExecutionState:
     return execution_info
 
 
-def _to_apt_execution_state(browser_info: BrowserInfo | str | None = None) -> ExecutionState:
-    execs = get_execution_infos()
+# The instances used by `sync_page` / `sync_browser` of this process, for the selection.
+_leases: Counter[BrowserInfo] = Counter()
+_leases_lock = threading.Lock()
+selection_policy = SelectionPolicy()
+
+
+def _to_apt_execution_states(browser_info: BrowserInfo | str | None = None) -> list[ExecutionState]:
+    """The candidates, the best first."""
     if browser_info is not None:
         browser_info = to_browser_info(browser_info)
         if is_existent(browser_info):
-            state = load_state(browser_info)
-        else:
-            state = _run(browser_info)
-    else:
-        # If not specified, we would like to acquire the one of active ones.
-        execs = get_execution_infos()
-        if not execs:
-            state = _run(info=None)
-        else:
-            state = list(execs.values())[0]
-    return state
+            return [load_state(browser_info)]
+        remote = _load_remote_state(browser_info)
+        if remote is not None:
+            raise ConnectionError(f"The remote instance `{browser_info.name}` ({remote.endpoint}) is unreachable.")
+        return [_run(browser_info)]
+    # If not specified, the least loaded of the active ones (`selection_policy`).
+    with _leases_lock:
+        leases = dict(_leases)
+    states = select_states(get_execution_infos().values(), leases, selection_policy)
+    return states or [_run(info=None)]
+
+
+def _load_remote_state(info: BrowserInfo) -> ExecutionState | None:
+    try:
+        state = load_state(info)
+    except (OSError, ValueError):
+        return None
+    return None if state.is_local else state
+
+
+def _to_apt_execution_state(browser_info: BrowserInfo | str | None = None) -> ExecutionState:
+    return _to_apt_execution_states(browser_info)[0]
+
+
+def _connect(playwright: Playwright, info: BrowserInfo | str | None) -> tuple[ExecutionState, Browser]:
+    """Connect to the best candidate, falling over to the next ones."""
+    errors = []
+    for state in _to_apt_execution_states(info):
+        try:
+            return state, _fetch_browser(playwright, state.port, state.type, state.host)
+        except PlaywrightError as e:
+            errors.append(f"{state.name} ({state.endpoint}): {e}")  # e.g. died after the selection.
+    raise ConnectionError("Cannot connect to any instance.\n" + "\n".join(errors))
+
+
+@contextmanager
+def _lease(state: ExecutionState) -> Iterator[None]:
+    info = BrowserInfo(name=state.name, type=state.type)
+    with _leases_lock:
+        _leases[info] += 1
+    try:
+        yield
+    finally:
+        with _leases_lock:
+            _leases[info] -= 1
+            if _leases[info] <= 0:
+                del _leases[info]
 
 
 @contextmanager
 def sync_browser(info: BrowserInfo | str | None = None) -> Iterator[Browser]:
     """Get `playwright.sync_api.Browser with the context."""
-    state = _to_apt_execution_state(info)
     with sync_playwright() as playwright:
-        browser = _fetch_browser(playwright, state.port, state.type)
-        yield browser
+        state, browser = _connect(playwright, info)
+        presets = _to_block_presets(info)
+        if presets:
+            for context in browser.contexts:
+                block_resources(context, *presets)
+        with _lease(state):
+            yield browser
 
 
 @contextmanager
 def sync_page(browser_info: BrowserInfo | str | None = None) -> Iterator[Page]:
     """Acquire the `page`, based on the given information."""
-    state = _to_apt_execution_state(browser_info)
     with sync_playwright() as playwright:
-        browser = _fetch_browser(playwright, port=state.port, type=state.type)
-        page = get_page(browser, state.pid)
-        if page is not None:
+        state, browser = _connect(playwright, browser_info)
+        page = _pick_page(browser, state.pid, state.is_local)
+        presets = _to_block_presets(browser_info)
+        if presets:
+            block_resources(page, *presets)
+        with _lease(state):
             yield page
-        else:
-            print("Cannot identify the appropriate `page`.", flush=True)
-            print("Fallback is applied.", flush=True)
-            yield browser.new_page()
 
 
-def _fetch_browser(playwright: Playwright, port: int, type: str) -> Browser:
+def _pick_page(browser: Browser, pid: int, is_local: bool) -> Page:
+    """The visible window of the local instance on Windows, else the first page (or a new one)."""
+    page = get_page(browser, pid) if is_local and sys.platform == "win32" else None
+    if page is None:
+        pages = [page for context in browser.contexts for page in context.pages]
+        page = pages[0] if pages else browser.new_page()
+    return page
+
+
+def _to_block_presets(info: BrowserInfo | str | None) -> tuple[str, ...]:
+    if isinstance(info, BrowserInfo):
+        return info.block_presets
+    return ()
+
+
+def _fetch_browser(playwright: Playwright, port: int, type: str, host: str = "localhost") -> Browser:
     assert type in {BrowserTypeEnum.CHROMIUM, BrowserTypeEnum.EDGE}
-    address = f"http://localhost:{port}"
+    address = f"http://{host}:{port}"
     browser = playwright.chromium.connect_over_cdp(address)
     return browser
 
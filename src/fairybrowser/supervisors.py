@@ -0,0 +1,385 @@
+"""Long-lived supervisor which owns the browser instances and lends them.
+
+`sync_page` scans the state files, may launch a browser, starts a Playwright
+driver and connects on every call. The supervisor keeps the instances, their
+state and their health in one process, and answers over a local socket
+(a Unix socket, or `host:port` TCP where Unix sockets are unavailable), so a
+short-lived script receives a ready CDP endpoint with one round trip.
+
+    fairybrowser serve            # or `Supervisor().serve_forever()`
+
+The protocol is JSON lines: one request `{"op": ..., ...}` per line, one
+response `{"ok": true, ...}` / `{"ok": false, "error": ...}` per line.
+
+* `lease` (`info`: `BrowserInfo` fields or null, `exclusive`): launch if needed, return a `Lease`.
+* `release` (`lease_id`)
+* `status`: the `InstanceStatus` of every instance.
+* `register` (`name`, `host`, `port`, `type`): manage a remote instance (`monitors.register_remote`).
+* `ping`, `shutdown` (`stop_instances`)
+
+Without a name, `lease` picks the best instance by `policy` (`fleets.SelectionPolicy`:
+leases, RSS and latency, measured at every health check), and falls over to the
+next one when a remote instance is unreachable.
+
+The leases of a connection are released when it is closed, so a crashed script
+does not hold an instance. See `fairybrowser.clients` for the client side.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import urllib.request
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import psutil
+
+from fairybrowser.fleets import InstanceLoad, SelectionPolicy, measure_load
+from fairybrowser.models import BrowserInfo, BrowserTypeEnum, ExecutionState, InstanceStatus, Lease
+from fairybrowser.monitors import get_execution_infos, is_alive, register_remote, to_browser_info
+
+
+DEFAULT_SOCKET_PATH = Path.home() / ".config/fairybrowser/supervisor.sock"
+DEFAULT_TCP_ADDRESS = "127.0.0.1:13399"  # Where `socket.AF_UNIX` is unavailable (Windows).
+
+
+class SupervisorError(RuntimeError):
+    """The supervisor refused or failed a request."""
+
+
+class _Unreachable(SupervisorError):
+    pass
+
+
+def default_address() -> str:
+    """`FAIRYBROWSER_SOCKET` if set, otherwise the default Unix socket (or TCP address)."""
+    if address := os.environ.get("FAIRYBROWSER_SOCKET"):
+        return address
+    return str(DEFAULT_SOCKET_PATH) if hasattr(socket, "AF_UNIX") else DEFAULT_TCP_ADDRESS
+
+
+def parse_address(address: str | Path) -> tuple[int, Any]:
+    """"host:port" -> TCP, otherwise a Unix socket path. Return (family, address)."""
+    text = str(address)
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit() and "/" not in text and "\\" not in text:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, text
+
+
+def _fetch_ws_endpoint(state: ExecutionState, timeout: float = 1.0) -> str | None:
+    try:
+        with urllib.request.urlopen(state.endpoint + "/json/version", timeout=timeout) as response:
+            return json.loads(response.read()).get("webSocketDebuggerUrl")
+    except (OSError, ValueError):
+        return None
+
+
+def _terminate(state: ExecutionState) -> None:
+    try:
+        process = psutil.Process(state.pid)
+        for child in process.children(recursive=True):
+            child.kill()
+        process.kill()
+    except psutil.Error:
+        pass
+
+
+def _launch(info: BrowserInfo) -> ExecutionState:
+    from fairybrowser.runners import _run  # Playwright is needed only for the launch.
+
+    return _run(info)
+
+
+@dataclass
+class _Instance:
+    state: ExecutionState
+    ws_endpoint: str | None = None
+    leases: set[str] = field(default_factory=set)
+    exclusive: bool = False
+    started_at: float = field(default_factory=time.time)
+    rss: int | None = None  # The last measurement of `fleets.measure_load`.
+    latency: float | None = None
+
+
+class Supervisor:
+    def __init__(
+        self,
+        address: str | Path | None = None,
+        health_interval: float = 2.0,
+        launcher: Callable[[BrowserInfo], ExecutionState] = _launch,
+        is_healthy: Callable[[ExecutionState], bool] = is_alive,
+        adopt: bool = True,
+        policy: SelectionPolicy | None = None,
+    ):
+        """
+        address: Unix socket path or "host:port". Default `default_address()`.
+        health_interval: seconds between the health checks of the instances.
+        launcher: starts an instance (default `runners._run`).
+        adopt: if True, the instances already running (`monitors`) are managed too.
+        policy: the selection of the instance when `lease` is given no name.
+        """
+        self.address = str(address or default_address())
+        self.health_interval = health_interval
+        self.launcher = launcher
+        self.is_healthy = is_healthy
+        self.policy = policy or SelectionPolicy()
+        self.instances: dict[BrowserInfo, _Instance] = {}
+        self.leases: dict[str, BrowserInfo] = {}
+        self._lock = threading.RLock()
+        self._launch_locks: dict[BrowserInfo, threading.Lock] = {}
+        self._stopped = threading.Event()
+        self._server: socketserver.BaseServer | None = None
+        # `shutdown` (in a handler thread) and `serve_forever` both close the server.
+        self._server_lock = threading.Lock()
+        if adopt:
+            for info, state in get_execution_infos().items():
+                self.instances[info] = self._new_instance(state)
+
+    # ---- Leases ----
+
+    def lease(self, info: BrowserInfo | str | None = None, exclusive: bool = False) -> Lease:
+        """Lend an instance. Without `info`, the best one by `policy` (or a new local one)."""
+        if info is not None:
+            return self._lease(to_browser_info(info), exclusive)
+        unreachable: set[BrowserInfo] = set()
+        while True:
+            with self._lock:
+                info = self._select(exclusive, unreachable)
+            try:
+                return self._lease(info, exclusive)
+            except _Unreachable:
+                unreachable.add(info)  # Failover to the next one.
+
+    def _lease(self, info: BrowserInfo, exclusive: bool) -> Lease:
+        with self._lock:
+            launch_lock = self._launch_locks.setdefault(info, threading.Lock())
+        # Only the requests for the same instance wait for its launch.
+        with launch_lock:
+            with self._lock:
+                instance = self.instances.get(info)
+            if instance is None or not self.is_healthy(instance.state):
+                if instance is not None and not instance.state.is_local:
+                    with self._lock:
+                        self.instances.pop(info, None)
+                    raise _Unreachable(f"`{info.name}` ({instance.state.endpoint}) is unreachable.")
+                state = self.launcher(info)
+                instance = self._new_instance(state)
+                with self._lock:
+                    self.instances[info] = instance
+            with self._lock:
+                if instance.exclusive or (exclusive and instance.leases):
+                    raise SupervisorError(f"`{info.name}` ({info.type}) is leased exclusively.")
+                lease_id = uuid.uuid4().hex
+                instance.leases.add(lease_id)
+                instance.exclusive = exclusive
+                self.leases[lease_id] = info
+        state = instance.state
+        return Lease(lease_id=lease_id, name=state.name, type=state.type, host=state.host, port=state.port,
+                     pid=state.pid, endpoint=state.endpoint, ws_endpoint=instance.ws_endpoint, exclusive=exclusive)
+
+    def _new_instance(self, state: ExecutionState) -> _Instance:
+        instance = _Instance(state, _fetch_ws_endpoint(state))
+        self._update_load(instance)
+        return instance
+
+    def _select(self, exclusive: bool, excluded: set[BrowserInfo] = frozenset()) -> BrowserInfo:
+        candidates = {info: instance for info, instance in self.instances.items()
+                      if info not in excluded and not instance.exclusive and not (exclusive and instance.leases)}
+        # Unreachable at the last measurement: still a candidate (it may be back), but ranked low.
+        loads = [InstanceLoad(state=instance.state, leases=len(instance.leases), rss=instance.rss,
+                              latency=instance.latency if instance.latency is not None else 1.0)
+                 for instance in candidates.values()]
+        ranked = self.policy.rank(loads)
+        if ranked:
+            return BrowserInfo(name=ranked[0].state.name, type=ranked[0].state.type)
+        default = BrowserInfo()
+        if default not in self.instances:
+            return default
+        return BrowserInfo(name=f"{default.name}-{uuid.uuid4().hex[:8]}")
+
+    def release(self, lease_id: str) -> bool:
+        """False if `lease_id` is unknown (e.g. released already, or its instance died)."""
+        with self._lock:
+            info = self.leases.pop(lease_id, None)
+            instance = self.instances.get(info) if info is not None else None
+            if instance is None:
+                return False
+            instance.leases.discard(lease_id)
+            if not instance.leases:
+                instance.exclusive = False
+            return True
+
+    def status(self) -> list[InstanceStatus]:
+        with self._lock:
+            return [InstanceStatus(state=elem.state, leases=len(elem.leases), exclusive=elem.exclusive,
+                                   started_at=elem.started_at, rss=elem.rss, latency=elem.latency)
+                    for elem in self.instances.values()]
+
+    def register(self, name: str, host: str, port: int,
+                 type: BrowserTypeEnum = BrowserTypeEnum.CHROMIUM) -> ExecutionState:
+        """Manage a remote instance (also registered to `monitors`)."""
+        state = register_remote(name, host, port, type)
+        instance = self._new_instance(state)
+        with self._lock:
+            self.instances[BrowserInfo(name=name, type=type)] = instance
+        return state
+
+    # ---- Health ----
+
+    def _update_load(self, instance: _Instance) -> None:
+        load = measure_load(instance.state)
+        instance.rss, instance.latency = load.rss, load.latency
+
+    def check_health(self) -> list[BrowserInfo]:
+        """Forget the dead instances and their leases, and measure the load of the others.
+
+        Return the forgotten ones.
+        """
+        with self._lock:
+            items = list(self.instances.items())
+        dead = [info for info, instance in items if not self.is_healthy(instance.state)]
+        for info, instance in items:
+            if info not in dead:
+                self._update_load(instance)
+        forgotten = []
+        with self._lock:
+            for info, instance in items:
+                # `_lease` may have relaunched it since the snapshot: keep the new instance.
+                if info in dead and self.instances.get(info) is instance:
+                    del self.instances[info]
+                    for lease_id in instance.leases:
+                        self.leases.pop(lease_id, None)
+                    forgotten.append(info)
+        return forgotten
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.health_interval):
+            self.check_health()
+
+    # ---- Protocol ----
+
+    def handle(self, request: dict[str, Any], owned: set[str] | None = None) -> dict[str, Any]:
+        """Answer one request. `owned`: the leases of the connection, released when it closes."""
+        op = request.get("op")
+        if op == "lease":
+            raw_info = request.get("info")
+            info = BrowserInfo.model_validate(raw_info) if raw_info is not None else None
+            lease = self.lease(info, exclusive=bool(request.get("exclusive", False)))
+            if owned is not None:
+                owned.add(lease.lease_id)
+            return {"ok": True, "lease": lease.model_dump(mode="json")}
+        if op == "release":
+            lease_id = request["lease_id"]
+            if owned is not None:
+                owned.discard(lease_id)
+            return {"ok": True, "released": self.release(lease_id)}
+        if op == "status":
+            return {"ok": True, "instances": [elem.model_dump(mode="json") for elem in self.status()]}
+        if op == "register":
+            state = self.register(request["name"], request["host"], int(request["port"]),
+                                  BrowserTypeEnum(request.get("type", BrowserTypeEnum.CHROMIUM)))
+            return {"ok": True, "state": state.model_dump(mode="json")}
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "shutdown":
+            threading.Thread(target=self.shutdown, args=(bool(request.get("stop_instances", False)),)).start()
+            return {"ok": True}
+        raise SupervisorError(f"Unknown op: {op!r}")
+
+    # ---- Server ----
+
+    def _bind(self) -> socketserver.BaseServer:
+        family, address = parse_address(self.address)
+        if family == socket.AF_INET:
+            server = socketserver.ThreadingTCPServer(address, _Handler, bind_and_activate=False)
+            server.allow_reuse_address = True
+            server.server_bind()
+            server.server_activate()
+        else:
+            path = Path(address)
+            if path.exists():
+                if _can_connect(self.address):
+                    raise SupervisorError(f"A supervisor is running at {path}.")
+                path.unlink()  # Left by a crashed supervisor.
+            path.parent.mkdir(parents=True, exist_ok=True)
+            server = socketserver.ThreadingUnixStreamServer(address, _Handler)
+        server.daemon_threads = True
+        server.supervisor = self
+        return server
+
+    def start(self) -> "Supervisor":
+        """Serve in the background threads."""
+        self._server = self._bind()
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._watch, daemon=True).start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server = self._bind()
+        threading.Thread(target=self._watch, daemon=True).start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._close_server()
+
+    def shutdown(self, stop_instances: bool = False) -> None:
+        self._stopped.set()
+        with self._lock:
+            instances = list(self.instances.values())
+            if stop_instances:
+                self.instances.clear()
+                self.leases.clear()
+        if stop_instances:
+            for instance in instances:
+                _terminate(instance.state)
+        server = self._server
+        if server is not None:
+            server.shutdown()
+            self._close_server()
+
+    def _close_server(self) -> None:
+        with self._server_lock:
+            server, self._server = self._server, None
+        if server is None:
+            return
+        server.server_close()
+        family, address = parse_address(self.address)
+        if family != socket.AF_INET:
+            Path(address).unlink(missing_ok=True)
+
+
+def _can_connect(address: str | Path) -> bool:
+    family, target = parse_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(1.0)
+        try:
+            sock.connect(target)
+            return True
+        except OSError:
+            return False
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        supervisor: Supervisor = self.server.supervisor
+        owned: set[str] = set()
+        try:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    response = supervisor.handle(json.loads(line), owned)
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write((json.dumps(response) + "\n").encode())
+        except OSError:
+            pass  # The client went away.
+        finally:
+            for lease_id in owned:
+                supervisor.release(lease_id)
@@ -1,22 +1,263 @@
-"""Edit the `records` so that it can be  
+"""Edit the `records` so that it can be played.
+
+`to_play_script` turns a recorded stream (`streams.MouseEventBuffer`) into
+clicks (per button, with drags and multi-clicks) and simplified moves, with
+NumPy over the whole recording. The play events are plain dicts, as in the
+file of `write_play_script`.
 """
 
-from fairybrowser.windows.models import MouseEvent, MouseEventTypeEnum , MouseClickEvent
+import json
+from pathlib import Path
+
+import numpy as np
+
+from fairybrowser.windows.models import MouseEvent, MouseEventTypeEnum, MouseClickEvent, MousePlayEvent, to_play_event
+from fairybrowser.windows.streams import BUTTON_NAMES, EventKindEnum, MouseEventBuffer, to_button_code
 
 
 def to_click_events(events: list[MouseEvent]) -> list[MouseClickEvent]:
-    mouse_events = sorted(events, key=lambda event: event.time)
-    result = []
-    pressed_event = None
-    depressed_event = None
-    for i in range(len(mouse_events)):
-        if pressed_event is None:
-            if mouse_events[i].pressed:
-                pressed_event = mouse_events[i]
-                continue
-        else:
-            if not mouse_events[i].pressed:
-                depressed_event = mouse_events[i]
-                result.append(MouseClickEvent.from_mouse_button_events(pressed_event, depressed_event))
-                pressed_event, depressed_event = None, None
+    """Pair the presses and the releases of each button. See `pair_buttons`."""
+    buffer = MouseEventBuffer()
+    for event in events:
+        if event.type == MouseEventTypeEnum.BUTTON:
+            kind = EventKindEnum.PRESS if event.pressed else EventKindEnum.RELEASE
+            buffer.append(event.time, event.x, event.y, kind, to_button_code(event.button))
+    return [to_play_event(elem) for elem in to_play_script(buffer, with_moves=False)]
+
+
+# ---- Vectorised pipeline over `streams.MouseEventBuffer` ----
+
+
+def _sorted_columns(events: MouseEventBuffer | dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    columns = events.to_numpy() if isinstance(events, MouseEventBuffer) else events
+    order = np.argsort(columns["t"], kind="stable")
+    return {name: np.asarray(array)[order] for name, array in columns.items()}
+
+
+def pair_buttons(events: MouseEventBuffer | dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Pair each press with the release of the same button.
+
+    A press followed by another press of the same button (lost release) is dropped.
+    Return the columns `button`, `t0`, `t1`, `x0`, `y0`, `x1`, `y1`, sorted by `t0`.
+    """
+    columns = _sorted_columns(events)
+    kind = columns["kind"]
+    is_button = (kind == EventKindEnum.PRESS) | (kind == EventKindEnum.RELEASE)
+    rows = np.flatnonzero(is_button)
+    # Group by button, keeping the time order inside each button.
+    rows = rows[np.argsort(columns["value"][rows], kind="stable")]
+    buttons, kinds = columns["value"][rows], kind[rows]
+    pairs = np.flatnonzero(
+        (kinds[:-1] == EventKindEnum.PRESS) & (kinds[1:] == EventKindEnum.RELEASE) & (buttons[:-1] == buttons[1:])
+    )
+    press, release = rows[pairs], rows[pairs + 1]
+    order = np.argsort(columns["t"][press], kind="stable")
+    press, release = press[order], release[order]
+    return {
+        "button": columns["value"][press],
+        "t0": columns["t"][press],
+        "t1": columns["t"][release],
+        "x0": columns["x"][press].astype(np.float64),
+        "y0": columns["y"][press].astype(np.float64),
+        "x1": columns["x"][release].astype(np.float64),
+        "y1": columns["y"][release].astype(np.float64),
+    }
+
+
+def classify_clicks(
+    clicks: dict[str, np.ndarray],
+    drag_distance: float = 5.0,
+    double_click_interval: float = 0.5,
+    double_click_distance: float = 4.0,
+) -> dict[str, np.ndarray]:
+    """Add `drag` (bool) and `clicks` (1, 2, ... within a multi-click) to the result of `pair_buttons`."""
+    drag = np.hypot(clicks["x1"] - clicks["x0"], clicks["y1"] - clicks["y0"]) > drag_distance
+    n = len(drag)
+    continued = np.zeros(n, dtype=bool)
+    if n > 1:
+        continued[1:] = (
+            (clicks["button"][1:] == clicks["button"][:-1])
+            & ~drag[1:] & ~drag[:-1]
+            & (clicks["t0"][1:] - clicks["t1"][:-1] <= double_click_interval)
+            & (np.hypot(clicks["x0"][1:] - clicks["x0"][:-1], clicks["y0"][1:] - clicks["y0"][:-1]) <= double_click_distance)
+        )
+    # The position inside each run of the continued clicks.
+    run_starts = np.flatnonzero(~continued)
+    run_ids = np.cumsum(~continued) - 1
+    counts = np.arange(n) - run_starts[run_ids] + 1 if n else np.zeros(0, dtype=np.int64)
+    return {**clicks, "drag": drag, "clicks": counts}
+
+
+_CHUNK = 1024  # Points per RDP segment at most: bounds its levels (the chunk ends are kept).
+
+
+def _simplify_runs(x: np.ndarray, y: np.ndarray, starts: np.ndarray, ends: np.ndarray, tolerance: float) -> np.ndarray:
+    """Simplify the runs `starts[i]..ends[i]` (inclusive) at once. Return the mask of the kept points.
+
+    The points farther than `tolerance` from the chord of their neighbours (corners,
+    jitter beyond the tolerance) are kept; Ramer–Douglas–Peucker simplifies the
+    stretches between them, all the segments of a level together.
+    """
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    starts, ends = np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64)
+    if len(starts) == 0:
+        return keep
+    keep[starts] = keep[ends] = True
+    if n > 2:
+        depth = np.zeros(n + 1, dtype=np.int64)  # > 0 between the ends of a run.
+        np.add.at(depth, starts + 1, 1)
+        np.add.at(depth, ends, -1)
+        inside = np.cumsum(depth[:-1]) > 0
+        dx, dy = x[2:] - x[:-2], y[2:] - y[:-2]
+        cross = np.abs(dx * (y[1:-1] - y[:-2]) - dy * (x[1:-1] - x[:-2]))
+        keep[1:-1] |= inside[1:-1] & (cross > tolerance * np.hypot(dx, dy))
+    is_end = np.zeros(n, dtype=bool)
+    is_end[ends] = True
+    kept = np.flatnonzero(keep)
+    start, end = kept[:-1], kept[1:]
+    long = (end - start > _CHUNK) & ~is_end[start]
+    if long.any():
+        keep[np.concatenate([np.arange(a + _CHUNK, b, _CHUNK)
+                             for a, b in zip(start[long].tolist(), end[long].tolist())])] = True
+        kept = np.flatnonzero(keep)
+        start, end = kept[:-1], kept[1:]
+    # Between the consecutive kept points of a run.
+    segments = ~is_end[start]
+    start, end = start[segments], end[segments]
+    return _douglas_peucker(x, y, start, end, tolerance, keep)
+
+
+def _douglas_peucker(x: np.ndarray, y: np.ndarray, start: np.ndarray, end: np.ndarray, tolerance: float,
+                     keep: np.ndarray) -> np.ndarray:
+    """Ramer–Douglas–Peucker over the segments `start[i]..end[i]`, breadth first. Update and return `keep`."""
+    counts = np.maximum(end - start - 1, 0)
+    index = np.repeat(start + 1 - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+    px, py = x[index], y[index]
+    while len(index):
+        x0, y0 = x[start], y[start]
+        dx, dy = x[end] - x0, y[end] - y0
+        xs, ys = px - np.repeat(x0, counts), py - np.repeat(y0, counts)
+        # |cross| is the distance to the chord times its length: the same farthest point.
+        distances = np.abs(np.repeat(dx, counts) * ys - np.repeat(dy, counts) * xs)
+        scale = np.hypot(dx, dy)
+        loops = scale == 0  # Back at the start: the distance to the start point.
+        if loops.any():
+            on_loop = np.repeat(loops, counts)
+            distances[on_loop] = np.hypot(xs[on_loop], ys[on_loop])
+            scale[loops] = 1.0
+        present = counts > 0
+        maxima = np.zeros(len(start))
+        maxima[present] = np.maximum.reduceat(distances, (np.cumsum(counts) - counts)[present])
+        split = maxima > tolerance * scale
+        segment = np.repeat(np.arange(len(start)), counts)
+        farthest = np.flatnonzero((distances == maxima[segment]) & split[segment])
+        first = np.ones(len(farthest), dtype=bool)  # The first of the equally far points.
+        first[1:] = segment[farthest][1:] != segment[farthest][:-1]
+        farthest = farthest[first]
+        middle = np.zeros(len(start), dtype=np.int64)
+        middle[segment[farthest]] = index[farthest]
+        keep[index[farthest]] = True
+        # Each split segment -> (start, middle), (middle, end); the points of the others are done.
+        middle_of = middle[segment]
+        selected = np.flatnonzero(split[segment] & (index != middle_of))
+        left = np.bincount(segment[selected], weights=index[selected] < middle_of[selected],
+                           minlength=len(start))[split].astype(np.int64)
+        index, px, py = index[selected], px[selected], py[selected]
+        counts = np.stack([left, counts[split] - 1 - left], axis=1).ravel()
+        middle = middle[split]
+        start = np.stack([start[split], middle], axis=1).ravel()
+        end = np.stack([middle, end[split]], axis=1).ravel()
+    return keep
+
+
+def simplify_polyline(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """Return the mask of the kept points (the end points are always kept). See `_simplify_runs`.
+
+    Every dropped point is within `tolerance` of the segment between the kept points around it.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if len(x) == 0:
+        return np.zeros(0, dtype=bool)
+    return _simplify_runs(x, y, np.array([0]), np.array([len(x) - 1]), tolerance)
+
+
+def simplify_moves(events: MouseEventBuffer | dict[str, np.ndarray], tolerance: float = 1.0) -> dict[str, np.ndarray]:
+    """Drop the moves which do not change the trajectory beyond `tolerance` pixels.
+
+    Each run of consecutive moves is simplified separately, so the moves around the
+    button / scroll events are kept. The other events are kept as is.
+    """
+    columns = _sorted_columns(events)
+    is_move = columns["kind"] == EventKindEnum.MOVE
+    moves = np.flatnonzero(is_move)
+    if len(moves):
+        # Runs of the consecutive rows.
+        breaks = np.flatnonzero(np.diff(moves) != 1) + 1
+        starts, ends = moves[np.r_[0, breaks]], moves[np.r_[breaks - 1, len(moves) - 1]]
+        x, y = columns["x"].astype(np.float64), columns["y"].astype(np.float64)
+        keep = _simplify_runs(x, y, starts, ends, tolerance) | ~is_move
+    else:
+        keep = ~is_move
+    return {name: array[keep] for name, array in columns.items()}
+
+
+def to_play_script(
+    events: MouseEventBuffer | dict[str, np.ndarray],
+    tolerance: float = 1.0,
+    with_moves: bool = True,
+    **click_options,
+) -> list[dict]:
+    """Recorded stream -> play events (clicks with `button` / `clicks` / `drag`, and simplified moves), sorted by time.
+
+    The events are plain dicts in the format of `write_play_script` (the fields with
+    the default values omitted); `to_play_event` turns one into its model.
+    click_options: passed to `classify_clicks`.
+    """
+    clicks = classify_clicks(pair_buttons(events), **click_options)
+    click_events = [
+        {"type": "click", "x0": x0, "y0": y0, "x1": x1, "y1": y1, "duration": t1 - t0, "pressed_time": t0,
+         "depressed_time": t1, **_non_defaults(BUTTON_NAMES.get(button, "left"), count, drag)}
+        for button, t0, t1, x0, y0, x1, y1, drag, count in zip(
+            *(clicks[name].tolist() for name in ("button", "t0", "t1", "x0", "y0", "x1", "y1", "drag", "clicks"))
+        )
+    ]
+    if not with_moves:
+        return click_events
+    moves = simplify_moves(events, tolerance)
+    is_move = moves["kind"] == EventKindEnum.MOVE
+    t = moves["t"][is_move]
+    move_events = [{"type": "move", "x": x, "y": y, "time": time} for x, y, time in zip(
+        moves["x"][is_move].astype(np.float64).tolist(), moves["y"][is_move].astype(np.float64).tolist(),
+        t.astype(np.float64).tolist())]
+    # Both are sorted by time: merge, the clicks before the moves of the same time.
+    script: list[dict] = []
+    previous = 0
+    for position, click in zip(np.searchsorted(t, clicks["t0"]).tolist(), click_events):
+        script += move_events[previous:position]
+        script.append(click)
+        previous = position
+    script += move_events[previous:]
+    return script
+
+
+def _non_defaults(button: str, clicks: int, drag: bool) -> dict:
+    result = {}
+    if button != "left":
+        result["button"] = button
+    if clicks != 1:
+        result["clicks"] = clicks
+    if drag:
+        result["drag"] = True
     return result
+
+
+def write_play_script(events: list[MousePlayEvent | dict], path: str | Path) -> None:
+    """Write the play script for `MousePlayer`. The fields with the default values are omitted.
+
+    events: models, or the dicts of `to_play_script` (written as is).
+    """
+    data = [elem if isinstance(elem, dict) else {"type": elem.type.value,
+                                                 **elem.model_dump(mode="json", exclude_defaults=True)}
+            for elem in events]
+    Path(path).write_text(json.dumps(data, separators=(",", ":")))
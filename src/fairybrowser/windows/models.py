@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field
 
 class MouseEventTypeEnum(str, Enum):
     BUTTON = "button"
+    MOVE = "move"
+    SCROLL = "scroll"
 
 
 # Recorded Event.
@@ -22,6 +24,7 @@ class MouseEvent(BaseModel, frozen=True):
 
 class MousePlayEventTypeEnum(str, Enum):
     CLICK = "click"
+    MOVE = "move"
 
 
 
@@ -34,6 +37,9 @@ class MouseClickEvent(BaseModel, frozen=True):
     duration: Annotated[float, Field(description="The time mouse is pressed.")]
     pressed_time: Annotated[float, Field(description="Pressed Time")]
     depressed_time: Annotated[float, Field(description="Depressed Time")]
+    button: Annotated[str, Field(description="left / right / middle")] = "left"
+    clicks: Annotated[int, Field(description="1 for a single click, 2 for the second click of a double click, ...")] = 1
+    drag: Annotated[bool, Field(description="The pointer moved while pressed.")] = False
 
     @classmethod
     def from_mouse_button_events(cls, pressed_event: MouseEvent, depressed_event: MouseEvent) -> Self:
@@ -41,3 +47,19 @@ class MouseClickEvent(BaseModel, frozen=True):
                                x1=depressed_event.x, y1=depressed_event.y, 
                                duration=depressed_event.time - pressed_event.time,
                                pressed_time=pressed_event.time, depressed_time=depressed_event.time)
+
+
+class MouseMoveEvent(BaseModel, frozen=True):
+    type: MousePlayEventTypeEnum = MousePlayEventTypeEnum.MOVE
+    x: float
+    y: float
+    time: float
+
+
+MousePlayEvent = MouseClickEvent | MouseMoveEvent
+
+
+def to_play_event(data: dict) -> MousePlayEvent:
+    if data.get("type", MousePlayEventTypeEnum.CLICK) == MousePlayEventTypeEnum.MOVE:
+        return MouseMoveEvent.model_validate(data)
+    return MouseClickEvent.model_validate(data)
@@ -1,17 +1,186 @@
+"""Play the mouse events.
+
+The script is converted into actions (move / down / up) with offsets from the
+first event, and each action is issued at its absolute deadline on
+`time.monotonic()` (sleep until shortly before the deadline, then spin), so the
+delays do not accumulate over a long script.
+The actions go to an `OutputBackend`: `PyAutoGuiBackend` moves the real cursor,
+`FakeBackend` only records them (for tests without a display).
+"""
+
 import json
 import time
-import pyautogui
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Protocol
+
+import numpy as np
+
 from fairybrowser.windows.models import (
-    MouseEventTypeEnum,
     MouseEvent,
     MouseClickEvent,
-    MousePlayEventTypeEnum,
+    MouseMoveEvent,
+    MousePlayEvent,
+    to_play_event,
 )
-from fairybrowser.process_utils import to_foreground
 from fairybrowser.windows.editors import to_click_events
 
 
+class OutputBackend(Protocol):
+    def move(self, x: float, y: float) -> None: ...
+
+    def down(self, x: float, y: float, button: str, clicks: int = 1) -> None: ...
+
+    def up(self, x: float, y: float, button: str, clicks: int = 1) -> None: ...
+
+
+class PyAutoGuiBackend:
+    """The real OS cursor."""
+
+    def __init__(self):
+        import pyautogui  # Requires a display.
+
+        self._pyautogui = pyautogui
+
+    def move(self, x: float, y: float) -> None:
+        self._pyautogui.moveTo(x, y)
+
+    def down(self, x: float, y: float, button: str, clicks: int = 1) -> None:
+        # The OS counts the multi-clicks by itself.
+        self._pyautogui.mouseDown(x, y, button=button)
+
+    def up(self, x: float, y: float, button: str, clicks: int = 1) -> None:
+        self._pyautogui.mouseUp(x, y, button=button)
+
+
+class FakeBackend:
+    """Record the actions with the time they are issued."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.actions: list[tuple[float, str, float, float, str]] = []  # (time, action, x, y, button)
+
+    def move(self, x: float, y: float) -> None:
+        self.actions.append((self.clock(), "move", x, y, ""))
+
+    def down(self, x: float, y: float, button: str, clicks: int = 1) -> None:
+        self.actions.append((self.clock(), "down", x, y, button))
+
+    def up(self, x: float, y: float, button: str, clicks: int = 1) -> None:
+        self.actions.append((self.clock(), "up", x, y, button))
+
+
+@dataclass(frozen=True)
+class Action:
+    offset: float  # Seconds from the start of the playback.
+    kind: str  # "move" / "down" / "up"
+    x: float
+    y: float
+    button: str = ""
+    clicks: int = 1
+
+
+def to_actions(events: list[MousePlayEvent], speed: float = 1.0) -> list[Action]:
+    """speed: 2.0 plays twice as fast."""
+    starts = [elem.pressed_time if isinstance(elem, MouseClickEvent) else elem.time for elem in events]
+    origin = min(starts, default=0.0)
+    result = []
+    for event in events:
+        if isinstance(event, MouseMoveEvent):
+            result.append(Action((event.time - origin) / speed, "move", event.x, event.y))
+            continue
+        t0, t1 = (event.pressed_time - origin) / speed, (event.depressed_time - origin) / speed
+        result.append(Action(t0, "move", event.x0, event.y0))
+        result.append(Action(t0, "down", event.x0, event.y0, event.button, event.clicks))
+        if (event.x1, event.y1) != (event.x0, event.y0):
+            result.append(Action(t1, "move", event.x1, event.y1))
+        result.append(Action(t1, "up", event.x1, event.y1, event.button, event.clicks))
+    # Stable: the order of the same offset is kept (move -> down).
+    return sorted(result, key=lambda elem: elem.offset)
+
+
+def wait_until(deadline: float, clock: Callable[[], float] = time.monotonic, spin: float = 0.002) -> None:
+    """Sleep until `spin` seconds before `deadline`, then busy-wait."""
+    while True:
+        remaining = deadline - clock()
+        if remaining <= 0:
+            return
+        if remaining > spin:
+            time.sleep(remaining - spin)
+
+
+@dataclass
+class PlaybackStats:
+    lateness: np.ndarray = field(default_factory=lambda: np.zeros(0))  # Seconds after the deadline, per action.
+
+    @property
+    def count(self) -> int:
+        return len(self.lateness)
+
+    @property
+    def mean(self) -> float:
+        return float(self.lateness.mean()) if self.count else 0.0
+
+    @property
+    def max(self) -> float:
+        return float(self.lateness.max()) if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.lateness, q)) if self.count else 0.0
+
+    @property
+    def jitter(self) -> float:
+        """Standard deviation of the lateness."""
+        return float(self.lateness.std()) if self.count else 0.0
+
+    def summary(self) -> dict[str, float]:
+        """Milliseconds."""
+        return {"count": self.count, "mean_ms": self.mean * 1e3, "p50_ms": self.percentile(50) * 1e3,
+                "p99_ms": self.percentile(99) * 1e3, "max_ms": self.max * 1e3, "jitter_ms": self.jitter * 1e3}
+
+
+def _issue(action: Action, backend: OutputBackend) -> None:
+    if action.kind == "move":
+        backend.move(action.x, action.y)
+    elif action.kind == "down":
+        backend.down(action.x, action.y, action.button, action.clicks)
+    else:
+        backend.up(action.x, action.y, action.button, action.clicks)
+
+
+def play_actions(
+    actions: list[Action],
+    backend: OutputBackend,
+    clock: Callable[[], float] = time.monotonic,
+    spin: float = 0.002,
+    start: float | None = None,
+) -> PlaybackStats:
+    """Issue `actions` at `start + offset`. Return the lateness of each action."""
+    return play_actions_concurrently(actions, [backend], clock, spin, start)[0]
+
+
+def play_actions_concurrently(
+    actions: list[Action],
+    backends: list[OutputBackend],
+    clock: Callable[[], float] = time.monotonic,
+    spin: float = 0.002,
+    start: float | None = None,
+) -> list[PlaybackStats]:
+    """Issue the same `actions` to all the `backends` from one thread, on the same deadlines.
+
+    For the backends bound to one thread (e.g. the pages of one Playwright instance).
+    """
+    start = clock() if start is None else start
+    lateness = np.zeros((len(backends), len(actions)))
+    for i, action in enumerate(actions):
+        deadline = start + action.offset
+        wait_until(deadline, clock, spin)
+        for j, backend in enumerate(backends):
+            lateness[j, i] = clock() - deadline
+            _issue(action, backend)
+    return [PlaybackStats(elem) for elem in lateness]
+
+
 class MousePlayer:
     def __init__(self, inputs: str | Path | list):
         self.inputs = inputs
@@ -22,55 +191,53 @@ class MousePlayer:
                 raise FileNotFoundError(f"No files: {self.inputs}")
             data = json.loads(data.read_text())
             assert isinstance(data, list)
-        if isinstance(data, list):
+        if isinstance(data, list) and data:
             if isinstance(data[0], dict):
-                if data[0]["type"] in {MouseEventTypeEnum.BUTTON}:
+                # Both the recorded and the play events have the type "move"; tell them by the fields.
+                if "pressed" in data[0]:
                     data = [MouseEvent.model_validate(elem) for elem in data]
-                elif data[0]["type"] in {MousePlayEventTypeEnum.CLICK}:
-                    data = [MouseClickEvent.model_validate(elem) for elem in data]
+                else:
+                    data = [to_play_event(elem) for elem in data]
 
             if isinstance(data[0], MouseEvent):
                 data = to_click_events(data)
 
-        assert all(isinstance(elem, MouseClickEvent) for elem in data)
-        self.events: list[MouseClickEvent] = data
+        assert all(isinstance(elem, (MouseClickEvent, MouseMoveEvent)) for elem in data)
+        self.events: list[MousePlayEvent] = data
+        self.stats: PlaybackStats | None = None
 
-    def start(self, speed: float = 1.0, pid: int | None = None):
+    def start(
+        self,
+        speed: float = 1.0,
+        pid: int | None = None,
+        backend: OutputBackend | None = None,
+        lead_in: float = 1.0,
+        spin: float = 0.002,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> PlaybackStats:
         """
-        speed: 1.0 は実時間。0.5なら倍速、2.0なら半速。
+        speed: 1.0 は実時間。2.0なら倍速、0.5なら半速。
         pid: if given, the corresponding window becomes the foreground window.
+        backend: default `PyAutoGuiBackend`.
+        lead_in: seconds before the first event.
+        clock: of the deadlines (a virtual clock for tests).
         """
-
         if not self.events:
             print("⚠️ 再生するイベントがありません。")
-            return
+            self.stats = PlaybackStats()
+            return self.stats
 
         if pid is not None:
+            from fairybrowser.process_utils import to_foreground
+
             to_foreground(pid)
+        backend = backend if backend is not None else PyAutoGuiBackend()
 
-        print(f"▶️ 1秒後マウス操作を再生します（speed={speed}）")
-        time.sleep(1)
-
-        # 時間差を計算
-        for i, event in enumerate(self.events):
-            if i > 0:
-                prev = self.events[i - 1]
-                delay = (event.depressed_time - prev.pressed_time) / speed
-                if delay > 0:
-                    time.sleep(delay)
-            self._click(event)
-
-        print("✅ 再生完了！")
-
-    def _click(self, event: MouseClickEvent, duration: float = 0.2):
-        pyautogui.moveTo(event.x0, event.y0, duration=duration)
-        pyautogui.mouseDown()
-        perturbance_time = max(event.duration, 0.05)
-        pyautogui.moveTo(
-            event.x0 + 1, event.y1 - 1, duration=perturbance_time
-        )  # Perturrbance
-        pyautogui.moveTo(event.x1, event.y1, duration=0.0001)  # Perturrbance
-        pyautogui.mouseUp()
+        print(f"▶️ {lead_in}秒後マウス操作を再生します（speed={speed}）")
+        actions = to_actions(self.events, speed)
+        self.stats = play_actions(actions, backend, clock=clock, spin=spin, start=clock() + lead_in)
+        print(f"✅ 再生完了！ {self.stats.summary()}")
+        return self.stats
 
 
 if __name__ == "__main__":
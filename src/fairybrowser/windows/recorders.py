@@ -1,10 +1,11 @@
 from pathlib import Path 
 import json
+import math
 import time
 import json
 from fairybrowser.windows.models import MouseEvent, MouseEventTypeEnum 
-import pynput
-from threading import Event
+from fairybrowser.windows.streams import EventKindEnum, MouseEventBuffer, MouseStreamWriter, to_button_code
+from threading import Event, Lock
 
 
 class MouseRecorder:
@@ -17,6 +18,8 @@ class MouseRecorder:
             output_path = Path("./mouse_clicks.json")
         output_path = Path(output_path)
 
+        import pynput  # Requires a display.
+
         # ---- マウスのボタン関連イベント ----
         def _on_click(x, y, button, pressed):
             event = MouseEvent(
@@ -57,6 +60,114 @@ class MouseRecorder:
         print(f"💾 記録を保存しました: {output_path}")
 
 
+class MouseStreamRecorder:
+    """Record the moves, the buttons and the scrolls into `MouseEventBuffer`, flushed to a file incrementally.
+
+    `t` is `time.monotonic()` from the start; the file header holds the wall time of `t == 0`.
+    min_move_interval, min_move_distance: decimation of the moves (seconds / pixels). A move is kept
+        only if both are exceeded since the last kept move. 0 keeps every move.
+    flush_interval: seconds between the writes to the file.
+    """
+
+    def __init__(
+        self,
+        output_path: str | Path = "./mouse_stream.bin",
+        min_move_interval: float = 0.0,
+        min_move_distance: float = 0.0,
+        flush_interval: float = 1.0,
+        clock=time.monotonic,
+    ):
+        self.output_path = Path(output_path)
+        self.min_move_interval = min_move_interval
+        self.min_move_distance = min_move_distance
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.stop_event = Event()
+        self.dropped_moves = 0
+        self._buffer = MouseEventBuffer()
+        self._lock = Lock()
+        self._last_move: tuple[float, float, float] | None = None
+        self._origin = 0.0
+        self._writer: MouseStreamWriter | None = None
+
+    # ---- Callbacks of pynput (the listener thread) ----
+
+    def _on_move(self, x, y):
+        t = self.clock() - self._origin
+        if self._last_move is not None:
+            last_t, last_x, last_y = self._last_move
+            if (t - last_t < self.min_move_interval
+                    or math.hypot(x - last_x, y - last_y) < self.min_move_distance):
+                self.dropped_moves += 1
+                return
+        self._last_move = (t, x, y)
+        with self._lock:
+            self._buffer.append(t, x, y, EventKindEnum.MOVE)
+
+    def _on_click(self, x, y, button, pressed):
+        t = self.clock() - self._origin
+        kind = EventKindEnum.PRESS if pressed else EventKindEnum.RELEASE
+        with self._lock:
+            self._buffer.append(t, x, y, kind, to_button_code(button))
+
+    def _on_scroll(self, x, y, dx, dy):
+        t = self.clock() - self._origin
+        with self._lock:
+            if dy:
+                self._buffer.append(t, x, y, EventKindEnum.SCROLL, dy)
+            if dx:
+                self._buffer.append(t, x, y, EventKindEnum.HSCROLL, dx)
+
+    def _on_key(self, key):
+        import pynput
+
+        if key == pynput.keyboard.Key.esc:
+            print("\n🛑 ESC detected — recording stopped.")
+            self.stop_event.set()
+
+    # ---- File ----
+
+    def open(self) -> None:
+        self._origin = self.clock()
+        self._writer = MouseStreamWriter(self.output_path, origin=time.time())
+
+    def flush(self) -> None:
+        """Write the buffered events. The callbacks are blocked only while the buffers are swapped."""
+        with self._lock:
+            buffer, self._buffer = self._buffer, MouseEventBuffer()
+        if self._writer is not None:
+            self._writer.write(buffer)
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def start(self) -> Path:
+        """Record until ESC is pressed (or `stop` is called). Return the output path."""
+        import pynput  # Requires a display.
+
+        self.open()
+        mouse_listener = pynput.mouse.Listener(on_move=self._on_move, on_click=self._on_click, on_scroll=self._on_scroll)
+        keyboard_listener = pynput.keyboard.Listener(on_press=self._on_key)
+        print("🎬 マウス操作を記録中... ESCキーで停止します")
+        mouse_listener.start()
+        keyboard_listener.start()
+        try:
+            while not self.stop_event.wait(self.flush_interval):
+                self.flush()
+        finally:
+            mouse_listener.stop()
+            keyboard_listener.stop()
+            self.close()
+        print(f"💾 記録を保存しました: {self.output_path}")
+        return self.output_path
+
+
 if __name__ == "__main__":
     recorder = MouseRecorder()
     recorder.start()
@@ -0,0 +1,191 @@
+"""Compact, append-only storage of the mouse events.
+
+The events are kept in `MouseEventBuffer`, one typed `array.array` per column
+(`t`, `x`, `y`, `kind`, `value`), and appended to a file chunk by chunk, so a
+crash loses only the events after the last flush.
+
+* Binary (default): header (`FBMS`, version, wall time of `t == 0`), then chunks of
+  `count (uint32)` followed by the packed columns (little endian).
+  About 18 bytes per event.
+* JSONL (`*.jsonl`): header line, then `[t, x, y, kind, value]` per line.
+
+`value` is the button code for `PRESS` / `RELEASE`, and the scroll amount for
+`SCROLL` (vertical) / `HSCROLL` (horizontal).
+"""
+
+import json
+import struct
+import sys
+from array import array
+from enum import IntEnum
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from fairybrowser.windows.models import MouseEvent, MouseEventTypeEnum
+
+
+MAGIC = b"FBMS"
+VERSION = 1
+_HEADER = struct.Struct("<4sHd")  # magic, version, origin (wall time)
+_COUNT = struct.Struct("<I")
+
+# (column, typecode)
+COLUMNS = (("t", "d"), ("x", "f"), ("y", "f"), ("kind", "B"), ("value", "b"))
+
+
+class EventKindEnum(IntEnum):
+    MOVE = 0
+    PRESS = 1
+    RELEASE = 2
+    SCROLL = 3
+    HSCROLL = 4
+
+
+BUTTON_CODES = {"left": 1, "right": 2, "middle": 3, "x1": 4, "x2": 5}
+BUTTON_NAMES = {value: key for key, value in BUTTON_CODES.items()}
+
+
+def to_button_code(button) -> int:
+    """`pynput.mouse.Button.left` / "Button.left" / "left" -> 1. Unknown buttons are 0."""
+    name = getattr(button, "name", None) or str(button).rsplit(".", 1)[-1]
+    return BUTTON_CODES.get(name.lower(), 0)
+
+
+def _clamp_int8(value: float) -> int:
+    return max(-128, min(127, int(value)))
+
+
+class MouseEventBuffer:
+    def __init__(self):
+        self.t = array("d")
+        self.x = array("f")
+        self.y = array("f")
+        self.kind = array("B")
+        self.value = array("b")
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def append(self, t: float, x: float, y: float, kind: int, value: int = 0) -> None:
+        self.t.append(t)
+        self.x.append(x)
+        self.y.append(y)
+        self.kind.append(kind)
+        self.value.append(_clamp_int8(value))
+
+    def extend(self, other: "MouseEventBuffer") -> None:
+        for name, _ in COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+
+    def clear(self) -> None:
+        for name, typecode in COLUMNS:
+            setattr(self, name, array(typecode))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(getattr(self, name)) * getattr(self, name).itemsize for name, _ in COLUMNS)
+
+    def to_numpy(self) -> dict[str, np.ndarray]:
+        """Column name -> array. The arrays share the memory of the buffer."""
+        return {name: np.frombuffer(getattr(self, name), dtype=np.dtype(typecode))
+                for name, typecode in COLUMNS}
+
+    def to_mouse_events(self) -> list[MouseEvent]:
+        """The button and move events as `MouseEvent` (e.g. for `editors.to_click_events`)."""
+        result = []
+        for t, x, y, kind, value in zip(self.t, self.x, self.y, self.kind, self.value):
+            if kind == EventKindEnum.MOVE:
+                result.append(MouseEvent(type=MouseEventTypeEnum.MOVE, x=x, y=y, button="", pressed=False, time=t))
+            elif kind in (EventKindEnum.PRESS, EventKindEnum.RELEASE):
+                result.append(MouseEvent(type=MouseEventTypeEnum.BUTTON, x=x, y=y,
+                                         button=f"Button.{BUTTON_NAMES.get(value, 'unknown')}",
+                                         pressed=kind == EventKindEnum.PRESS, time=t))
+        return result
+
+
+def _to_little_endian(column: array) -> array:
+    if sys.byteorder == "little" or column.itemsize == 1:
+        return column
+    column = array(column.typecode, column)
+    column.byteswap()
+    return column
+
+
+class MouseStreamWriter:
+    """Append the buffers to `path`. The format is chosen by the suffix (`.jsonl` or binary)."""
+
+    def __init__(self, path: str | Path, origin: float):
+        self.path = Path(path)
+        self.origin = origin  # Wall time of `t == 0`.
+        self.jsonl = self.path.suffix == ".jsonl"
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = open(self.path, "w" if self.jsonl else "wb")
+        if self.jsonl:
+            self._fp.write(json.dumps({"format": "fairybrowser-mouse", "version": VERSION, "origin": origin}) + "\n")
+        else:
+            self._fp.write(_HEADER.pack(MAGIC, VERSION, origin))
+        self._fp.flush()
+
+    def write(self, buffer: MouseEventBuffer) -> None:
+        if not len(buffer):
+            return
+        if self.jsonl:
+            lines = (json.dumps([t, x, y, kind, value])
+                     for t, x, y, kind, value in zip(buffer.t, buffer.x, buffer.y, buffer.kind, buffer.value))
+            self._fp.write("\n".join(lines) + "\n")
+        else:
+            self._fp.write(_COUNT.pack(len(buffer)))
+            for name, _ in COLUMNS:
+                self._fp.write(_to_little_endian(getattr(buffer, name)).tobytes())
+        self._fp.flush()
+        self.count += len(buffer)
+
+    def close(self) -> None:
+        self._fp.close()
+
+
+def _iter_binary_chunks(data: bytes) -> Iterator[MouseEventBuffer]:
+    position = _HEADER.size
+    while position + _COUNT.size <= len(data):
+        (count,) = _COUNT.unpack_from(data, position)
+        position += _COUNT.size
+        size = count * sum(array(typecode).itemsize for _, typecode in COLUMNS)
+        if position + size > len(data):
+            return  # Truncated by a crash.
+        chunk = MouseEventBuffer()
+        for name, typecode in COLUMNS:
+            column = array(typecode)
+            column.frombytes(data[position:position + count * column.itemsize])
+            if sys.byteorder != "little":
+                column.byteswap()
+            setattr(chunk, name, column)
+            position += count * column.itemsize
+        yield chunk
+
+
+def read_mouse_stream(path: str | Path) -> tuple[MouseEventBuffer, float]:
+    """Read a file of `MouseStreamWriter`. Return (events, origin wall time)."""
+    path = Path(path)
+    result = MouseEventBuffer()
+    if path.suffix == ".jsonl":
+        with path.open() as fp:
+            header = json.loads(fp.readline())
+            for line in fp:
+                try:
+                    result.append(*json.loads(line))
+                except ValueError:
+                    break  # Truncated by a crash.
+        return result, header["origin"]
+
+    data = path.read_bytes()
+    magic, version, origin = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"Not a mouse stream: {path}")
+    if version > VERSION:
+        raise ValueError(f"Unsupported version {version}: {path}")
+    for chunk in _iter_binary_chunks(data):
+        result.extend(chunk)
+    return result, origin
@@ -0,0 +1,52 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FakeCdpServer:
+    """Answers `GET /json/version` as a browser started with `--remote-debugging-port`."""
+
+    def __init__(self, delay: float = 0.0, host: str = "127.0.0.1"):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.delay)
+                body = json.dumps({"Browser": "Fake/1.0",
+                                   "webSocketDebuggerUrl": f"ws://{host}:{server.port}/devtools/browser/fake"})
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.delay = delay
+        self._server = ThreadingHTTPServer((host, 0), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def cdp_servers():
+    """Start fake CDP endpoints with `cdp_servers(delay=..., host=...)`.
+
+    Other loopback addresses (127.0.0.2, ...) stand in for the remote hosts.
+    """
+    servers = []
+
+    def _start(delay: float = 0.0, host: str = "127.0.0.1") -> FakeCdpServer:
+        servers.append(FakeCdpServer(delay, host))
+        return servers[-1]
+
+    yield _start
+    for server in servers:
+        server.close()
@@ -0,0 +1,95 @@
+import pytest
+from fairybrowser.devtools.blockers import BlockRule, CompiledRules, ResourceBlocker, _observe_sizes, to_rules
+from fairybrowser.devtools.interceptors import FetchInterceptor
+
+
+class _FakeClient:
+    def __init__(self):
+        self.sent = []
+        self.listeners = {}
+
+    def send(self, method, params=None):
+        self.sent.append((method, params))
+        return {}
+
+    def on(self, event, callback):
+        self.listeners[event] = callback
+
+
+def test_compiled_rules_match_types_hosts_and_patterns():
+    rules = CompiledRules(to_rules("images", "trackers", BlockRule(url_patterns=("*/ads/*",))))
+    assert rules.match("https://site/a.png", "Image")
+    assert rules.match("https://www.google-analytics.com/collect", "XHR")
+    assert rules.match("https://site/ads/banner.js", "Script")
+    assert not rules.match("https://site/api", "XHR")
+    assert not rules.match("https://notdoubleclick.net/x", "Script")
+
+
+def test_unknown_preset():
+    with pytest.raises(ValueError):
+        to_rules("no-such-preset")
+
+
+def test_blocker_fails_matching_requests_and_counts():
+    client = _FakeClient()
+    blocker = ResourceBlocker("images", "fonts")
+    blocker.observe("Image", 1000)
+    blocker.observe("Image", 3000)
+    FetchInterceptor(client, [blocker]).start()
+    paused = client.listeners["Fetch.requestPaused"]
+    paused({"requestId": "1", "resourceType": "Image", "request": {"url": "https://site/a.png", "method": "GET"}})
+    paused({"requestId": "2", "resourceType": "Document", "request": {"url": "https://site/", "method": "GET"}})
+
+    assert ("Fetch.failRequest", {"requestId": "1", "errorReason": "BlockedByClient"}) in client.sent
+    assert client.sent[-1] == ("Fetch.continueRequest", {"requestId": "2"})
+    assert blocker.stats.blocked == {"Image": 1}
+    assert blocker.stats.allowed == 1
+    assert blocker.stats.estimated_bytes_saved == 2000
+
+
+def test_observed_sizes_forget_failed_requests():
+    client = _FakeClient()
+    blocker = ResourceBlocker("images")
+    interceptor = FetchInterceptor(client, [blocker])
+    _observe_sizes(interceptor, blocker)
+    sent = client.listeners["Network.requestWillBeSent"]
+    sent({"requestId": "1", "type": "Image"})
+    sent({"requestId": "2", "type": "Image"})
+    client.listeners["Network.loadingFailed"]({"requestId": "1", "errorText": "net::ERR_BLOCKED_BY_CLIENT"})
+    client.listeners["Network.loadingFinished"]({"requestId": "2", "encodedDataLength": 500})
+    client.listeners["Network.loadingFinished"]({"requestId": "1", "encodedDataLength": 9999})  # Already forgotten.
+    assert blocker.estimate_size("Image") == 500
+
+
+class _FakeContext:
+    def __init__(self):
+        self.sessions = []
+
+    def new_cdp_session(self, page):
+        self.sessions.append(_FakeClient())
+        return self.sessions[-1]
+
+
+class _FakePage:
+    def __init__(self):
+        self.context = _FakeContext()
+
+
+def test_features_share_one_interceptor_per_page(tmp_path):
+    from fairybrowser.devtools.blockers import block_resources
+    from fairybrowser.devtools.caches import HttpCacheStore, enable_http_cache
+
+    page = _FakePage()
+    blocker = block_resources(page, "images")
+    interceptor = enable_http_cache(page, HttpCacheStore(tmp_path))
+    assert len(page.context.sessions) == 1
+    assert interceptor.handlers[0] is blocker
+    client = page.context.sessions[0]
+    assert client.sent[-1] == ("Fetch.enable", {"patterns": [{"urlPattern": "*", "requestStage": "Request"},
+                                                             {"urlPattern": "*", "requestStage": "Response"}]})
+    assert FetchInterceptor.attach(_FakePage()) is not interceptor
+
+    interceptor.remove(interceptor.handlers[1])
+    assert client.sent[-1] == ("Fetch.enable", {"patterns": [{"urlPattern": "*", "requestStage": "Request"}]})
+    interceptor.remove(blocker)
+    assert client.sent[-1] == ("Fetch.disable", None)
@@ -0,0 +1,95 @@
+import base64
+from pathlib import Path
+from fairybrowser.devtools.caches import HttpCacheStore, HttpCacheHandler, freshness_lifetime
+from fairybrowser.devtools.interceptors import FetchInterceptor
+
+
+class _FakeClient:
+    def __init__(self, body: bytes = b""):
+        self.sent = []
+        self.listeners = {}
+        self.body = body
+
+    def send(self, method, params=None):
+        self.sent.append((method, params))
+        if method == "Fetch.getResponseBody":
+            return {"body": base64.b64encode(self.body).decode(), "base64Encoded": True}
+        return {}
+
+    def on(self, event, callback):
+        self.listeners[event] = callback
+
+
+def test_freshness_lifetime():
+    assert freshness_lifetime({"cache-control": "max-age=60"}, 0) == 60
+    assert freshness_lifetime({"cache-control": "public, s-maxage=10, max-age=60"}, 0) == 10
+    assert freshness_lifetime({"cache-control": "no-store"}, 0) is None
+    assert freshness_lifetime({"cache-control": "private, max-age=60"}, 0) is None
+    assert freshness_lifetime({"etag": '"x"'}, 0) == 0
+    assert freshness_lifetime({}, 0) is None
+
+
+def test_personal_responses_are_not_shared():
+    authorized = {"authorization": "Bearer x"}
+    assert freshness_lifetime({"cache-control": "max-age=60"}, 0, authorized) is None
+    assert freshness_lifetime({"cache-control": "public, max-age=60"}, 0, authorized) == 60
+    assert freshness_lifetime({"cache-control": "s-maxage=30"}, 0, authorized) == 30
+    assert freshness_lifetime({"cache-control": "max-age=60", "set-cookie": "sid=1"}, 0) is None
+    assert freshness_lifetime({"cache-control": "public, max-age=60", "set-cookie": "sid=1"}, 0) == 60
+
+
+def test_store_honours_vary_and_evicts_lru(tmp_path: Path):
+    store = HttpCacheStore(tmp_path, max_bytes=10)
+    headers = {"Cache-Control": "max-age=60", "Vary": "Accept-Encoding"}
+    assert store.store("GET", "https://a/x", {"Accept-Encoding": "gzip"}, 200, headers, b"12345")
+    assert store.lookup("GET", "https://a/x", {"accept-encoding": "gzip"}).body == b"12345"
+    assert store.lookup("GET", "https://a/x", {"Accept-Encoding": "br"}) is None
+
+    assert store.store("GET", "https://a/y", {}, 200, {"Cache-Control": "max-age=60"}, b"123456")
+    assert store.total_bytes <= 10
+    assert store.lookup("GET", "https://a/x", {"Accept-Encoding": "gzip"}) is None
+    assert store.counters["evictions"] == 1
+    store.close()
+
+
+def test_store_refuses_authorized_responses(tmp_path: Path):
+    store = HttpCacheStore(tmp_path)
+    assert not store.store("GET", "https://a/me", {"Authorization": "Bearer x"}, 200, {"Cache-Control": "max-age=60"}, b"me")
+    assert not store.store("GET", "https://a/me", {}, 200, {"Cache-Control": "max-age=60", "Set-Cookie": "sid=1"}, b"me")
+    assert store.lookup("GET", "https://a/me", {}) is None
+    store.close()
+
+
+def test_handler_stores_then_hits_and_revalidates(tmp_path: Path):
+    store = HttpCacheStore(tmp_path)
+    client = _FakeClient(body=b"payload")
+    FetchInterceptor(client, [HttpCacheHandler(store)]).start()
+    paused = client.listeners["Fetch.requestPaused"]
+    request = {"method": "GET", "url": "https://a/app.js", "headers": {}}
+
+    paused({"requestId": "1", "request": request})
+    assert client.sent[-1] == ("Fetch.continueRequest", {"requestId": "1"})
+    paused({"requestId": "1", "request": request, "responseStatusCode": 200,
+            "responseHeaders": [{"name": "Cache-Control", "value": "max-age=60"}, {"name": "ETag", "value": '"v1"'}]})
+    assert client.sent[-1][0] == "Fetch.fulfillRequest"
+
+    # Another instance shares the store.
+    other = _FakeClient()
+    FetchInterceptor(other, [HttpCacheHandler(HttpCacheStore(tmp_path))]).start()
+    other.listeners["Fetch.requestPaused"]({"requestId": "2", "request": request})
+    method, params = other.sent[-1]
+    assert method == "Fetch.fulfillRequest"
+    assert base64.b64decode(params["body"]) == b"payload"
+
+    # Stale -> conditional request -> 304 -> served from the store.
+    store._conn.execute("UPDATE entries SET expires_at = 0")
+    store._conn.commit()
+    paused({"requestId": "3", "request": request})
+    method, params = client.sent[-1]
+    assert method == "Fetch.continueRequest"
+    assert {"name": "If-None-Match", "value": '"v1"'} in params["headers"]
+    paused({"requestId": "3", "request": request, "responseStatusCode": 304, "responseHeaders": []})
+    method, params = client.sent[-1]
+    assert method == "Fetch.fulfillRequest"
+    assert params["responseCode"] == 200
+    assert store.counters == {"stores": 1, "misses": 1, "hits": 1, "revalidated": 1}
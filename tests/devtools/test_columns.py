@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from fairybrowser.devtools.columns import RequestColumns, group_percentiles, latency_percentiles
+from fairybrowser.devtools.models import RawCommunicationInfo
+
+
+def _raw(host: str, total: float, reused: bool = False) -> RawCommunicationInfo:
+    timing = {"requestTime": 1.0, "dnsStart": -1 if reused else 0.5, "dnsEnd": -1 if reused else 2.5,
+              "connectStart": -1 if reused else 2.5, "connectEnd": -1 if reused else 10.0,
+              "sslStart": -1, "sslEnd": -1, "sendStart": 10.0, "sendEnd": 11.0, "receiveHeadersEnd": total}
+    return RawCommunicationInfo(status=200, url=f"https://{host}/x", method="get", timing=timing,
+                                response_headers={"Content-Type": "text/html; charset=utf-8"},
+                                request_body=b"ab", response_body=b"abcd")
+
+
+def test_from_raws_builds_phases():
+    columns = RequestColumns.from_raws([_raw("a.com", 30.0), _raw("b.com", 50.0, reused=True),
+                                        RawCommunicationInfo(url="https://c.com/", method="GET")])
+    assert len(columns) == 3
+    assert columns.dns[0] == 2.0
+    assert columns.connect[0] == 7.5
+    assert np.isnan(columns.dns[1])
+    assert columns.wait[1] == 39.0
+    assert columns.status.tolist() == [200, 200, -1]
+    assert columns.method[0] == "GET"
+    assert columns.mime_type[0] == "text/html"
+    assert columns.response_size.tolist() == [4, 4, 0]
+
+
+def test_group_percentiles_matches_numpy():
+    rng = np.random.default_rng(0)
+    keys = rng.choice(np.array(["a", "b", "c"], dtype=object), size=1000)
+    values = rng.exponential(100.0, size=1000)
+    values[::50] = np.nan
+    result = group_percentiles(keys, values, q=(50, 99))
+    for key in ("a", "b", "c"):
+        selected = values[(keys == key) & ~np.isnan(values)]
+        assert result[key][50] == pytest.approx(np.percentile(selected, 50))
+        assert result[key][99] == pytest.approx(np.percentile(selected, 99))
+
+
+def test_latency_percentiles_by_host():
+    columns = RequestColumns.from_raws([_raw("a.com", 10.0), _raw("a.com", 30.0), _raw("b.com", 5.0)])
+    assert latency_percentiles(columns, q=(50,)) == {"a.com": {50: 20.0}, "b.com": {50: 5.0}}
+
+
+def test_to_arrow_and_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    columns = RequestColumns.from_raws([_raw("a.com", 10.0), RawCommunicationInfo(url="https://c.com/", method="GET")])
+    table = columns.to_arrow()
+    assert table.column("status").null_count == 1
+    assert table.column("dns").null_count == 1
+    columns.write_parquet(tmp_path / "a.parquet")
+    assert pq.read_table(tmp_path / "a.parquet").num_rows == 2
+    assert isinstance(table, pa.Table)
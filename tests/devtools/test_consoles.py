@@ -0,0 +1,90 @@
+import time
+from pathlib import Path
+from fairybrowser.devtools.consoles import ConsoleCapture
+from fairybrowser.devtools.pipelines import LogPipeline
+from fairybrowser.devtools.analyzers import SimpleRequestAnalyzer
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _params(text: str) -> dict:
+    return {
+        "type": "log",
+        "timestamp": 1000.0,
+        "args": [{"type": "string", "value": text}],
+        "stackTrace": {"callFrames": [{"url": "https://example.com/app.js", "lineNumber": 3, "columnNumber": 7, "functionName": "f"}]},
+    }
+
+
+def test_duplicates_are_folded():
+    records = []
+    clock = _Clock()
+    capture = ConsoleCapture(records.append, clock=clock)
+    for _ in range(5):
+        capture.on_console(_params("same"), target="t1")
+    capture.on_console(_params("other"), target="t1")
+    capture.flush()
+    assert [(r.text, r.duplicates) for r in records] == [("same", 4), ("other", 0)]
+    assert records[0].url == "https://example.com/app.js"
+    assert records[0].line == 3
+    assert capture.stats["t1"].duplicates == 4
+
+
+def test_rate_limit_is_per_target():
+    records = []
+    clock = _Clock()
+    capture = ConsoleCapture(records.append, rate=1.0, burst=2, clock=clock)
+    for i in range(10):
+        capture.on_console(_params(f"a{i}"), target="t1")
+        capture.on_console(_params(f"b{i}"), target="t2")
+    capture.flush()
+    assert len(records) == 4
+    assert capture.stats["t1"].rate_limited == 8
+    clock.now = 1.0
+    capture.on_console(_params("later"), target="t1")
+    capture.flush()
+    assert records[-1].text == "later"
+
+
+def test_pipeline_writes_console_jsonl(tmp_path: Path):
+    pipeline = LogPipeline(tmp_path, network_writer=lambda *args: None)
+    pipeline.start()
+    capture = ConsoleCapture(lambda record: pipeline.submit_record("console", record))
+    capture.on_exception({"timestamp": 1.0, "exceptionDetails": {"text": "Uncaught", "lineNumber": 1, "exception": {"description": "Error: x"}}}, target="t")
+    capture.flush()
+    pipeline.close()
+    records = SimpleRequestAnalyzer(tmp_path).console_records
+    assert len(records) == 1
+    assert records[0].kind == "exception"
+    assert records[0].text == "Error: x"
+
+
+def test_pipeline_flushes_held_console_records(tmp_path: Path):
+    capture = ConsoleCapture(lambda record: pipeline.submit_record("console", record), dedup_window=0.05)
+    pipeline = LogPipeline(tmp_path, network_writer=lambda *args: None, flush_interval=0.02,
+                           on_flush=lambda: capture.flush(min_age=capture.dedup_window))
+    pipeline.start()
+    capture.on_console(_params("lone"), target="t")
+    path = tmp_path / "console" / "console.jsonl"
+    deadline = time.monotonic() + 5.0
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert "lone" in path.read_text()  # Without `capture.flush()` or `pipeline.close()`.
+    pipeline.close()
+
+
+def test_pipeline_writes_at_once_without_thread(tmp_path: Path):
+    written = []
+    pipeline = LogPipeline(tmp_path, network_writer=lambda request_id, *args: written.append(request_id))
+    pipeline.start(background=False)
+    capture = ConsoleCapture(lambda record: pipeline.submit_record("console", record), dedup_window=0.0)
+    capture.on_console(_params("now"), target="t")
+    pipeline.submit_network("r1", [])
+    assert written == ["r1"]
+    assert "now" in (tmp_path / "console" / "console.jsonl").read_text()
@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+from fairybrowser.devtools.diffs import DiffThresholds, diff_captures, main, url_template
+from fairybrowser.devtools.models import RawCommunicationInfo
+
+
+def _raw(url: str, total: float, size: int = 100, status: int = 200, method: str = "GET"):
+    return RawCommunicationInfo(status=status, url=url, method=method, response_body=b"x" * size,
+                                timing={"requestTime": 1.0, "sendStart": 0.0, "sendEnd": 1.0, "receiveHeadersEnd": total})
+
+
+def _write(folder: Path, raws: list[RawCommunicationInfo]) -> Path:
+    folder.mkdir()
+    (folder / "a.json").write_text(json.dumps([elem.model_dump() for elem in raws]))
+    return folder
+
+
+def test_url_template():
+    assert url_template("get", "https://API.site/v1/users/42?page=2&q=x") == "GET api.site/v1/users/{id}?page&q"
+    assert (url_template("POST", "https://site/o/123e4567-e89b-12d3-a456-426614174000/d41d8cd98f00b204e9800998ecf8427e")
+            == "POST site/o/{uuid}/{hash}")
+    assert url_template("GET", "https://site") == "GET site/"
+
+
+def test_diff_captures(tmp_path: Path):
+    old = _write(tmp_path / "old", [
+        _raw("https://api.site/users/1", 100.0),
+        _raw("https://api.site/users/2", 110.0),
+        _raw("https://cdn.site/app.js", 20.0, size=50_000),
+        _raw("https://ads.site/pixel", 10.0),
+    ])
+    new = _write(tmp_path / "new", [
+        _raw("https://api.site/users/3", 105.0),
+        _raw("https://api.site/users/4", 100.0, status=500),
+        _raw("https://cdn.site/app.js", 400.0, size=120_000),
+        _raw("https://api.site/search?q=a", 30.0),
+    ])
+    diff = diff_captures(old, new)
+    assert diff.added == ["GET api.site/search?q"]
+    assert diff.removed == ["GET ads.site/pixel"]
+    changes = {elem.key: elem.regressions for elem in diff.templates}
+    assert changes["GET api.site/users/{id}"] == ["errors"]
+    assert changes["GET cdn.site/app.js"] == ["latency", "size"]
+    assert diff.failed
+    assert {elem.key for elem in diff.hosts} == {"api.site", "cdn.site"}
+
+    relaxed = diff_captures(old, new, DiffThresholds(latency_ratio=100, size_ratio=100, error_rate_increase=1.0))
+    assert not relaxed.failed
+    assert diff_captures(old, new, DiffThresholds(
+        latency_ratio=100, size_ratio=100, error_rate_increase=1.0, fail_on_added=True)).failed
+
+
+def test_main_exit_code(tmp_path: Path, capsys):
+    old = _write(tmp_path / "old", [_raw("https://site/a", 10.0)])
+    new = _write(tmp_path / "new", [_raw("https://site/a", 500.0)])
+    output = tmp_path / "diff.json"
+    assert main([str(old), str(new), "--output", str(output)]) == 1
+    assert json.loads(capsys.readouterr().out)["failed"] is True
+    assert json.loads(output.read_text())["templates"][0]["regressions"] == ["latency"]
+    assert main([str(old), str(new), "--latency-ratio", "100"]) == 0
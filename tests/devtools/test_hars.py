@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+from fairybrowser.devtools.hars import HarWriter, export_har, iter_har, iter_har_entries, iter_json_array_items, _ENTRIES_PATTERN
+from fairybrowser.devtools.models import RawCommunicationInfo
+
+
+def _raw(i: int) -> RawCommunicationInfo:
+    return RawCommunicationInfo(
+        status=200,
+        url=f"https://example.com/api/{i}?q=x",
+        method="POST",
+        timing={"requestTime": 10.0 + i, "dnsStart": 0.5, "dnsEnd": 2.0, "sendStart": 3.0, "sendEnd": 3.5, "receiveHeadersEnd": 20.0},
+        wall_time=1700000000.0 + i,
+        request_headers={"Content-Type": "application/json"},
+        response_headers={"Content-Type": "image/png", "Set-Cookie": "a=1\nb=2"},
+        request_body=b'{"i": %d}' % i,
+        response_body=b"\x89PNG\x00\xff",
+    )
+
+
+def test_writer_output_is_valid_har_and_round_trips(tmp_path: Path):
+    path = tmp_path / "out.har"
+    with HarWriter(path) as writer:
+        for i in range(3):
+            writer.write(_raw(i))
+
+    data = json.loads(path.read_text())
+    assert data["log"]["version"] == "1.2"
+    assert len(data["log"]["entries"]) == 3
+    entry = data["log"]["entries"][0]
+    assert entry["timings"]["dns"] == 1.5
+    assert entry["timings"]["wait"] == 16.5
+    assert entry["response"]["content"]["encoding"] == "base64"
+
+    restored = list(iter_har(path))
+    assert [elem.model_dump() for elem in restored] == [_raw(i).model_dump() for i in range(3)]
+
+
+def test_export_from_log_folder(tmp_path: Path):
+    folder = tmp_path / "debug"
+    (folder / "network").mkdir(parents=True)
+    for i in range(4):
+        (folder / "network" / f"r{i}.json").write_text(json.dumps([_raw(i).model_dump()]))
+    assert export_har(folder, tmp_path / "a.har") == 4
+    assert len(list(iter_har_entries(tmp_path / "a.har"))) == 4
+
+
+def test_array_items_across_small_chunks():
+    import io
+    text = json.dumps({"log": {"pages": [], "entries": [{"a": "x" * 100}, {"b": [1, 2, {"c": "]"}]}, 3]}})
+    items = list(iter_json_array_items(io.StringIO(text), _ENTRIES_PATTERN, chunk_size=7))
+    assert items == [{"a": "x" * 100}, {"b": [1, 2, {"c": "]"}]}, 3]
+
+
+def test_started_date_time_without_wall_time(tmp_path: Path):
+    path = tmp_path / "out.har"
+    with HarWriter(path) as writer:
+        writer.write(RawCommunicationInfo(url="https://example.com/", method="GET", wall_time=1_700_000_000.0,
+                                          timing={"requestTime": 100.0}))
+        writer.write(RawCommunicationInfo(url="https://example.com/a", method="GET", timing={"requestTime": 102.5}))
+        writer.write(RawCommunicationInfo(url="https://example.com/b", method="GET"))
+    started = [raw.wall_time for raw in iter_har(path)]
+    assert started == [1_700_000_000.0, 1_700_000_002.5, 1_700_000_002.5]
@@ -0,0 +1,138 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+from fairybrowser.devtools.analyzers import SimpleRequestAnalyzer
+from fairybrowser.devtools.indexes import RequestIndex
+from fairybrowser.devtools.models import RawCommunicationInfo
+
+
+def _write(path: Path, raws: list[RawCommunicationInfo]):
+    path.write_text(json.dumps([elem.model_dump() for elem in raws]))
+
+
+def _raw(url: str, method: str = "GET", status: int = 200, time: float = 0.0, content_type: str = "application/json"):
+    return RawCommunicationInfo(status=status, url=url, method=method, timing={"requestTime": time},
+                                response_headers={"Content-Type": f"{content_type}; charset=utf-8"}, response_body=b"{}")
+
+
+def _make_folder(tmp_path: Path) -> Path:
+    folder = tmp_path / "debug"
+    (folder / "network").mkdir(parents=True)
+    _write(folder / "network" / "a.json", [_raw("https://api.site/v1/users/1", time=1.0)])
+    _write(folder / "network" / "b.json", [_raw("https://api.site/v1/items", "POST", 201, 2.0)])
+    _write(folder / "network" / "c.json", [_raw("https://cdn.site/logo.png", status=404, time=3.0, content_type="image/png")])
+    return folder
+
+
+def test_query_by_fields(tmp_path: Path):
+    index = RequestIndex(_make_folder(tmp_path))
+    assert index.refresh() == 3
+    assert index.db_path == tmp_path / "debug.index.sqlite"
+
+    assert [row.url for row in index.query(method="post")] == ["https://api.site/v1/items"]
+    assert len(index.query(host="api.site")) == 2
+    assert len(index.query(path_prefix="/v1/")) == 2
+    assert [row.status for row in index.query(status_range=(400, 499))] == [404]
+    assert len(index.query(time_window=(1.5, 3.0))) == 2
+    assert len(index.query(content_type="image/")) == 1
+    assert len(index.query(content_type="application/json", host="api.site", method="GET")) == 1
+
+
+def test_refresh_ingests_only_changes(tmp_path: Path):
+    folder = _make_folder(tmp_path)
+    index = RequestIndex(folder)
+    index.refresh()
+    assert index.refresh() == 0
+
+    _write(folder / "network" / "d.json", [_raw("https://api.site/v2/new")])
+    path = folder / "network" / "a.json"
+    _write(path, [_raw("https://api.site/v1/users/1"), _raw("https://api.site/v1/users/2")])
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1))
+    (folder / "network" / "c.json").unlink()
+    assert index.refresh() == 2
+    assert len(index.query()) == 4
+    assert index.query(content_type="image/") == []
+
+
+def test_partially_written_file_is_retried(tmp_path: Path):
+    folder = _make_folder(tmp_path)
+    path = folder / "network" / "d.json"
+    path.write_text(json.dumps([_raw("https://api.site/v2/new").model_dump()])[:-10])
+    index = RequestIndex(folder)
+    assert index.refresh() == 3
+    assert len(index.query()) == 3
+
+    _write(path, [_raw("https://api.site/v2/new")])
+    assert index.refresh() == 1
+    assert [row.url for row in index.query(path_prefix="/v2/")] == ["https://api.site/v2/new"]
+
+
+def test_load_keeps_only_a_few_files(tmp_path: Path, monkeypatch):
+    folder = tmp_path / "debug"
+    folder.mkdir()
+    for i in range(3):  # The rows of the files alternate in time.
+        _write(folder / f"{i}.json", [_raw(f"https://api.site/{i}/{j}", time=j * 3 + i) for j in range(2)])
+    index = RequestIndex(folder)
+    index.refresh()
+    monkeypatch.setattr("fairybrowser.devtools.indexes._LOADED_FILES", 2)
+    reads = []
+    loads = json.loads
+    monkeypatch.setattr("fairybrowser.devtools.indexes.json.loads", lambda text: reads.append(text) or loads(text))
+
+    rows = index.query()
+    assert [elem.url for elem in index.load(rows)] == [f"https://api.site/{i}/{j}" for j in range(2) for i in range(3)]
+    assert len(reads) == 6  # 0 1 2 0 1 2: each file is evicted before it comes back.
+    reads.clear()
+    assert len(index.load(rows[:2] + rows[:2])) == 4
+    assert len(reads) == 2
+
+
+def test_analyzer_query_returns_simple_requests(tmp_path: Path):
+    analyzer = SimpleRequestAnalyzer(_make_folder(tmp_path))
+    requests = analyzer.query(host="api.site", status_range=(200, 201))
+    assert [elem.method for elem in requests] == ["GET", "POST"]
+    assert requests[0].response_json == {}
+
+
+def test_search_and_find_bodies(tmp_path: Path):
+    folder = tmp_path / "debug"
+    folder.mkdir()
+    raws = [
+        RawCommunicationInfo(status=200, url="https://api.site/users", method="GET",
+                             response_headers={"Content-Type": "application/json"},
+                             response_body=json.dumps({"data": {"items": [{"id": 42, "name": "Alice Smith"}]}}).encode()),
+        RawCommunicationInfo(status=200, url="https://api.site/login", method="POST",
+                             request_body=b'{"user": "alice", "remember": true}', response_body=b"Welcome back"),
+        RawCommunicationInfo(status=200, url="https://cdn.site/a.png", method="GET",
+                             response_headers={"Content-Type": "image/png"}, response_body=b"alice"),
+    ]
+    _write(folder / "a.json", raws)
+    index = RequestIndex(folder)
+    index.refresh()
+
+    assert [row.url for row in index.search("ALICE")] == ["https://api.site/users", "https://api.site/login"]
+    assert [row.url for row in index.search("alice", part="response")] == ["https://api.site/users"]
+    assert [row.url for row in index.search("welcome back")] == ["https://api.site/login"]
+    assert index.search("welcome smith") == []
+    assert [row.url for row in index.find("data.items[].id", 42)] == ["https://api.site/users"]
+    assert index.find("data.items[].id", "42") == []
+    assert [row.url for row in index.find(user="alice", remember=True)] == ["https://api.site/login"]
+    assert index.find(user="alice", _part="response") == []
+    assert index.find(part="response") == []  # A JSON key named "part", not the filter.
+    with pytest.raises(ValueError):
+        index.find("data.items[].id")  # Not JSON null.
+
+    # Removed files are forgotten.
+    (folder / "a.json").unlink()
+    index.refresh()
+    assert index.search("alice") == []
+    assert index.find(id=42) == []
+
+
+def test_analyzer_find_returns_simple_requests(tmp_path: Path):
+    analyzer = SimpleRequestAnalyzer(_make_folder(tmp_path))
+    _write(analyzer.log_folder / "network" / "d.json",
+           [RawCommunicationInfo(status=200, url="https://api.site/me", method="GET", response_body=b'{"id": 7}')])
+    assert [elem.response_json for elem in analyzer.find(id=7)] == [{"id": 7}]
@@ -0,0 +1,125 @@
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+from fairybrowser import runners
+from fairybrowser.devtools import inputs
+from fairybrowser.devtools.inputs import CdpInputBackend, ViewportMapping, replay_in_instances, replay_on_pages
+from fairybrowser.models import ExecutionState
+from fairybrowser.windows.models import MouseClickEvent, MouseMoveEvent
+
+
+class FakeClient:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, method, params=None):
+        self.sent.append((method, params))
+        return {}
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    def new_cdp_session(self, page):
+        return page.client
+
+
+class FakePage:
+    def __init__(self):
+        self.client = FakeClient()
+        self.context = FakeContext()
+        self.prepared = False
+
+
+class FakeBrowser:
+    def __init__(self, pages=0):
+        self.context = FakeContext()
+        self.contexts = [self.context]
+        for _ in range(pages):
+            self.new_page()
+
+    def new_page(self):
+        page = FakePage()
+        page.context = self.context
+        self.context.pages.append(page)
+        return page
+
+
+def _script():
+    return [
+        MouseMoveEvent(x=100, y=200, time=0.0),
+        MouseClickEvent(x0=110, y0=220, x1=110, y1=220, duration=0.01, pressed_time=0.01, depressed_time=0.02,
+                        button="right", clicks=2),
+    ]
+
+
+def test_backend_dispatches_mapped_events():
+    page = FakePage()
+    backend = CdpInputBackend(page, ViewportMapping(offset_x=100, offset_y=100, scale=2.0))
+    backend.down(110, 120, "left")
+    backend.move(130, 140)
+    backend.up(130, 140, "left")
+    assert [params["type"] for _, params in page.client.sent] == ["mousePressed", "mouseMoved", "mouseReleased"]
+    pressed, moved, released = (params for _, params in page.client.sent)
+    assert (pressed["x"], pressed["y"], pressed["buttons"], pressed["clickCount"]) == (5.0, 10.0, 1, 1)
+    assert moved["buttons"] == 1 and released["buttons"] == 0
+
+
+def test_replay_on_pages():
+    pages = [FakePage(), FakePage()]
+    stats = replay_on_pages(_script(), pages)
+    assert len(stats) == 2 and stats[0].count == 4
+    for page in pages:
+        types = [(params["type"], params["button"], params["clickCount"]) for _, params in page.client.sent]
+        assert types == [("mouseMoved", "none", 0), ("mouseMoved", "none", 0),
+                         ("mousePressed", "right", 2), ("mouseReleased", "right", 2)]
+
+
+def test_replay_in_instances(monkeypatch):
+    pages = {}
+
+    @contextmanager
+    def fake_sync_page(target):
+        pages[target] = FakePage()
+        yield pages[target]
+
+    monkeypatch.setattr(inputs, "sync_page", fake_sync_page)
+    stats = replay_in_instances(_script(), ["a", "b", "c"], prepare=lambda page: setattr(page, "prepared", True))
+    assert len(stats) == 3
+    assert all(page.prepared and len(page.client.sent) == 4 for page in pages.values())
+
+
+def test_replay_in_instances_failure_does_not_hang(monkeypatch):
+    @contextmanager
+    def fake_sync_page(target):
+        if target == "broken":
+            raise RuntimeError("cannot connect")
+        yield FakePage()
+
+    monkeypatch.setattr(inputs, "sync_page", fake_sync_page)
+    with pytest.raises(Exception):
+        replay_in_instances(_script(), ["ok", "broken"])
+
+
+def test_replay_in_instances_without_windows(monkeypatch, capsys):
+    browsers = {"a": FakeBrowser(pages=1), "b": FakeBrowser(pages=0)}
+
+    @contextmanager
+    def fake_sync_playwright():
+        yield None
+
+    def fake_connect(playwright, target):
+        return ExecutionState(name=target, type="chromium", port=9222, pid=1), browsers[target]
+
+    monkeypatch.setattr(sys, "platform", "linux")  # No window lookup (`ctypes.windll`).
+    monkeypatch.setattr(runners, "sync_playwright", fake_sync_playwright)
+    monkeypatch.setattr(runners, "_connect", fake_connect)
+    stats = replay_in_instances(_script(), ["a", "b"])
+    assert [elem.count for elem in stats] == [4, 4]
+    for browser in browsers.values():
+        page, = browser.context.pages  # The existing page, else a new one.
+        assert len(page.client.sent) == 4
+    assert capsys.readouterr().out == ""
@@ -37,3 +37,64 @@ def test_round_trip_dump_then_validate():
 
 
 
+
+
+def test_simple_request_bodies_are_loaded_lazily(tmp_path):
+    import json
+    from fairybrowser.devtools.models import SimpleRequest, RecordBody
+
+    path = tmp_path / "a.json"
+    raw = RawCommunicationInfo(status=200, url="https://example.com", method="GET", response_body=b'{"ok": true}')
+    path.write_text(json.dumps([raw.model_dump()]))
+
+    request = SimpleRequest.from_record(json.loads(path.read_text())[0], path, 0)
+    assert isinstance(request._response_handle, RecordBody)
+    # Not read yet: the body is taken from the file as it is at the first access.
+    raw = raw.model_copy(update={"response_body": b'{"ok": false}'})
+    path.write_text(json.dumps([raw.model_dump()]))
+    assert request.response_json == {"ok": False}
+    assert request.request_body == b""
+
+
+def test_large_bodies_are_stored_in_body_files(tmp_path):
+    import json
+    from fairybrowser.devtools.analyzers import SimpleRequestAnalyzer
+    from fairybrowser.devtools.collectors import _dump_request
+    from fairybrowser.devtools.models import FileBody, InlineBody
+
+    big = bytes(range(256)) * 100
+    raw = RawCommunicationInfo(status=200, url="https://example.com/big", method="POST",
+                               request_body=b"small", response_body=big)
+    network = tmp_path / "network"
+    network.mkdir()
+    _dump_request("req-1", [raw], network, body_file_threshold=1024)
+    assert (network / "bodies" / "req-1_0_response_body.bin").read_bytes() == big
+
+    analyzer = SimpleRequestAnalyzer(tmp_path)
+    assert isinstance(analyzer.simple_requests[0]._response_handle, InlineBody)  # Eager by default.
+    request = analyzer.get_simple_requests(lazy_bodies=True)[0]
+    assert isinstance(request._response_handle, FileBody)
+    assert request.response_size == len(big)
+    assert request.response_body == big
+    assert request.request_body == b"small"
+    assert analyzer.raw_infos[0].response_body == big
+
+    # Without the folder in the validation context.
+    record = json.loads((network / "req-1.json").read_text())[0]
+    assert RawCommunicationInfo.model_validate(record).response_body == big
+
+    # Read once, then kept.
+    (network / "bodies" / "req-1_0_response_body.bin").unlink()
+    assert request.response_body == big
+
+
+def test_simple_request_dump_includes_bodies():
+    from fairybrowser.devtools.models import SimpleRequest
+
+    request = SimpleRequest(url="https://example.com", method="POST", time=0.0,
+                            request_body=b"hello", response_body=b"\xff\x00")
+    dumped = request.model_dump()
+    assert dumped["request_body"] == b"hello"
+    assert dumped["response_body"] == b"\xff\x00"
+    assert "request_body" not in request.model_dump(exclude={"request_body"})
+    assert SimpleRequest.model_validate_json(request.model_dump_json()).response_body == b"\xff\x00"
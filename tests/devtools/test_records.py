@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+
+from fairybrowser.devtools.collectors import _dump_request
+from fairybrowser.devtools.models import RawCommunicationInfo
+from fairybrowser.devtools.records import RawRecord
+
+
+def _raw() -> RawCommunicationInfo:
+    return RawCommunicationInfo(
+        status=200, url="https://site/a", method="POST", timing={"requestTime": 1.5, "receiveHeadersEnd": 12.0},
+        wall_time=1700000000.0, end_time=1.6, resource_type="XHR", initiator_url="https://site/",
+        connection_id=3, connection_reused=True, request_headers={"A": "1"}, response_headers={"B": "2"},
+        request_body=b'{"x": 1}', response_body=bytes([0, 255]),
+    )
+
+
+def test_lossless_conversion():
+    raw = _raw()
+    record = RawRecord.from_model(raw)
+    assert record.to_model() == raw
+    assert record.to_json() == raw.model_dump()
+    assert list(record.to_json()) == list(raw.model_dump())
+    assert RawRecord.from_json(raw.model_dump()) == record
+    assert RawRecord.from_json(json.loads(json.dumps(record.to_json()))).to_model() == raw
+
+
+def test_from_json_reads_body_files(tmp_path: Path):
+    record = RawRecord(url="https://site/big", method="GET", status=200, response_body=b"\x00" * 4096)
+    _dump_request("req", [record], tmp_path, body_file_threshold=1024)
+    data = json.loads((tmp_path / "req.json").read_text())
+    assert data[0]["response_body"]["type"] == "file"
+    assert RawRecord.from_json(data[0], tmp_path) == record
+    assert RawCommunicationInfo.model_validate(data[0], context={"base_folder": tmp_path}) == record.to_model()
@@ -0,0 +1,103 @@
+import base64
+from fairybrowser.devtools.collectors import _dump_request
+from fairybrowser.devtools.interceptors import FetchInterceptor
+from fairybrowser.devtools.models import RawCommunicationInfo
+from fairybrowser.devtools.replays import ReplayIndex, ReplayHandler, MissPolicyEnum
+
+
+class _FakeClient:
+    def __init__(self):
+        self.sent = []
+        self.listeners = {}
+
+    def send(self, method, params=None):
+        self.sent.append((method, params))
+        return {}
+
+    def on(self, event, callback):
+        self.listeners[event] = callback
+
+
+def _paused(request_id, method, url, post_data=None):
+    request = {"method": method, "url": url, "headers": {}}
+    if post_data is not None:
+        request["postData"] = post_data
+    return {"requestId": request_id, "request": request}
+
+
+def _raws():
+    return [
+        RawCommunicationInfo(status=200, url="https://site/a", method="GET", response_headers={"Content-Type": "text/plain", "Content-Length": "1"}, response_body=b"first"),
+        RawCommunicationInfo(status=200, url="https://site/a", method="GET", response_body=b"second"),
+        RawCommunicationInfo(status=201, url="https://site/p", method="POST", request_body=b'{"x": 1}', response_body=b"posted"),
+        RawCommunicationInfo(status=None, url="https://site/incomplete", method="GET"),
+    ]
+
+
+def test_index_serves_in_recorded_order_and_matches_body():
+    index = ReplayIndex(_raws())
+    assert len(index) == 3
+    assert index.lookup("get", "https://site/a").response_body == b"first"
+    assert index.lookup("GET", "https://site/a").response_body == b"second"
+    assert index.lookup("GET", "https://site/a").response_body == b"second"
+    assert index.lookup("POST", "https://site/p", b'{"x": 1}').status == 201
+    assert index.lookup("POST", "https://site/p", b'{"x": 2}') is None
+    assert index.lookup("GET", "https://site/incomplete") is None
+
+
+def test_handler_fulfills_hits_and_applies_miss_policy():
+    client = _FakeClient()
+    handler = ReplayHandler(ReplayIndex(_raws()), MissPolicyEnum.NOT_FOUND)
+    interceptor = FetchInterceptor(client, [handler])
+    interceptor.start()
+    paused = client.listeners["Fetch.requestPaused"]
+
+    paused(_paused("1", "GET", "https://site/a"))
+    paused(_paused("2", "GET", "https://site/unknown"))
+
+    fulfills = [params for method, params in client.sent if method == "Fetch.fulfillRequest"]
+    assert base64.b64decode(fulfills[0]["body"]) == b"first"
+    assert {"name": "Content-Type", "value": "text/plain"} in fulfills[0]["responseHeaders"]
+    assert all(elem["name"] != "Content-Length" for elem in fulfills[0]["responseHeaders"])
+    assert fulfills[1]["responseCode"] == 404
+    assert handler.hits == 1
+    assert handler.misses == ["GET https://site/unknown"]
+
+
+def test_passthrough_continues_the_request():
+    client = _FakeClient()
+    interceptor = FetchInterceptor(client, [ReplayHandler(ReplayIndex([]))])
+    interceptor.start()
+    client.listeners["Fetch.requestPaused"](_paused("9", "GET", "https://site/x"))
+    assert client.sent[-1] == ("Fetch.continueRequest", {"requestId": "9"})
+
+
+def test_capture_on_disk_is_served_lazily(tmp_path):
+    network = tmp_path / "network"
+    network.mkdir()
+    big = bytes(range(256)) * 8
+    _dump_request("r1", [RawCommunicationInfo(status=200, url="https://site/big", method="GET",
+                                              response_headers={"Content-Type": "image/png"}, response_body=big)],
+                  network, body_file_threshold=1024)
+    _dump_request("r2", [RawCommunicationInfo(status=201, url="https://site/p", method="POST",
+                                              request_body=b'{"x": 1}', response_body=b"posted")], network)
+    index = ReplayIndex.from_folder(tmp_path)
+    assert len(index) == 2
+
+    # Changed on the disk after the indexing: the bodies are read when served.
+    (network / "bodies" / "r1_0_response_body.bin").write_bytes(big[::-1])
+    path = network / "r2.json"
+    path.write_text(path.read_text().replace('"posted"', '"changed"'))
+
+    client = _FakeClient()
+    FetchInterceptor(client, [ReplayHandler(index, MissPolicyEnum.FAIL)]).start()
+    paused = client.listeners["Fetch.requestPaused"]
+    paused(_paused("1", "GET", "https://site/big"))
+    paused(_paused("2", "POST", "https://site/p", post_data='{"x": 1}'))
+    paused(_paused("3", "POST", "https://site/p", post_data='{"x": 2}'))
+
+    fulfills = [params for method, params in client.sent if method == "Fetch.fulfillRequest"]
+    assert base64.b64decode(fulfills[0]["body"]) == big[::-1]
+    assert {"name": "Content-Type", "value": "image/png"} in fulfills[0]["responseHeaders"]
+    assert (fulfills[1]["responseCode"], base64.b64decode(fulfills[1]["body"])) == (201, b"changed")
+    assert client.sent[-1] == ("Fetch.failRequest", {"requestId": "3", "errorReason": "Failed"})
@@ -0,0 +1,145 @@
+import base64
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from fairybrowser.devtools.screencasts import (
+    FrameArchive, ImageFormatEnum, ScreencastPipeline, iter_frames, read_frame_archive,
+)
+
+
+def _image(format="JPEG", size=(320, 200), color=(200, 30, 30)) -> str:
+    output = io.BytesIO()
+    Image.new("RGB", size, color).save(output, format)
+    return base64.b64encode(output.getvalue()).decode()
+
+
+class FakeClient:
+    def __init__(self):
+        self.sent = []
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def send(self, method, params=None):
+        self.sent.append((method, params))
+        if method == "Page.captureScreenshot":
+            clip = params.get("clip")
+            size = (int(clip["width"]), int(clip["height"])) if clip else (320, 200)
+            return {"data": _image(params["format"].upper(), size)}
+        if method == "Page.getLayoutMetrics":
+            return {"cssContentSize": {"x": 0, "y": 0, "width": 320.0, "height": 1500.0}}
+        return {}
+
+    def emit_frame(self, session_id, timestamp=1000.0):
+        self.handlers["Page.screencastFrame"]({
+            "data": _image(), "sessionId": session_id, "metadata": {"timestamp": timestamp},
+        })
+
+
+def test_screencast_frames_are_acked_and_archived(tmp_path):
+    client = FakeClient()
+    with ScreencastPipeline(tmp_path, format="webp", max_width=160) as pipeline:
+        pipeline.attach(None, "w1", client=client, every_nth_frame=2)
+        for i in range(5):
+            client.emit_frame(i, timestamp=1000.0 + i)
+        assert pipeline.capture(None, "w1")
+
+    assert client.sent[0] == ("Page.startScreencast", {"format": "jpeg", "everyNthFrame": 2, "quality": 80,
+                                                       "maxWidth": 160})
+    acks = [params["sessionId"] for method, params in client.sent if method == "Page.screencastFrameAck"]
+    assert acks == [0, 1, 2, 3, 4]
+    assert ("Page.stopScreencast", None) in client.sent
+    assert pipeline.stats.received == 6
+    assert pipeline.stats.written == 6
+    assert pipeline.stats.failed == 0
+
+    frames = list(iter_frames(tmp_path / "w1"))
+    assert [elem.index for elem in frames] == list(range(6))
+    assert frames[0].timestamp == 1000.0
+    image = Image.open(io.BytesIO(frames[0].data))
+    assert image.format == "WEBP"
+    assert image.size == (160, 100)
+
+
+def test_same_format_is_passed_through(tmp_path):
+    raw = base64.b64decode(_image())
+    pipeline = ScreencastPipeline(tmp_path, format="jpeg", workers=0)
+    assert pipeline.encode(raw, ImageFormatEnum.JPEG) is raw
+    assert Image.open(io.BytesIO(pipeline.encode(raw, ImageFormatEnum.PNG))).format == "JPEG"
+
+
+def test_archive_rotation_and_truncation(tmp_path):
+    archive = FrameArchive(tmp_path, ImageFormatEnum.PNG, segment_frames=2, max_segments=2)
+    for i in range(5):
+        archive.write(i, float(i), b"x" * (i + 1))
+    archive.close()
+
+    segments = sorted(tmp_path.glob("segment-*.fbsc"))
+    assert [elem.name for elem in segments] == ["segment-000002.fbsc", "segment-000003.fbsc"]
+    assert [elem.index for elem in iter_frames(tmp_path)] == [2, 3, 4]
+
+    data = segments[0].read_bytes()
+    segments[0].write_bytes(data[:-2])  # Crash in the middle of the last frame.
+    format, frames = read_frame_archive(segments[0])
+    assert format == ImageFormatEnum.PNG
+    assert [(elem.index, elem.data) for elem in frames] == [(2, b"xxx")]
+
+
+def test_files_are_rotated(tmp_path):
+    for _ in range(2):  # The second run continues the numbering.
+        client = FakeClient()
+        with ScreencastPipeline(tmp_path, format="png", container=False, max_files=3, workers=1) as pipeline:
+            pipeline.attach(None, "w1", client=client)
+            for i in range(5):
+                client.emit_frame(i)
+    assert sorted(elem.name for elem in (tmp_path / "w1").iterdir()) == [
+        "00000007.png", "00000008.png", "00000009.png"]
+
+
+def test_full_page_capture_clips_the_content(tmp_path):
+    client = FakeClient()
+    with ScreencastPipeline(tmp_path, format="png", workers=1) as pipeline:
+        assert pipeline.capture(None, "w1", client=client, full_page=True)
+    method, params = client.sent[-1]
+    assert method == "Page.captureScreenshot"
+    assert params["captureBeyondViewport"] is True
+    assert params["clip"] == {"x": 0, "y": 0, "width": 320.0, "height": 1500.0, "scale": 1}
+    frame, = iter_frames(tmp_path / "w1")
+    assert Image.open(io.BytesIO(frame.data)).size == (320, 1500)
+
+
+@pytest.mark.parametrize("policy, expected", [("drop_oldest", [0, 3, 4]), ("drop_newest", [0, 1, 2])])
+def test_slow_encoder_drops_frames(tmp_path, monkeypatch, policy, expected):
+    started = threading.Event()
+    release = threading.Event()
+    original = ScreencastPipeline.encode
+
+    def _slow_encode(self, raw, source_format=None):
+        started.set()
+        release.wait(5)
+        return original(self, raw, source_format)
+
+    monkeypatch.setattr(ScreencastPipeline, "encode", _slow_encode)
+    client = FakeClient()
+    pipeline = ScreencastPipeline(tmp_path, format="jpeg", workers=1, maxsize=2, policy=policy)
+    pipeline.attach(None, "w1", client=client)
+    client.emit_frame(0)
+    assert started.wait(5)  # The frame 0 is in the encoder, the next ones wait in the buffer.
+    for i in range(1, 5):
+        client.emit_frame(i)
+    release.set()
+    pipeline.close()
+
+    assert pipeline.stats.dropped == 2
+    assert [elem.index for elem in iter_frames(tmp_path / "w1")] == expected
+    assert len([method for method, _ in client.sent if method == "Page.screencastFrameAck"]) == 5
+
+
+def test_webp_screencast_is_rejected(tmp_path):
+    with ScreencastPipeline(tmp_path, workers=0) as pipeline:
+        with pytest.raises(ValueError):
+            pipeline.attach(None, "w1", client=FakeClient(), source_format="webp")
@@ -0,0 +1,67 @@
+import threading
+from fairybrowser.devtools.models import SimpleRequest
+from fairybrowser.devtools.streams import RequestStream, OverflowPolicyEnum, CallbackSink
+
+
+def _request(i: int) -> SimpleRequest:
+    return SimpleRequest(url=f"https://example.com/{i}", method="GET", time=float(i),
+                         request_body=b"", response_body=b"")
+
+
+def test_drop_oldest_keeps_latest():
+    stream = RequestStream(maxsize=2, policy=OverflowPolicyEnum.DROP_OLDEST)
+    for i in range(5):
+        stream.publish(_request(i))
+    stream.close()
+    urls = [elem.url for elem in stream]
+    assert urls == ["https://example.com/3", "https://example.com/4"]
+    assert stream.dropped == 3
+
+
+def test_drop_newest_keeps_first():
+    stream = RequestStream(maxsize=2, policy=OverflowPolicyEnum.DROP_NEWEST)
+    for i in range(5):
+        stream.publish(_request(i))
+    stream.close()
+    assert [elem.time for elem in stream] == [0.0, 1.0]
+
+
+def test_block_waits_for_consumer():
+    stream = RequestStream(maxsize=1, policy=OverflowPolicyEnum.BLOCK, put_timeout=5.0)
+    received = []
+
+    def consume():
+        for elem in stream:
+            received.append(elem.time)
+
+    thread = threading.Thread(target=consume)
+    thread.start()
+    for i in range(20):
+        stream.publish(_request(i))
+    stream.close()
+    thread.join(timeout=5.0)
+    assert received == [float(i) for i in range(20)]
+    assert stream.dropped == 0
+
+
+def test_callback_sink_filters_and_survives_errors():
+    seen = []
+
+    def callback(request):
+        seen.append(request.time)
+        raise RuntimeError("boom")
+
+    sink = CallbackSink(callback, predicate=lambda r: r.time > 0)
+    sink.publish(_request(0))
+    sink.publish(_request(1))
+    assert seen == [1.0]
+    assert sink.errors == 1
+
+
+def test_stream_survives_predicate_errors():
+    stream = RequestStream(maxsize=10, predicate=lambda r: 1 / r.time > 0)
+    stream.publish(_request(0))
+    stream.publish(_request(1))
+    stream.close()
+    assert [elem.time for elem in stream] == [1.0]
+    assert stream.errors == 1
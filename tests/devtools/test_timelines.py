@@ -0,0 +1,71 @@
+import csv
+from pathlib import Path
+
+import pytest
+
+from fairybrowser.devtools.models import RawCommunicationInfo
+from fairybrowser.devtools.timelines import Timeline
+
+
+def _raw(url: str, start: float, end: float, connect: bool = True, initiator: str | None = None, connection_id: int = 1):
+    timing = {
+        "requestTime": start,
+        "dnsStart": 0.0 if connect else -1,
+        "dnsEnd": 5.0 if connect else -1,
+        "connectStart": 5.0 if connect else -1,
+        "connectEnd": 15.0 if connect else -1,
+        "sslStart": -1,
+        "sslEnd": -1,
+        "sendStart": 15.0 if connect else 0.0,
+        "sendEnd": 16.0 if connect else 1.0,
+        "receiveHeadersEnd": 30.0 if connect else 11.0,
+    }
+    return RawCommunicationInfo(status=200, url=url, method="GET", timing=timing, end_time=end,
+                                initiator_url=initiator, connection_id=connection_id)
+
+
+def _timeline() -> Timeline:
+    return Timeline.from_raws([
+        _raw("https://site/", 100.0, 100.05),
+        _raw("https://site/app.js", 100.06, 100.10, connect=False, initiator="https://site/"),
+        _raw("https://site/style.css", 100.07, 100.09, connect=False, initiator="https://site/"),
+        _raw("https://api.site/data", 100.12, 100.30, initiator="https://site/app.js", connection_id=2),
+        RawCommunicationInfo(status=None, url="https://site/failed", method="GET"),  # No timing.
+    ])
+
+
+def test_phases_and_connection_reuse():
+    timeline = _timeline()
+    assert len(timeline) == 4
+    first = timeline.entries[0]
+    assert first.start == 0.0
+    assert first.dns == 5.0 and first.connect == 10.0 and first.ssl is None
+    assert first.send == 1.0 and first.wait == 14.0
+    assert first.receive == pytest.approx(20.0)
+    assert first.end == pytest.approx(0.05)
+    assert not first.connection_reused
+    assert timeline.entries[1].connection_reused
+    assert [elem.url for elem in timeline.connections()[1]] == ["https://site/", "https://site/app.js",
+                                                                 "https://site/style.css"]
+    assert timeline.reuse_ratio == 0.5
+
+
+def test_concurrency():
+    timeline = _timeline()
+    points = timeline.concurrency()
+    assert points[0] == (0.0, 1)
+    assert timeline.max_concurrency == 2
+    assert points[-1][1] == 0
+
+
+def test_critical_path_and_export(tmp_path: Path):
+    timeline = _timeline()
+    assert [elem.url for elem in timeline.critical_path()] == [
+        "https://site/", "https://site/app.js", "https://api.site/data"]
+
+    path = tmp_path / "waterfall.csv"
+    timeline.write_csv(path)
+    with path.open() as fp:
+        rows = list(csv.DictReader(fp))
+    assert [row["url"] for row in rows] == [elem.url for elem in timeline]
+    assert rows[0]["connection_reused"] == "False"
@@ -62,3 +62,50 @@ def test_simple_request_analyzer_filters(tmp_path: Path):
     path_filtered = analyzer.get_simple_requests(path="/b/")
     assert len(path_filtered) == 1
     assert "/b/" in path_filtered[0].url
+
+
+def test_iter_simple_requests_is_lazy_and_filters(tmp_path: Path):
+    out = tmp_path / "debug3"
+    out.mkdir()
+    raws = [RawCommunicationInfo(status=200, url=f"https://site/{i}", method="GET" if i % 2 else "POST") for i in range(4)]
+    _write_raw_list(out / "a.json", raws[:2])
+    _write_raw_list(out / "b.json", raws[2:])
+
+    analyzer = SimpleRequestAnalyzer(out)
+    iterator = analyzer.iter_simple_requests(method="get")
+    assert not isinstance(iterator, list)
+    assert sorted(elem.url for elem in iterator) == ["https://site/1", "https://site/3"]
+    assert len(list(analyzer.iter_simple_requests(path="site/2"))) == 1
+
+
+def test_load_raw_infos_parallel_keeps_order(tmp_path: Path):
+    out = tmp_path / "debug4"
+    (out / "network").mkdir(parents=True)
+    for i in range(12):
+        raw = RawCommunicationInfo(status=200, url=f"https://site/{i}", method="GET", response_body=bytes([i, 255]))
+        _write_raw_list(out / "network" / f"{i:02d}.json", [raw])
+
+    analyzer = SimpleRequestAnalyzer(out)
+    loaded = analyzer.load_raw_infos(workers=2, shard_size=5)
+    assert [elem.url for elem in loaded] == [elem.url for elem in analyzer.raw_infos]
+    by_url = {elem.url: elem for elem in loaded}
+    assert by_url["https://site/3"].response_body == bytes([3, 255])
+    assert analyzer.load_report.records == 12
+    assert analyzer.load_report.workers == 2
+
+
+def test_query_refreshes_index_only_on_demand(tmp_path: Path, monkeypatch):
+    out = tmp_path / "debug5"
+    out.mkdir()
+    _write_raw_list(out / "a.json", [RawCommunicationInfo(status=200, url="https://site/a", method="GET")])
+    analyzer = SimpleRequestAnalyzer(out)
+    assert [elem.url for elem in analyzer.query(method="GET")] == ["https://site/a"]
+
+    _write_raw_list(out / "b.json", [RawCommunicationInfo(status=200, url="https://site/b", method="GET")])
+    calls = []
+    monkeypatch.setattr(type(analyzer.index), "refresh", lambda self: calls.append(1) or 0)
+    analyzer.query(method="GET")
+    assert calls == []  # No stat of the files per query.
+    monkeypatch.undo()
+    assert analyzer.refresh_index() == 1
+    assert len(analyzer.query(method="GET")) == 2
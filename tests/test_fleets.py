@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from fairybrowser import monitors, runners
+from fairybrowser.fleets import InstanceLoad, SelectionPolicy, measure_loads, select_states
+from fairybrowser.models import BrowserInfo, ExecutionState
+from fairybrowser.supervisors import Supervisor
+
+
+def _state(name, port=1, host="127.0.0.1"):
+    return ExecutionState(name=name, type="chromium", port=port, pid=os.getpid() if host == "127.0.0.1" else 0,
+                          host=host)
+
+
+@pytest.fixture
+def states_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitors, "_states_folder", tmp_path)
+    return tmp_path
+
+
+def test_policy_ranks_reachable_by_score():
+    loads = [
+        InstanceLoad(state=_state("busy"), leases=3, rss=200 * 2**20, latency=0.001),
+        InstanceLoad(state=_state("heavy"), leases=0, rss=4 * 2**30, latency=0.001),
+        InstanceLoad(state=_state("far", host="10.0.0.2"), leases=0, rss=None, latency=0.150),
+        InstanceLoad(state=_state("idle"), leases=0, rss=300 * 2**20, latency=0.002),
+        InstanceLoad(state=_state("down", host="10.0.0.3"), leases=0, rss=None, latency=None),
+    ]
+    ranked = [elem.state.name for elem in SelectionPolicy().rank(loads)]
+    assert ranked == ["idle", "far", "busy", "heavy"]
+    # Only the leases count.
+    ranked = [elem.state.name for elem in SelectionPolicy(rss_weight=0, latency_weight=0).rank(loads)]
+    assert ranked == ["far", "heavy", "idle", "busy"]
+
+
+def test_measure_loads_and_select(cdp_servers):
+    fast, slow = cdp_servers(), cdp_servers(delay=0.2)
+    closed = cdp_servers()
+    closed.close()
+    states = [_state("slow", slow.port), _state("fast", fast.port), _state("closed", closed.port)]
+    loads = {elem.state.name: elem for elem in measure_loads(states)}
+    assert loads["slow"].latency > 0.2 > loads["fast"].latency
+    assert loads["closed"].latency is None
+    assert loads["fast"].rss > 0
+    assert [elem.name for elem in select_states(states)] == ["fast", "slow"]
+    # Many leases outweigh the latency.
+    leases = {BrowserInfo(name="fast"): 5}
+    assert [elem.name for elem in select_states(states, leases)] == ["slow", "fast"]
+
+
+def test_remote_registration(states_folder, cdp_servers):
+    server = cdp_servers(host="127.0.0.2")
+    state = monitors.register_remote("lab", "127.0.0.2", server.port)
+    assert not state.is_local and state.endpoint == f"http://127.0.0.2:{server.port}"
+    assert monitors.get_execution_infos() == {BrowserInfo(name="lab"): state}
+
+    # Unreachable remote instances are skipped but stay registered.
+    server.close()
+    assert monitors.get_execution_infos() == {}
+    assert monitors.is_existent(BrowserInfo(name="lab")) is False
+    assert monitors.load_state(BrowserInfo(name="lab")) == state
+    with pytest.raises(ConnectionError, match="unreachable"):
+        runners._to_apt_execution_states("lab")
+    monitors.unregister("lab")
+    assert not (states_folder / "chromium" / "lab.json").exists()
+
+
+def test_runner_candidates_follow_the_load(states_folder, cdp_servers):
+    near, far = cdp_servers(host="127.0.0.2"), cdp_servers(delay=0.1, host="127.0.0.3")
+    monitors.register_remote("near", "127.0.0.2", near.port)
+    monitors.register_remote("far", "127.0.0.3", far.port)
+    assert [elem.name for elem in runners._to_apt_execution_states()] == ["near", "far"]
+    with runners._lease(monitors.load_state(BrowserInfo(name="near"))), \
+            runners._lease(monitors.load_state(BrowserInfo(name="near"))):
+        assert [elem.name for elem in runners._to_apt_execution_states()] == ["far", "near"]
+    assert runners._leases == {}
+
+
+def test_supervisor_fails_over_to_the_next_host(states_folder, cdp_servers, tmp_path):
+    first, second = cdp_servers(host="127.0.0.2"), cdp_servers(delay=0.05, host="127.0.0.3")
+    launched = []
+    supervisor = Supervisor(tmp_path / "s.sock", adopt=False, launcher=launched.append)
+    supervisor.register("first", "127.0.0.2", first.port)
+    supervisor.register("second", "127.0.0.3", second.port)
+    lease = supervisor.lease()
+    assert (lease.name, lease.host, lease.endpoint) == ("first", "127.0.0.2", f"http://127.0.0.2:{first.port}")
+    supervisor.release(lease.lease_id)
+    first.close()  # Not detected by a health check yet: `first` is still ranked first.
+    assert supervisor.lease(exclusive=True).name == "second"
+    assert BrowserInfo(name="first") not in supervisor.instances
+    assert launched == []
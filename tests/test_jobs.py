@@ -0,0 +1,148 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from fairybrowser.jobs import Job, JobRunner
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.url = None
+        self.closed = False
+
+    async def goto(self, url):
+        await asyncio.sleep(0.005)
+        if url.endswith("/kill") and not self.browser.fleet.killed:
+            self.browser.fleet.killed = True
+            self.browser.connected = False
+            raise RuntimeError("Target closed")
+        self.url = url
+
+    async def title(self):
+        return f"title of {self.url}"
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def new_page(self):
+        self.browser.fleet.pages += 1
+        return FakePage(self.browser)
+
+
+class FakeBrowser:
+    def __init__(self, fleet):
+        self.fleet = fleet
+        self.connected = True
+        self.contexts = [FakeContext(self)]
+
+    def is_connected(self):
+        return self.connected
+
+
+class FakeFleet:
+    def __init__(self, available=True):
+        self.available = available
+        self.killed = False
+        self.connections = []
+        self.pages = 0
+
+    @asynccontextmanager
+    async def open_browser(self, target):
+        if not self.available:
+            raise ConnectionError("down")
+        self.connections.append(target)
+        yield FakeBrowser(self)
+
+
+def _runner(fleet, **kwargs):
+    return JobRunner(open_browser=fleet.open_browser, **kwargs)
+
+
+def test_jobs_are_spread_and_streamed():
+    fleet = FakeFleet()
+    runner = _runner(fleet, instances=["a", "b"], pages_per_instance=3)
+    urls = (f"https://example.com/{i}" for i in range(60))  # Consumed lazily.
+    results = list(runner.run(urls))
+    assert sorted(elem.job_id for elem in results) == list(range(60))
+    assert all(elem.ok and elem.value == f"title of {elem.url}" for elem in results)
+    assert set(runner.metrics.per_instance) == {"a", "b"}
+    assert fleet.pages == 6
+    summary = runner.metrics.summary()
+    assert summary["succeeded"] == 60 and summary["throughput"] > 0 and summary["p95"] >= summary["p50"] > 0
+
+
+def test_custom_func_errors_and_timeouts():
+    async def read(page, job):
+        if job.job_id == "slow":
+            await asyncio.sleep(5)
+        if job.job_id == "bad":
+            raise ValueError("no h1")
+        return job.job_id
+
+    fleet = FakeFleet()
+    runner = _runner(fleet, pages_per_instance=2, timeout=0.2)
+    jobs = [Job("https://example.com/", read, job_id=name) for name in ("ok", "slow", "bad")]
+    results = {elem.job_id: elem for elem in runner.run(jobs)}
+    assert results["ok"].ok and results["ok"].value == "ok"
+    assert not results["slow"].ok and results["slow"].error.startswith("Timeout")
+    assert results["bad"].error == "ValueError: no h1" and results["bad"].attempts == 1
+    assert fleet.pages == 3  # The page of the timeout was replaced.
+    assert runner.metrics.failed == 2
+
+
+def test_retry_on_instance_death():
+    fleet = FakeFleet()
+    runner = _runner(fleet, instances=["a"], pages_per_instance=2)
+    jobs = ["https://example.com/1", "https://example.com/kill", "https://example.com/2"]
+    results = {elem.url: elem for elem in runner.run(jobs)}
+    assert all(elem.ok for elem in results.values())
+    assert results["https://example.com/kill"].attempts == 2
+    assert fleet.connections == ["a", "a"]  # Reconnected.
+    assert runner.metrics.retries >= 1
+
+
+def test_no_instance_available():
+    runner = _runner(FakeFleet(available=False), instances=2, reconnects=0)
+    results = list(runner.run(["https://example.com/1", "https://example.com/2"]))
+    assert [elem.ok for elem in results] == [False, False]
+    assert results[0].error == "No instance is available."
+
+
+def test_reconnects_count_the_failures_in_a_row():
+    crashed = set()
+
+    async def crash_once(page, job):
+        if job.job_id not in crashed:
+            crashed.add(job.job_id)
+            page.browser.connected = False
+            raise RuntimeError("Target closed")
+        return job.job_id
+
+    fleet = FakeFleet()
+    runner = _runner(fleet, instances=["a"], reconnects=1, retries=1)
+    results = list(runner.run(Job(None, crash_once, job_id=i) for i in range(3)))
+    assert sorted(elem.job_id for elem in results if elem.ok) == [0, 1, 2]
+    assert fleet.connections == ["a"] * 4
+
+
+def test_job_iterable_errors_are_raised():
+    def jobs():
+        yield "https://example.com/1"
+        yield "https://example.com/2"
+        raise ValueError("broken feed")
+
+    results = []
+    with pytest.raises(ValueError, match="broken feed"):
+        for result in _runner(FakeFleet()).run(jobs()):
+            results.append(result)
+    assert sorted(elem.url for elem in results) == ["https://example.com/1", "https://example.com/2"]
@@ -0,0 +1,184 @@
+import json
+import threading
+import urllib.request
+from contextlib import ExitStack
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from websockets.sync.client import connect  # noqa: E402
+from websockets.sync.server import serve  # noqa: E402
+
+from fairybrowser.proxies import CdpProxy, matches  # noqa: E402
+
+
+def _dumps(message):
+    return json.dumps(message, separators=(",", ":"))  # As Chromium.
+
+
+class FakeBrowser:
+    """Upstream which answers a few commands and emits the events given by `Test.emit`."""
+
+    def __init__(self):
+        self.received = []
+        self.attach_count = 0
+        self.server = serve(self._handle, "127.0.0.1", 0, process_request=self._http)
+        self.port = self.server.socket.getsockname()[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _http(self, connection, request):
+        if request.path.startswith("/json/version"):
+            return connection.respond(200, json.dumps({"webSocketDebuggerUrl": f"ws://127.0.0.1:{self.port}/devtools/browser/x"}))
+        return None
+
+    def _handle(self, connection):
+        for raw in connection:
+            message = json.loads(raw)
+            self.received.append(message)
+            method, params = message["method"], message.get("params", {})
+            result = {"upstreamId": message["id"]}
+            # As Chromium, `Target.attachedToTarget` precedes the reply.
+            if method == "Target.attachToTarget":
+                self.attach_count += 1
+                result = {"sessionId": f"S{self.attach_count}-" + params["targetId"]}
+                connection.send(_dumps({"method": "Target.attachedToTarget",
+                                        "params": {"sessionId": result["sessionId"], "waitingForDebugger": False,
+                                                   "targetInfo": {"targetId": params["targetId"], "type": "page"}}}))
+            elif method == "Target.getTargets":
+                result = {"targetInfos": [{"targetId": "T1", "type": "page", "url": "about:blank"},
+                                          {"targetId": "W1", "type": "service_worker", "url": ""}]}
+            elif method == "Target.setAutoAttach" and params.get("autoAttach"):
+                connection.send(_dumps({"method": "Target.attachedToTarget",
+                                        "params": {"sessionId": "A-T1", "targetInfo": {"targetId": "T1", "type": "page"}}}))
+            connection.send(_dumps({"id": message["id"], "result": result}))
+            if method == "Test.emit":
+                connection.send(_dumps(params["event"]))
+
+    def close(self):
+        self.server.shutdown()
+
+
+class Client:
+    def __init__(self, ws):
+        self.ws = ws
+        self.next_id = 0
+
+    def send(self, method, params=None, session_id=None):
+        self.next_id += 1
+        message = {"id": self.next_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        self.ws.send(json.dumps(message))
+        return self.next_id
+
+    def call(self, method, params=None, session_id=None):
+        message_id = self.send(method, params, session_id)
+        events = []
+        while True:
+            message = json.loads(self.ws.recv(timeout=5))
+            if message.get("id") == message_id:
+                return message, events
+            events.append(message)
+
+    def drain(self, timeout=0.2):
+        result = []
+        try:
+            while True:
+                result.append(json.loads(self.ws.recv(timeout=timeout)))
+        except TimeoutError:
+            return result
+
+
+@pytest.fixture
+def proxied():
+    browser = FakeBrowser()
+    proxy = CdpProxy(f"http://127.0.0.1:{browser.port}").start()
+    with ExitStack() as stack:
+        yield browser, proxy, lambda: Client(stack.enter_context(connect(proxy.ws_endpoint)))
+    proxy.stop()
+    browser.close()
+
+
+def test_matches():
+    assert matches("Network.requestWillBeSent", {"Network.*"})
+    assert matches("Page.loadEventFired", {"Page.loadEventFired"})
+    assert not matches("Page.loadEventFired", {"Network.*"})
+    assert matches("Anything.event", {"*"})
+
+
+def test_ids_are_remapped_per_client(proxied):
+    _, _, new_client = proxied
+    a, b = new_client(), new_client()
+    reply_a, _ = a.call("Browser.getVersion")
+    reply_b, _ = b.call("Browser.getVersion")
+    assert reply_a["id"] == reply_b["id"] == 1
+    assert reply_a["result"]["upstreamId"] != reply_b["result"]["upstreamId"]
+
+
+def test_sessions_belong_to_the_attaching_client(proxied):
+    browser, _, new_client = proxied
+    a, b = new_client(), new_client()
+    reply, _ = a.call("Target.attachToTarget", {"targetId": "T1", "flatten": True})
+    session_id = reply["result"]["sessionId"]
+    assert a.call("Network.enable", session_id=session_id)[0]["result"]
+    refused, _ = b.call("Network.enable", session_id=session_id)
+    assert "not attached" in refused["error"]["message"]
+    assert sum(elem["method"] == "Network.enable" for elem in browser.received) == 1
+
+    # Session events go to the owner only.
+    event = {"method": "Network.requestWillBeSent", "params": {"requestId": "1"}, "sessionId": session_id}
+    a.call("Test.emit", {"event": event})
+    assert a.drain() == [event]
+    assert b.drain() == []
+
+
+def test_browser_events_are_filtered_by_subscription(proxied):
+    _, proxy, new_client = proxied
+    a, b = new_client(), new_client()
+    a.call("Proxy.subscribe", {"patterns": ["Custom.*"]})
+    _, events = a.call("Test.emit", {"event": {"method": "Custom.happened", "params": {}}})
+    assert [elem["method"] for elem in events + a.drain()] == ["Custom.happened"]
+    assert b.drain() == []
+    stats = {elem.client_id: elem for elem in proxy.stats()}
+    assert sum(elem.events_filtered for elem in stats.values()) == 1
+    assert max(elem.messages_in for elem in stats.values()) == 2
+
+
+def test_auto_attach_is_shared(proxied):
+    browser, _, new_client = proxied
+    a, b = new_client(), new_client()
+    _, events = a.call("Target.setAutoAttach", {"autoAttach": True, "waitForDebuggerOnStart": False, "flatten": True})
+    attached = events + a.drain()
+    assert attached[0]["params"]["sessionId"] == "A-T1"
+
+    _, attached = b.call("Target.setAutoAttach", {"autoAttach": True, "waitForDebuggerOnStart": False, "flatten": True})
+    # Not sent upstream again; the existing page is attached for `b`, before the reply.
+    assert sum(elem["method"] == "Target.setAutoAttach" for elem in browser.received) == 1
+    assert [elem["params"]["sessionId"] for elem in attached] == ["S1-T1"]
+    assert b.call("Runtime.enable", session_id="S1-T1")[0]["result"] is not None
+    assert a.drain() == []  # No session of `b` for `a`.
+
+
+def test_explicit_attach_goes_to_the_requester(proxied):
+    _, _, new_client = proxied
+    a, b = new_client(), new_client()
+    b.call("Target.setAutoAttach", {"autoAttach": True, "waitForDebuggerOnStart": False, "flatten": True})
+    b.drain()
+    reply, events = a.call("Target.attachToTarget", {"targetId": "T1", "flatten": True})
+    assert [(elem["method"], elem["params"]["sessionId"]) for elem in events] == [
+        ("Target.attachedToTarget", reply["result"]["sessionId"])]
+    assert b.drain() == []
+    refused, _ = b.call("Runtime.enable", session_id=reply["result"]["sessionId"])
+    assert "not attached" in refused["error"]["message"]
+
+
+def test_http_endpoints(proxied):
+    _, proxy, new_client = proxied
+    new_client().call("Browser.getVersion")
+    with urllib.request.urlopen(proxy.endpoint + "/json/version/") as response:
+        assert json.loads(response.read())["webSocketDebuggerUrl"] == proxy.ws_endpoint
+    with urllib.request.urlopen(proxy.endpoint + "/json/proxy/stats") as response:
+        [stats] = json.loads(response.read())
+    assert stats["messages_in"] == 1 and stats["messages_out"] == 1 and stats["rate_in"] > 0
+
@@ -0,0 +1,195 @@
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from fairybrowser import clients
+from fairybrowser.clients import SupervisorClient, is_supervisor_running, leased_page
+from fairybrowser.models import BrowserInfo, ExecutionState
+from fairybrowser.supervisors import Supervisor, SupervisorError, parse_address
+
+
+class FakeLauncher:
+    """Each instance is a fake CDP endpoint of this process."""
+
+    def __init__(self, start_server):
+        self.start_server = start_server
+        self.servers = {}
+        self.launched = []
+
+    @property
+    def ports(self) -> set[int]:
+        return {server.port for server in self.servers.values()}
+
+    def __call__(self, info: BrowserInfo) -> ExecutionState:
+        server = self.servers[info.name] = self.start_server()
+        self.launched.append(info.name)
+        return ExecutionState(name=info.name, type=info.type, port=server.port, pid=os.getpid())
+
+    def kill(self, name: str) -> None:
+        self.servers.pop(name).close()
+
+
+@pytest.fixture
+def served(tmp_path, cdp_servers):
+    launcher = FakeLauncher(cdp_servers)
+    supervisor = Supervisor(tmp_path / "s.sock", health_interval=60, launcher=launcher, adopt=False).start()
+    yield supervisor, launcher
+    supervisor.shutdown()
+
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:8000") == (socket.AF_INET, ("127.0.0.1", 8000))
+    assert parse_address("/tmp/fairy.sock")[1] == "/tmp/fairy.sock"
+
+
+def test_lease_launches_once_and_reuses(served):
+    supervisor, launcher = served
+    with SupervisorClient(supervisor.address) as client:
+        first = client.lease("worker")
+        start = time.perf_counter()
+        second = client.lease("worker")
+        elapsed = time.perf_counter() - start
+        assert launcher.launched == ["worker"]
+        assert (first.port, first.pid) == (second.port, second.pid)
+        assert first.endpoint == f"http://127.0.0.1:{first.port}"
+        assert elapsed < 0.1
+        [status] = client.status()
+        assert status.leases == 2
+        assert client.release(first) is True
+        assert client.release(first) is False
+        assert client.status()[0].leases == 1
+
+
+def test_exclusive_lease_and_selection(served):
+    supervisor, launcher = served
+    with SupervisorClient(supervisor.address) as client:
+        lease = client.lease(exclusive=True)
+        assert lease.exclusive and lease.name == BrowserInfo().name
+        with pytest.raises(SupervisorError, match="exclusively"):
+            client.lease(lease.name)
+        # Without a name, another instance is launched.
+        other = client.lease()
+        assert other.name != lease.name
+        assert len(launcher.launched) == 2
+        client.release(lease)
+        assert client.lease(lease.name).name == lease.name
+
+
+def test_leases_released_on_disconnect(served):
+    supervisor, _ = served
+    client = SupervisorClient(supervisor.address)
+    client.lease("worker", exclusive=True)
+    client.close()
+    for _ in range(100):
+        if not supervisor.leases:
+            break
+        time.sleep(0.01)
+    assert supervisor.status()[0].leases == 0
+
+
+def test_dead_instance_is_forgotten_and_relaunched(served):
+    supervisor, launcher = served
+    with SupervisorClient(supervisor.address) as client:
+        lease = client.lease("worker")
+        launcher.kill("worker")
+        assert supervisor.check_health() == [BrowserInfo(name="worker")]
+        assert client.status() == []
+        assert client.release(lease) is False
+        assert client.lease("worker").port != lease.port
+        assert launcher.launched == ["worker", "worker"]
+
+
+def test_health_check_keeps_an_instance_relaunched_meanwhile(tmp_path, cdp_servers):
+    launcher = FakeLauncher(cdp_servers)
+    relaunched = {}
+
+    def _is_healthy(state):
+        if state.port in launcher.ports:
+            return True
+        if not relaunched:  # `_lease` relaunches it between the snapshot and the removal.
+            relaunched["lease"] = None
+            relaunched["lease"] = supervisor.lease("worker")
+        return False
+
+    supervisor = Supervisor(tmp_path / "s.sock", health_interval=60, launcher=launcher, adopt=False,
+                            is_healthy=_is_healthy)
+    supervisor.instances[BrowserInfo(name="worker")] = supervisor._new_instance(launcher(BrowserInfo(name="worker")))
+    launcher.kill("worker")
+    assert supervisor.check_health() == []
+    [status] = supervisor.status()
+    assert status.state.port == relaunched["lease"].port and status.leases == 1
+    assert supervisor.release(relaunched["lease"].lease_id) is True
+
+
+def test_errors_and_shutdown(served):
+    supervisor, _ = served
+    assert is_supervisor_running(supervisor.address)
+    with SupervisorClient(supervisor.address) as client:
+        with pytest.raises(SupervisorError, match="Unknown op"):
+            client.request("unknown")
+        client.shutdown()
+    for _ in range(100):
+        if not is_supervisor_running(supervisor.address):
+            break
+        time.sleep(0.01)
+    assert not is_supervisor_running(supervisor.address)
+    with pytest.raises(SupervisorError, match="No supervisor"):
+        SupervisorClient(supervisor.address)
+
+
+def test_shutdown_from_client_while_serving_forever(tmp_path, cdp_servers):
+    supervisor = Supervisor(tmp_path / "s.sock", health_interval=60, launcher=FakeLauncher(cdp_servers), adopt=False)
+    errors = []
+
+    def _serve():
+        try:
+            supervisor.serve_forever()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=_serve)
+    thread.start()
+    for _ in range(100):
+        if is_supervisor_running(supervisor.address):
+            break
+        time.sleep(0.01)
+    with SupervisorClient(supervisor.address) as client:
+        client.shutdown()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert errors == []
+    assert not (tmp_path / "s.sock").exists()
+
+
+def test_leased_page_without_windows(served, monkeypatch):
+    supervisor, _ = served
+    endpoints = []
+    page = SimpleNamespace(name="existing")
+    browser = SimpleNamespace(contexts=[SimpleNamespace(pages=[page])], new_page=lambda: None)
+
+    def _connect_over_cdp(endpoint):
+        endpoints.append(endpoint)
+        return browser
+
+    @contextmanager
+    def fake_sync_playwright():
+        yield SimpleNamespace(chromium=SimpleNamespace(connect_over_cdp=_connect_over_cdp))
+
+    monkeypatch.setattr(sys, "platform", "linux")  # No window lookup (`ctypes.windll`).
+    monkeypatch.setattr(clients, "sync_playwright", fake_sync_playwright)
+    with leased_page("worker", address=supervisor.address) as leased:
+        assert leased is page
+        assert supervisor.status()[0].leases == 1
+    [status] = supervisor.status()
+    assert endpoints == [f"ws://127.0.0.1:{status.state.port}/devtools/browser/fake"]
+    for _ in range(100):
+        if not supervisor.leases:
+            break
+        time.sleep(0.01)
+    assert supervisor.status()[0].leases == 0
@@ -0,0 +1,135 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from fairybrowser.windows.editors import (
+    classify_clicks,
+    pair_buttons,
+    simplify_polyline,
+    to_click_events,
+    to_play_script,
+    write_play_script,
+)
+from fairybrowser.windows.models import MouseClickEvent, MouseEvent, MouseEventTypeEnum, MouseMoveEvent, to_play_event
+from fairybrowser.windows.players import MousePlayer
+from fairybrowser.windows.streams import EventKindEnum, MouseEventBuffer
+
+PRESS, RELEASE, MOVE = EventKindEnum.PRESS, EventKindEnum.RELEASE, EventKindEnum.MOVE
+
+
+def _buffer(rows) -> MouseEventBuffer:
+    buffer = MouseEventBuffer()
+    for row in rows:
+        buffer.append(*row)
+    return buffer
+
+
+def test_pair_buttons_per_button():
+    buffer = _buffer([
+        (0.0, 10, 10, PRESS, 1),
+        (0.1, 10, 10, PRESS, 2),  # Right pressed while left is held.
+        (0.2, 10, 10, RELEASE, 2),
+        (0.3, 50, 60, RELEASE, 1),
+        (1.0, 5, 5, PRESS, 1),  # Release lost.
+        (2.0, 5, 5, PRESS, 1),
+        (2.1, 5, 5, RELEASE, 1),
+    ])
+    clicks = pair_buttons(buffer)
+    assert clicks["button"].tolist() == [1, 2, 1]
+    assert clicks["t0"].tolist() == [0.0, 0.1, 2.0]
+    assert clicks["x1"].tolist() == [50, 10, 5]
+
+
+def test_classify_drags_and_double_clicks():
+    buffer = _buffer([
+        (0.0, 10, 10, PRESS, 1), (0.05, 10, 10, RELEASE, 1),
+        (0.2, 11, 10, PRESS, 1), (0.25, 11, 10, RELEASE, 1),
+        (0.4, 11, 11, PRESS, 1), (0.45, 11, 11, RELEASE, 1),
+        (2.0, 10, 10, PRESS, 1), (2.5, 200, 10, RELEASE, 1),
+        (2.6, 200, 10, PRESS, 1), (2.7, 200, 10, RELEASE, 1),
+    ])
+    clicks = classify_clicks(pair_buttons(buffer))
+    assert clicks["clicks"].tolist() == [1, 2, 3, 1, 1]
+    assert clicks["drag"].tolist() == [False, False, False, True, False]
+
+
+def test_simplify_polyline():
+    x = np.linspace(0, 100, 101)
+    y = np.where(x <= 50, x, 100 - x) + np.random.default_rng(0).uniform(-0.2, 0.2, 101)
+    keep = simplify_polyline(x, y, tolerance=1.0)
+    assert np.flatnonzero(keep).tolist() == [0, 50, 100]
+
+
+def test_play_script_roundtrip(tmp_path: Path):
+    rows = [(i * 0.001, i, 2 * i, MOVE, 0) for i in range(100)]
+    rows += [(0.2, 99, 198, PRESS, 1), (0.3, 99, 198, RELEASE, 1)]
+    script = to_play_script(_buffer(rows))
+    events = [to_play_event(elem) for elem in script]
+    assert [type(elem) for elem in events] == [MouseMoveEvent, MouseMoveEvent, MouseClickEvent]
+
+    path = tmp_path / "script.json"
+    write_play_script(script, path)
+    data = json.loads(path.read_text())
+    assert "clicks" not in data[-1]
+    assert data == json.loads(json.dumps(script))
+    write_play_script(events, path)  # The models give the same file.
+    assert json.loads(path.read_text()) == data
+    # Starts with a move, which is also a type of the recorded events.
+    assert MousePlayer(path).events == events
+
+
+def test_to_click_events_per_button():
+    def event(t, button, pressed):
+        return MouseEvent(type=MouseEventTypeEnum.BUTTON, x=1, y=2, button=button, pressed=pressed, time=t)
+
+    events = [event(0.0, "Button.left", True), event(0.1, "Button.right", True),
+              event(0.2, "Button.right", False), event(0.3, "Button.left", False)]
+    clicks = to_click_events(events)
+    assert [elem.button for elem in clicks] == ["left", "right"]
+    assert [elem.duration for elem in clicks] == pytest.approx([0.3, 0.1])
+
+
+def _max_error(x, y, keep):
+    """The distance of the dropped points to the segment between the kept points around them."""
+    kept = np.flatnonzero(keep)
+    a = kept[np.clip(np.searchsorted(kept, np.arange(len(x)), side="right") - 1, 0, len(kept) - 2)]
+    b = kept[np.searchsorted(kept, a) + 1]
+    dx, dy = x[b] - x[a], y[b] - y[a]
+    length = np.hypot(dx, dy)
+    cross = np.abs(dx * (y - y[a]) - dy * (x - x[a]))
+    distance = np.where(length > 0, cross / np.where(length > 0, length, 1.0), np.hypot(x - x[a], y - y[a]))
+    return distance[~keep].max(initial=0.0)
+
+
+@pytest.mark.parametrize("noise", [0.0, 0.4, 3.0])
+def test_simplification_stays_within_tolerance(noise):
+    rng = np.random.default_rng(1)
+    t = np.arange(50_000) * 0.001
+    x = np.sin(t) * 500 + 500 + rng.uniform(-noise, noise, len(t))
+    y = np.cos(t / 3) * 300 + 300 + rng.uniform(-noise, noise, len(t))
+    keep = simplify_polyline(x, y, tolerance=1.0)
+    assert keep[0] and keep[-1]
+    assert _max_error(x, y, keep) <= 1.0
+    if noise < 1.0:
+        assert keep.sum() < len(t) // 20
+
+
+def test_million_events_under_a_second():
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    t = np.arange(n) * 0.001
+    kind = np.full(n, MOVE, dtype=np.uint8)
+    kind[::1000] = PRESS
+    kind[5::1000] = RELEASE
+    columns = {"t": t, "x": np.sin(t) * 500 + 500 + rng.uniform(-0.4, 0.4, n),
+               "y": np.cos(t / 3) * 300 + 300 + rng.uniform(-0.4, 0.4, n),
+               "kind": kind, "value": (kind != MOVE).astype(np.int8)}
+    start = time.perf_counter()
+    script = to_play_script(columns, tolerance=1.0)
+    elapsed = time.perf_counter() - start
+    assert sum(elem["type"] == "click" for elem in script) == 1000
+    assert len(script) < n // 10
+    assert elapsed < 1.0
@@ -0,0 +1,50 @@
+import pytest
+
+from fairybrowser.windows.models import MouseClickEvent, MouseMoveEvent
+from fairybrowser.windows.players import FakeBackend, MousePlayer, play_actions, to_actions
+
+
+def _click(t0: float, t1: float, x0=10.0, x1=10.0, button="left") -> MouseClickEvent:
+    return MouseClickEvent(x0=x0, y0=5, x1=x1, y1=5, duration=t1 - t0, pressed_time=t0, depressed_time=t1, button=button)
+
+
+def test_to_actions_uses_absolute_offsets():
+    events = [MouseMoveEvent(x=0, y=0, time=100.0), _click(100.5, 100.7, x1=30), _click(101.0, 101.1, button="right")]
+    actions = to_actions(events, speed=2.0)
+    assert [(elem.offset, elem.kind) for elem in actions] == [
+        (0.0, "move"), (0.25, "move"), (0.25, "down"), (pytest.approx(0.35), "move"), (pytest.approx(0.35), "up"),
+        (0.5, "move"), (0.5, "down"), (pytest.approx(0.55), "up"),
+    ]
+    assert actions[-1].button == "right"
+
+
+def test_play_actions_with_virtual_clock():
+    now = [0.0]
+
+    def clock():
+        now[0] += 0.0001  # Every call takes 0.1 ms.
+        return now[0]
+
+    backend = FakeBackend(clock)
+    actions = to_actions([_click(i * 0.01, i * 0.01 + 0.005) for i in range(100)])
+    stats = play_actions(actions, backend, clock=clock, spin=1.0, start=1.0)
+    assert len(backend.actions) == 300
+    # The deadlines are absolute: no drift accumulates over the script.
+    assert backend.actions[-1][0] - (1.0 + actions[-1].offset) < 0.001
+    assert stats.max < 0.001
+
+
+def test_player_with_fake_backend():
+    now = [0.0]
+
+    def clock():
+        now[0] += 0.0001
+        return now[0]
+
+    player = MousePlayer([_click(0.0, 0.02), _click(0.05, 0.06)])
+    backend = FakeBackend(clock)
+    start = clock()
+    stats = player.start(backend=backend, lead_in=0.0, spin=1.0, clock=clock)
+    assert [elem[1] for elem in backend.actions] == ["move", "down", "up", "move", "down", "up"]
+    assert backend.actions[-1][0] - start == pytest.approx(0.06, abs=0.001)
+    assert stats.count == 6 and stats.summary()["max_ms"] < 1
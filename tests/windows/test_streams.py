@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+from fairybrowser.windows.models import MouseEventTypeEnum
+from fairybrowser.windows.streams import EventKindEnum, MouseEventBuffer, MouseStreamWriter, read_mouse_stream, to_button_code
+
+
+def _buffer(n: int, offset: float = 0.0) -> MouseEventBuffer:
+    buffer = MouseEventBuffer()
+    for i in range(n):
+        buffer.append(offset + i * 0.01, 10.0 + i, 20.0 + i, EventKindEnum.MOVE)
+    return buffer
+
+
+@pytest.mark.parametrize("name", ["stream.bin", "stream.jsonl"])
+def test_write_and_read_chunks(tmp_path: Path, name: str):
+    writer = MouseStreamWriter(tmp_path / name, origin=1700000000.0)
+    writer.write(_buffer(3))
+    click = MouseEventBuffer()
+    click.append(1.0, 5.0, 6.0, EventKindEnum.PRESS, to_button_code("Button.right"))
+    click.append(1.1, 5.0, 6.0, EventKindEnum.SCROLL, -300)
+    writer.write(click)
+    writer.close()
+
+    events, origin = read_mouse_stream(tmp_path / name)
+    assert origin == 1700000000.0
+    assert len(events) == 5
+    columns = events.to_numpy()
+    assert columns["x"].tolist() == [10.0, 11.0, 12.0, 5.0, 5.0]
+    assert columns["kind"].tolist() == [0, 0, 0, EventKindEnum.PRESS, EventKindEnum.SCROLL]
+    assert columns["value"].tolist() == [0, 0, 0, 2, -128]  # Clamped to int8.
+
+
+def test_truncated_binary_chunk_is_ignored(tmp_path: Path):
+    path = tmp_path / "stream.bin"
+    writer = MouseStreamWriter(path, origin=0.0)
+    writer.write(_buffer(4))
+    writer.write(_buffer(4, offset=1.0))
+    writer.close()
+    assert path.stat().st_size == 14 + 2 * (4 + 4 * 18)  # header + 2 chunks of 18 bytes per event
+    path.write_bytes(path.read_bytes()[:-5])
+    events, _ = read_mouse_stream(path)
+    assert len(events) == 4
+
+
+def test_to_mouse_events():
+    buffer = _buffer(1)
+    buffer.append(0.5, 1.0, 2.0, EventKindEnum.PRESS, 1)
+    buffer.append(0.6, 1.0, 2.0, EventKindEnum.RELEASE, 1)
+    events = buffer.to_mouse_events()
+    assert [elem.type for elem in events] == [MouseEventTypeEnum.MOVE, MouseEventTypeEnum.BUTTON, MouseEventTypeEnum.BUTTON]
+    assert events[1].button == "Button.left" and events[1].pressed and not events[2].pressed
+
+
+def test_recorder_decimates_and_flushes(tmp_path: Path):
+    from fairybrowser.windows.recorders import MouseStreamRecorder
+
+    now = [100.0]
+    recorder = MouseStreamRecorder(tmp_path / "rec.bin", min_move_interval=0.05, clock=lambda: now[0])
+    recorder.open()
+    for i in range(10):
+        now[0] += 0.01
+        recorder._on_move(i, i)
+    recorder.flush()
+    recorder._on_click(3, 4, "Button.left", True)
+    recorder._on_scroll(3, 4, 0, 1)
+    recorder.close()
+
+    events, _ = read_mouse_stream(tmp_path / "rec.bin")
+    kinds = events.kind.tolist()
+    assert kinds.count(EventKindEnum.MOVE) == 2
+    assert recorder.dropped_moves == 8
+    assert kinds[-2:] == [EventKindEnum.PRESS, EventKindEnum.SCROLL]
+    assert events.t[0] == pytest.approx(0.01)